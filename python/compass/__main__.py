@@ -1,6 +1,32 @@
-"""Entry point for python -m compass."""
+"""Entry point for python -m compass and the `compass` console script."""
 
-from compass.cli import app
+import sys
+
+
+def main() -> None:
+    """Run the CLI.
+
+    `compass --version` is answered before Typer, Rich and the CLI module
+    are imported, so scripts that probe the version pay only for the
+    interpreter startup. Likewise `compass exec` is forwarded to a running
+    `compass serve` daemon before the CLI is loaded.
+    """
+    if sys.argv[1:] in (["--version"], ["-v"]):
+        from compass import __version__
+
+        print(f"Compass CLI v{__version__}")
+        return
+
+    if sys.argv[1:2] == ["exec"]:
+        from compass.server import thin_exec
+
+        if thin_exec(sys.argv[1:]):
+            return
+
+    from compass.cli import app
 
-if __name__ == "__main__":
     app()
+
+
+if __name__ == "__main__":
+    main()
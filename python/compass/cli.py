@@ -1,19 +1,31 @@
-"""Main CLI interface using Typer."""
+"""Main CLI interface using Typer.
 
+Subsystems (config, vault/db, sessions, llm, rag, ingest) are imported
+inside the commands that use them, so that `compass --version`, `--help`
+and light commands do not pay for loading them.
+"""
+
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
 import sys
 import typer
 from rich.console import Console
-from rich.prompt import Prompt
 from rich import print as rprint
+from rich.markup import escape
 
 from compass import __version__
-from compass.config import Config
-from compass.vault import Vault, find_vault
-from compass.paths import get_config_dir, get_vault_path
-from compass.sessions import Session, SessionManager
-from compass.logging import RunLogger
+from compass import tracing
+
+if TYPE_CHECKING:
+    import sqlite3
+    from compass.config import Config
+    from compass.ingest.pipeline import IngestionPipeline
+    from compass.llm.base import LLMProvider, Message
+    from compass.metrics import MetricsStore
+    from compass.server import Client
+    from compass.tools.decision_journal import DecisionJournal
+    from compass.vault import Vault
 
 app = typer.Typer(
     name="compass",
@@ -22,7 +34,195 @@ app = typer.Typer(
     invoke_without_command=True,
 )
 console = Console()
-logger = RunLogger()
+
+# Commands that need the first-run setup (LLM mode and user name)
+FIRST_RUN_COMMANDS = {None, "chat", "exec"}
+
+
+def _complete(provider: "LLMProvider", messages: "list[Message]", **kwargs) -> Optional[str]:
+    """Run a completion, or return None while the provider is unimplemented."""
+    from compass.llm.cache import CachedProvider
+
+    if not isinstance(provider, CachedProvider):
+        kwargs.pop("context_hash", None)
+    try:
+        return "".join(tracing.trace_stream(provider.stream(messages, **kwargs)))
+    except NotImplementedError:
+        return None
+
+
+def _retrieve_context(vaults: "list[Vault]", query: str, cfg: "Config") -> list[dict]:
+    """Retrieve and rerank chunks from one or more vaults for a query.
+
+    Several vaults are searched in parallel and merged by normalized score.
+    Each vault is searched with its own profile's embedder and settings;
+    `cfg` decides how many results are kept and how scores are merged.
+    """
+    from compass.config import Config
+    from compass.rag.embed import create_embedder
+    from compass.rag.rerank import NoOpReranker
+    from compass.rag.retrieve import FederatedRetriever, VectorRetriever
+    from compass.vault import vault_labels
+
+    top_k = cfg.get("rag.top_k", 5)
+    if len(vaults) == 1:
+        vault_cfg = Config(profile_path=vaults[0].config_file)
+        chunks = VectorRetriever(
+            vaults[0].db_manager.get_reader(),
+            create_embedder(vault_cfg),
+            coarse_docs=vault_cfg.get("rag.coarse_docs", 50),
+        ).retrieve(query, top_k=top_k)
+        return NoOpReranker().rerank(query, chunks, top_k=top_k)
+
+    def vault_retriever(vault_obj: "Vault", conn: "sqlite3.Connection") -> VectorRetriever:
+        vault_cfg = Config(profile_path=vault_obj.config_file)
+        return VectorRetriever(
+            conn, create_embedder(vault_cfg), coarse_docs=vault_cfg.get("rag.coarse_docs", 50)
+        )
+
+    # Shareable connections, since each vault is queried from a worker thread
+    conns = [vault_obj.db_manager.connect(read_only=True) for vault_obj in vaults]
+    try:
+        retriever = FederatedRetriever(
+            {
+                label: vault_retriever(vault_obj, conn)
+                for label, vault_obj, conn in zip(
+                    vault_labels([v.path for v in vaults]), vaults, conns
+                )
+            },
+            normalize=cfg.get("rag.federated_normalize", "cosine"),
+        )
+        chunks = retriever.retrieve(query, top_k=top_k)
+    finally:
+        for conn in conns:
+            conn.close()
+    return NoOpReranker().rerank(query, chunks, top_k=top_k)
+
+
+def _resolve_vault(vault: Optional[Path]) -> Optional[Path]:
+    """Resolve the vault from --vault, COMPASS_VAULT, config or the current directory."""
+    from compass.vault import resolve_vault_path
+
+    return resolve_vault_path(vault)
+
+
+def _require_vault(vault: Optional[Path]) -> "Vault":
+    """Resolve the vault or exit with an error."""
+    vault_obj = _existing_vault(vault)
+    if vault_obj is None:
+        console.print("[red]Error:[/red] No vault found. Use --vault or run 'compass init'.")
+        raise typer.Exit(1)
+    return vault_obj
+
+
+def _existing_vault(vault: Optional[Path]) -> Optional["Vault"]:
+    """Resolve the vault, or return None if there is no initialized vault."""
+    from compass.vault import Vault
+
+    vault_path = _resolve_vault(vault)
+    if vault_path is None:
+        return None
+    vault_obj = Vault(vault_path)
+    return vault_obj if vault_obj.exists() else None
+
+
+def _build_pipeline(cfg: "Config", vault_obj: "Vault") -> "IngestionPipeline":
+    """Create the ingestion pipeline configured for a vault.
+
+    The vault's metrics directory is left to `compass metrics` rather than
+    chunked as text.
+    """
+    from compass.ingest.chunking import SimpleChunker
+    from compass.ingest.dedupe import Deduplicator
+    from compass.ingest.loaders import LoaderRegistry
+    from compass.ingest.pipeline import IngestionPipeline
+    from compass.rag.embed import create_embedder
+
+    return IngestionPipeline(
+        chunker=SimpleChunker(cfg.get("rag.chunk_size", 512), cfg.get("rag.chunk_overlap", 50)),
+        embedder=create_embedder(cfg),
+        storage=cfg.get("storage.mode", "inline"),
+        codec=cfg.get("storage.codec", "zlib"),
+        dedupe=Deduplicator(cfg.get("dedupe.threshold", 0.9), cfg.get("dedupe.action", "flag")),
+        loaders=LoaderRegistry(
+            isolate=cfg.get("loaders.isolate", True),
+            timeout=cfg.get("loaders.timeout_seconds", 30),
+            memory_mb=cfg.get("loaders.memory_mb", 1024),
+        ),
+        exclude=[_metrics_dir(cfg, vault_obj)],
+    )
+
+
+def _metrics_dir(cfg: "Config", vault_obj: "Vault") -> Path:
+    """Get the directory of a vault's metrics CSV files."""
+    return vault_obj.path / str(cfg.get("metrics.dir", "metrics"))
+
+
+def _existing_vaults(values: Optional[List[str]]) -> "list[Vault]":
+    """Resolve --vault values (paths or group names) to initialized vaults.
+
+    Exits with an error if a value is neither a vault nor a vault group.
+    Without values this is the default vault, if there is one.
+    """
+    from compass.vault import Vault, resolve_vault_paths
+
+    vaults = [Vault(path) for path in resolve_vault_paths(values)]
+    if not values:
+        return [vault_obj for vault_obj in vaults if vault_obj.exists()]
+    for vault_obj in vaults:
+        if not vault_obj.exists():
+            console.print(
+                f"[red]Error:[/red] No vault at {escape(str(vault_obj.path))}. "
+                "--vault takes a vault path or a vault.groups name from config."
+            )
+            raise typer.Exit(1)
+    return vaults
+
+
+def _connect_daemon() -> Optional["Client"]:
+    """Connect to a running `compass serve` daemon, if any."""
+    from compass.server import Client
+
+    return Client.connect()
+
+
+def _parse_since(value: str) -> datetime:
+    """Parse a relative duration (30m, 24h, 7d) or an ISO date into a datetime."""
+    units = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+    if value[-1:] in units and value[:-1].isdigit():
+        return datetime.now() - timedelta(**{units[value[-1]]: int(value[:-1])})
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise typer.BadParameter(f"Expected a duration like 7d or an ISO date, got '{value}'")
+
+
+def _start_profiler(ctx: typer.Context) -> None:
+    """Profile the rest of the invocation and report when the command exits."""
+    from rich.table import Table
+    from compass.profiling import Profiler
+
+    profiler = Profiler(ctx.invoked_subcommand or "compass")
+    profiler.start()
+
+    def report() -> None:
+        profiler.stop()
+        table = Table(title="Hot functions (by self time)")
+        table.add_column("function", no_wrap=True)
+        for column in ("calls", "self ms", "cumulative ms"):
+            table.add_column(column, justify="right")
+        for row in profiler.hot_functions():
+            table.add_row(
+                row["function"],
+                str(row["calls"]),
+                f"{row['self_ms']:.1f}",
+                f"{row['cumulative_ms']:.1f}",
+            )
+        console.print(table)
+        console.print(f"[dim]CPU profile: {profiler.prof_path}[/dim]")
+        console.print(f"[dim]Allocations: {profiler.alloc_path}[/dim]")
+
+    ctx.call_on_close(report)
 
 
 def version_callback(value: bool):
@@ -43,13 +243,57 @@ def main(
         is_eager=True,
         help="Show version and exit",
     ),
+    profile: bool = typer.Option(
+        False,
+        "--profile",
+        help="Profile CPU and allocations; saves reports to the state dir",
+    ),
 ):
     """Compass CLI - Personal knowledge management with RAG."""
     if ctx.resilient_parsing:
         return
 
+    if profile:
+        _start_profiler(ctx)
+
+    # `compass <command> --help` only prints help; skip config and setup
+    if "--help" in ctx.args:
+        return
+
+    from compass.config import Config
+
     cfg = Config()
+    if cfg.get("trace.enabled", False):
+        tracing.enable()
     can_prompt = sys.stdin.isatty() and sys.stdout.isatty()
+    if ctx.invoked_subcommand in FIRST_RUN_COMMANDS:
+        _first_run(cfg, can_prompt)
+
+    if ctx.invoked_subcommand is None:
+        name = cfg.get("user.name", "friend")
+        compass_art = r"""
+          /\
+     ____/  \____
+    /    \  /    \
+   /  /\  \/  /\  \
+   \  \/  /\  \/  /
+    \____/  \____/
+          \/
+        """
+        console.print(compass_art, style="cyan")
+        console.print(f"[bold]Welcome back, {name}![/bold]")
+        console.print()
+        console.print(ctx.get_help())
+        if can_prompt:
+            console.print("[dim]Starting chat...[/dim]")
+            chat(vault=None, resume=None, no_cache=False)
+        return
+
+
+def _first_run(cfg: "Config", can_prompt: bool) -> None:
+    """Ask for the LLM mode and user name the first time Compass runs."""
+    from rich.prompt import Prompt
+
     if not cfg.is_set("llm.mode"):
         if can_prompt:
             choice = Prompt.ask(
@@ -75,26 +319,6 @@ def main(
         cfg.set("user.name", name)
         cfg.save()
 
-    if ctx.invoked_subcommand is None:
-        name = cfg.get("user.name", "friend")
-        compass_art = r"""
-          /\
-     ____/  \____
-    /    \  /    \
-   /  /\  \/  /\  \
-   \  \/  /\  \/  /
-    \____/  \____/
-          \/
-        """
-        console.print(compass_art, style="cyan")
-        console.print(f"[bold]Welcome back, {name}![/bold]")
-        console.print()
-        console.print(ctx.get_help())
-        if can_prompt:
-            console.print("[dim]Starting chat...[/dim]")
-            chat()
-        return
-
 
 @app.command()
 def init(
@@ -105,6 +329,8 @@ def init(
     ),
 ):
     """Initialize a new vault."""
+    from compass.vault import Vault
+
     if vault is None:
         vault = Path.cwd()
 
@@ -125,9 +351,13 @@ def init(
 def config(
     action: str = typer.Argument(..., help="Action: show, set, get"),
     key: Optional[str] = typer.Argument(None, help="Config key (dot notation)"),
-    value: Optional[str] = typer.Argument(None, help="Config value"),
+    value: Optional[str] = typer.Argument(
+        None, help="Config value: a TOML literal (true, 0.8, 30, [...]) or a string"
+    ),
 ):
     """Manage configuration."""
+    from compass.config import Config, parse_value
+
     cfg = Config()
 
     if action == "show":
@@ -150,9 +380,10 @@ def config(
         if key is None or value is None:
             console.print("[red]Error:[/red] Key and value required for 'set' action")
             raise typer.Exit(1)
-        cfg.set(key, value)
+        parsed = parse_value(value)
+        cfg.set(key, parsed)
         cfg.save()
-        console.print(f"[green]✓[/green] Set {key} = {value}")
+        console.print(f"[green]✓[/green] Set {key} = {parsed!r}")
 
     else:
         console.print(f"[red]Error:[/red] Unknown action '{action}'")
@@ -170,37 +401,243 @@ def ingest(
         console.print(f"[red]Error:[/red] Path does not exist: {path}")
         raise typer.Exit(1)
 
-    # Count files (placeholder)
-    if path.is_file():
-        file_count = 1
-    else:
-        file_count = sum(1 for _ in path.rglob("*") if _.is_file())
+    from compass.config import Config
+    from compass.logging import get_run_logger
+
+    vault_obj = _require_vault(vault)
+    cfg = Config(profile_path=vault_obj.config_file)
+    pipeline = _build_pipeline(cfg, vault_obj)
+    conn = vault_obj.get_database_connection()
+    try:
+        with tracing.span("ingest") as s:
+            stats = pipeline.ingest(path.resolve(), conn)
+            s.set(count=stats["stored"])
+    finally:
+        pipeline.close()
+    metrics_dir = _metrics_dir(cfg, vault_obj)
+    if metrics_dir.is_dir() and metrics_dir.resolve().is_relative_to(path.resolve()):
+        from compass.metrics import MetricsStore
 
-    console.print(f"[green]✓[/green] Ingested {file_count} file(s) from {path}")
-    console.print("[dim]Note: Full ingestion pipeline not yet implemented[/dim]")
-    logger.log_command("ingest", {"path": str(path), "file_count": file_count})
+        loaded = MetricsStore(conn).sync(metrics_dir)
+        stats["metric_points"] = loaded["points"]
+        if loaded["points"]:
+            console.print(
+                f"[green]✓[/green] Loaded {loaded['points']} metric point(s) "
+                f"from {loaded['files']} file(s); query with `compass metrics query`"
+            )
+
+    console.print(
+        f"[green]✓[/green] Ingested {stats['stored']} file(s) ({stats['chunks']} chunks) "
+        f"from {path}"
+    )
+    if stats["unchanged"] or stats["skipped"]:
+        console.print(
+            f"[dim]{stats['unchanged']} unchanged, {stats['skipped']} without a loader[/dim]"
+        )
+    if stats["failed"]:
+        console.print(
+            f"[yellow]{stats['failed']} file(s) could not be loaded[/yellow] "
+            "[dim](parse error, or over loaders.timeout_seconds / loaders.memory_mb)[/dim]"
+        )
+    if stats["duplicates"] and pipeline.dedupe is not None:
+        action = "skipped" if pipeline.dedupe.action == "skip" else "flagged"
+        console.print(
+            f"[dim]{stats['duplicates']} near-duplicate(s) {action}; "
+            "see `compass dedupe report`[/dim]"
+        )
+    get_run_logger().log_command("ingest", {"path": str(path), **stats})
+
+
+@app.command()
+def watch(
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+    path: Optional[Path] = typer.Option(
+        None, "--path", help="Directory to watch. Defaults to the vault"
+    ),
+    poll: bool = typer.Option(False, "--poll", help="Poll instead of using inotify"),
+):
+    """Re-index files in the background as they change."""
+    from compass.config import Config
+    from compass.ingest.watch import PollingWatcher, create_watcher, watch as watch_loop
+    from compass.logging import get_run_logger
+
+    vault_obj = _require_vault(vault)
+    root = (path or vault_obj.path).resolve()
+    if not root.is_dir():
+        console.print(f"[red]Error:[/red] Not a directory: {root}")
+        raise typer.Exit(1)
+    cfg = Config(profile_path=vault_obj.config_file)
+    pipeline = _build_pipeline(cfg, vault_obj)
+    conn = vault_obj.get_database_connection()
+    metrics_dir = _metrics_dir(cfg, vault_obj).resolve()
+    watcher = create_watcher(root, polling=poll, interval=cfg.get("watch.poll_interval", 1.0))
+    mode = "polling" if isinstance(watcher, PollingWatcher) else "inotify"
+    console.print(f"Watching [bold]{escape(str(root))}[/bold] ({mode}); Ctrl+C to stop")
+
+    def report(batch: list, stats: dict) -> None:
+        console.print(
+            f"[dim]{datetime.now():%H:%M:%S}[/dim] {len(batch)} changed: "
+            f"{stats['stored']} indexed ({stats['chunks']} chunks), "
+            f"{stats['removed']} removed, {stats['unchanged']} unchanged, "
+            f"{stats['failed']} failed, {stats['duplicates']} near-duplicate(s)"
+            + (f", {stats['metric_points']} metric point(s)" if "metric_points" in stats else "")
+        )
+        get_run_logger().log_command("watch", {"path": str(root), **stats})
+
+    def update(batch: list) -> dict:
+        stats = pipeline.update(batch, conn)
+        if any(p == metrics_dir or metrics_dir in p.parents for p in batch):
+            from compass.metrics import MetricsStore
+
+            stats["metric_points"] = MetricsStore(conn).sync(metrics_dir)["points"]
+        return stats
+
+    def failed(batch: list, error: Exception, delay: float) -> None:
+        console.print(
+            f"[yellow]Warning:[/yellow] Could not re-index {len(batch)} path(s): "
+            f"{escape(str(error))}; retrying in {delay:.0f}s"
+        )
+        get_run_logger().log_error(str(error), {"command": "watch", "paths": len(batch)})
+
+    try:
+        watch_loop(
+            watcher,
+            update,
+            debounce=cfg.get("watch.debounce_seconds", 0.5),
+            on_batch=report,
+            on_error=failed,
+        )
+    except KeyboardInterrupt:
+        console.print("Stopped watching")
+    finally:
+        watcher.close()
+        pipeline.close()
+
+
+ChatSession = Tuple[str, bool, Callable[[str], str], Callable[[], None]]
+
+
+def _daemon_failed(error: Exception) -> None:
+    """Warn that the daemon could not answer and the command runs in-process."""
+    console.print(
+        f"[yellow]Warning:[/yellow] daemon request failed ({escape(str(error))}); "
+        "running in-process"
+    )
+
+
+def _daemon_chat(
+    client: "Client", vault_obj: Optional["Vault"], resume: Optional[str], no_cache: bool
+) -> ChatSession:
+    """Open a chat session in the daemon.
+
+    Returns:
+        Session id, whether it was resumed, and respond/finish functions
+    """
+    opened = client.request(
+        "chat_open",
+        vault=str(vault_obj.path) if vault_obj else None,
+        session_id=resume,
+        no_cache=no_cache,
+    )
+    session_id = opened["session_id"]
+
+    def respond(text: str) -> str:
+        response: str = client.request("chat", session_id=session_id, message=text)["response"]
+        return response
+
+    def finish() -> None:
+        from compass.server import ServerError
+
+        try:
+            client.request("chat_close", session_id=session_id)
+        except (OSError, ServerError):
+            pass
+        finally:
+            client.close()
+
+    return session_id, opened["resumed"], respond, finish
+
+
+def _local_chat(vault_obj: Optional["Vault"], resume: Optional[str], no_cache: bool) -> ChatSession:
+    """Open a chat session in this process.
+
+    Returns:
+        Session id, whether it was resumed, and respond/finish functions
+    """
+    from compass.config import Config
+    from compass.llm.factory import create_provider
+    from compass.sessions import (
+        ContextWindow,
+        Session,
+        SessionIndex,
+        SessionManager,
+        llm_summarizer,
+    )
+
+    cfg = Config(profile_path=vault_obj.config_file if vault_obj else None)
+    provider = create_provider(cfg, use_cache=not no_cache)
+    window = ContextWindow(
+        max_turns=cfg.get("session.max_turns", 6),
+        token_budget=cfg.get("session.token_budget", 3000),
+        summary_tokens=cfg.get("session.summary_tokens", 500),
+        summarizer=llm_summarizer(provider),
+    )
+    index = SessionIndex(vault_obj.db_manager) if vault_obj else None
+    session_mgr = SessionManager(index=index)
+    loaded = None
+    if resume:
+        # Older turns are represented by the stored rolling summary
+        loaded = session_mgr.load(resume, tail=2 * window.max_turns + 2)
+    session = loaded or Session()
+
+    def respond(text: str) -> str:
+        session.add_message("user", text)
+        response = _complete(provider, window.build_messages(session))
+        if response is None:
+            response = f"[Placeholder response to: {text[:50]}...]"
+        session.add_message("assistant", response)
+        session_mgr.save(session)
+        return response
+
+    def finish() -> None:
+        session_mgr.close()
+
+    return session.id, loaded is not None, respond, finish
 
 
 @app.command()
 def chat(
     vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
     resume: Optional[str] = typer.Option(None, "--resume", help="Resume session ID"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the LLM response cache"),
 ):
     """Start an interactive chat session."""
+    from rich.prompt import Prompt
+    from compass.logging import get_run_logger
+
+    from compass.server import ServerError
+
+    vault_obj = _existing_vault(vault)
+    chat_session = None
+    client = _connect_daemon()
+    if client is not None:
+        try:
+            chat_session = _daemon_chat(client, vault_obj, resume, no_cache)
+        except (ServerError, OSError) as e:
+            _daemon_failed(e)
+            client.close()
+    if chat_session is None:
+        chat_session = _local_chat(vault_obj, resume, no_cache)
+    session_id, resumed, respond, finish = chat_session
+
     console.print("[bold cyan]Compass Chat[/bold cyan]")
     console.print("Type /help for commands, /exit to quit\n")
-
-    session_mgr = SessionManager()
-    if resume:
-        session = session_mgr.load(resume)
-        if session:
-            console.print(f"[green]Resumed session:[/green] {session.id}")
-        else:
-            console.print(f"[yellow]Session not found, starting new session[/yellow]")
-            session = Session()
+    if resumed:
+        console.print(f"[green]Resumed session:[/green] {session_id}")
+    elif resume:
+        console.print("[yellow]Session not found, starting new session[/yellow]")
     else:
-        session = Session()
-        console.print(f"[dim]Session ID: {session.id}[/dim]")
+        console.print(f"[dim]Session ID: {session_id}[/dim]")
 
     while True:
         try:
@@ -214,7 +651,6 @@ def chat(
                 cmd = user_input[1:].lower()
                 if cmd == "exit" or cmd == "quit":
                     console.print("[dim]Goodbye![/dim]")
-                    session_mgr.save(session)
                     break
                 elif cmd == "help":
                     console.print("\n[bold]Available commands:[/bold]")
@@ -225,11 +661,14 @@ def chat(
                     console.print(f"[yellow]Unknown command:[/yellow] /{cmd}")
                     continue
 
-            # Echo user input (placeholder for actual LLM)
-            session.add_message("user", user_input)
-            response = f"[Placeholder response to: {user_input[:50]}...]"
-            session.add_message("assistant", response)
-
+            try:
+                response = respond(user_input)
+            except (OSError, ServerError) as e:
+                # The daemon went away or failed: carry on with the session in-process
+                _daemon_failed(e)
+                finish()
+                session_id, _, respond, finish = _local_chat(vault_obj, session_id, no_cache)
+                response = respond(user_input)
             console.print(f"\n[bold green]Compass[/bold green]: {response}")
 
         except KeyboardInterrupt:
@@ -237,19 +676,599 @@ def chat(
         except EOFError:
             break
 
-    logger.log_completion("chat", 0)
+    finish()
+    get_run_logger().log_completion("chat", 0)
 
 
 @app.command()
 def exec(
     prompt: str = typer.Argument(..., help="Prompt to execute"),
-    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+    vault: Optional[List[str]] = typer.Option(
+        None, "--vault", help="Vault path or vault group name (repeatable)"
+    ),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the LLM response cache"),
 ):
     """Execute a one-off prompt."""
+    from compass.logging import get_run_logger
+
     console.print(f"[bold]Prompt:[/bold] {prompt}")
-    console.print(f"\n[bold green]Compass:[/bold green] [Placeholder response]")
-    console.print("[dim]LLM integration not yet implemented[/dim]")
-    logger.log_command("exec", {"prompt": prompt})
+    vaults = _existing_vaults(vault)
+    result = None
+    client = _connect_daemon()
+    if client is not None:
+        from compass.server import ServerError
+
+        try:
+            result = client.request(
+                "exec",
+                prompt=prompt,
+                vaults=[str(vault_obj.path) for vault_obj in vaults],
+                no_cache=no_cache,
+            )
+        except (ServerError, OSError) as e:
+            _daemon_failed(e)
+        finally:
+            client.close()
+    if result is not None:
+        response, citations = result["response"], result["citations"]
+    else:
+        from compass.config import Config
+        from compass.llm.base import Message
+        from compass.llm.cache import hash_context
+        from compass.llm.factory import create_provider
+        from compass.rag.cite import format_context, generate_citations
+
+        cfg = Config(profile_path=vaults[0].config_file if vaults else None)
+        provider = create_provider(cfg, use_cache=not no_cache)
+
+        messages = [Message("user", prompt)]
+        chunks = _retrieve_context(vaults, prompt, cfg) if vaults else []
+        if chunks:
+            messages.insert(0, Message("system", format_context(chunks)))
+
+        response = _complete(provider, messages, context_hash=hash_context(chunks))
+        citations = generate_citations(chunks)
+
+    if response is None:
+        console.print("\n[bold green]Compass:[/bold green] [Placeholder response]")
+        console.print("[dim]LLM integration not yet implemented[/dim]")
+    else:
+        console.print(f"\n[bold green]Compass:[/bold green] {response}")
+        console.print(escape(citations))
+    get_run_logger().log_command("exec", {"prompt": prompt})
+
+
+@app.command()
+def serve(
+    socket_path: Optional[Path] = typer.Option(None, "--socket", help="Socket path"),
+):
+    """Run a resident daemon that keeps vaults and providers warm.
+
+    exec and chat use the daemon automatically while it is running.
+    """
+    from compass.server import CompassServer, ServerError
+
+    try:
+        server = CompassServer(socket_path)
+    except ServerError as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(1)
+    console.print(f"[green]✓[/green] Listening on {server.socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    console.print("[dim]Daemon stopped[/dim]")
+
+
+@app.command()
+def stats(
+    since: str = typer.Option("24h", "--since", help="Time window (30m, 24h, 7d or ISO date)"),
+    stage: Optional[str] = typer.Option(None, "--stage", help="Only stages with this prefix"),
+):
+    """Show per-stage latency percentiles from traced runs."""
+    from rich.table import Table
+    from compass.logging import get_run_logger
+
+    window_start = _parse_since(since)
+    summary = tracing.summarize_spans(get_run_logger().read(since=window_start))
+    if stage:
+        summary = {name: row for name, row in summary.items() if name.startswith(stage)}
+    if not summary:
+        console.print("[dim]No spans recorded. Enable tracing with:[/dim]")
+        console.print("  compass config set trace.enabled true")
+        return
+
+    window_s = max((datetime.now() - window_start).total_seconds(), 1.0)
+    table = Table(title=f"Stage latency since {window_start:%Y-%m-%d %H:%M}")
+    table.add_column("stage", no_wrap=True)
+    for column in ("count", "p50 ms", "p95 ms", "p99 ms", "max ms", "calls/min", "items/s"):
+        table.add_column(column, justify="right")
+    for name, row in summary.items():
+        items_per_s = 0.0
+        if row["items"] and row["total_ms"]:
+            items_per_s = row["items"] / (row["total_ms"] / 1000)
+        table.add_row(
+            name,
+            str(row["count"]),
+            f"{row['p50']:.1f}",
+            f"{row['p95']:.1f}",
+            f"{row['p99']:.1f}",
+            f"{row['max']:.1f}",
+            f"{row['count'] / window_s * 60:.2f}",
+            f"{items_per_s:.0f}" if items_per_s else "-",
+        )
+    console.print(table)
+
+
+sessions_app = typer.Typer(help="Browse and search chat sessions.")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("list")
+def sessions_list(
+    since: Optional[str] = typer.Option(
+        None, "--since", help="Only sessions updated since (7d, 24h, 2026-01-01)"
+    ),
+    limit: int = typer.Option(20, "--limit", help="Maximum number of sessions"),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """List recent sessions."""
+    from compass.sessions import SessionIndex
+
+    index = SessionIndex(_require_vault(vault).db_manager)
+    rows = index.list(since=_parse_since(since) if since else None, limit=limit)
+    index.close()
+    if not rows:
+        console.print("[dim]No sessions found[/dim]")
+        return
+    for row in rows:
+        console.print(
+            f"[bold]{row['id']}[/bold]  {row['updated_at'][:16]}  "
+            f"{row['message_count']:>4} msgs  [dim]{escape(row['title'])}[/dim]"
+        )
+
+
+@sessions_app.command("search")
+def sessions_search(
+    text: str = typer.Argument(..., help="Text to search for"),
+    limit: int = typer.Option(20, "--limit", help="Maximum number of matches"),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """Full-text search over session messages."""
+    from compass.sessions import SessionIndex
+
+    index = SessionIndex(_require_vault(vault).db_manager)
+    rows = index.search(text, limit=limit)
+    index.close()
+    if not rows:
+        console.print("[dim]No matches[/dim]")
+        return
+    for row in rows:
+        console.print(
+            f"[bold]{row['session_id']}[/bold] #{row['seq']} {row['role']}: "
+            f"{escape(row['snippet'])}"
+        )
+
+
+@sessions_app.command("reindex")
+def sessions_reindex(
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """Index this vault's session logs into the vault database."""
+    from compass.sessions import SessionIndex, SessionManager
+
+    index = SessionIndex(_require_vault(vault).db_manager)
+    session_mgr = SessionManager()
+    # Rebuilt from scratch, which also drops sessions of other vaults indexed before
+    index.clear()
+    indexed = sum(
+        bool(index.index_file(path)) for path in sorted(session_mgr.sessions_dir.glob("*.jsonl"))
+    )
+    session_mgr.close()
+    index.close()
+    console.print(f"[green]✓[/green] Indexed {indexed} session(s) of this vault")
+
+
+db_app = typer.Typer(help="Maintain the vault database.")
+app.add_typer(db_app, name="db")
+
+
+@db_app.command("optimize")
+def db_optimize(
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only report sizes, plans and steps"),
+    idle: bool = typer.Option(
+        False, "--idle", help="Run only if due and the vault is quiet (for cron or timers)"
+    ),
+    compress: bool = typer.Option(
+        False, "--compress", help="Convert inline documents to compressed storage first"
+    ),
+):
+    """Analyze, compact and tune the vault database."""
+    from datetime import timedelta
+    from rich.table import Table
+    from compass.config import Config
+    from compass.db import maintenance
+    from compass.db.storage import compress_documents
+
+    vault_obj = _require_vault(vault)
+    last_write = maintenance.last_write_time(vault_obj.get_database_path())
+    conn = vault_obj.get_database_connection()
+    cfg = Config(profile_path=vault_obj.config_file)
+
+    if idle:
+        reason = maintenance.idle_reason(
+            conn,
+            last_write,
+            interval=timedelta(hours=cfg.get("db.optimize_interval_hours", 24)),
+            idle_for=timedelta(minutes=cfg.get("db.idle_minutes", 5)),
+        )
+        if reason:
+            console.print(f"[dim]Skipping optimize: {reason}[/dim]")
+            return
+
+    report = maintenance.storage_report(conn)
+    console.print(
+        f"[bold]{vault_obj.get_database_path()}[/bold]: {report['bytes'] / 1024:.0f} KiB, "
+        f"{report['free_pages']} free pages ({report['free_pct']:.1f}%), "
+        f"auto_vacuum={report['auto_vacuum']}"
+    )
+    sizes = Table(title="Tables and indexes")
+    sizes.add_column("name", no_wrap=True)
+    sizes.add_column("type")
+    for column in ("KiB", "pages", "unused %"):
+        sizes.add_column(column, justify="right")
+    for obj in report["objects"]:
+        sizes.add_row(
+            obj["name"],
+            obj["type"],
+            f"{obj['bytes'] / 1024:.0f}",
+            str(obj["pages"]),
+            f"{obj['unused_pct']:.1f}",
+        )
+    console.print(sizes)
+
+    plans = Table(title="Query plans")
+    plans.add_column("query", no_wrap=True)
+    plans.add_column("plan")
+    for name, lines in maintenance.query_plans(conn).items():
+        plans.add_row(name, escape("\n".join(lines)))
+    console.print(plans)
+
+    if dry_run:
+        if compress:
+            console.print("Would compress inline documents")
+        for step in maintenance.plan_steps(conn):
+            console.print(f"Would run: {step}")
+        return
+
+    if compress:
+        codec = cfg.get("storage.codec", "zlib")
+        console.print(f"[dim]compressing documents ({codec})...[/dim]")
+        converted = compress_documents(conn, codec)
+        console.print(
+            f"  {converted['documents']} documents, {converted['chunks']} chunks as offsets"
+        )
+    result = maintenance.optimize(
+        conn, progress=lambda step: console.print(f"[dim]{step}...[/dim]")
+    )
+    for step in result["steps"]:
+        console.print(f"  {step['name']}: {step['ms']:.0f} ms")
+    console.print(
+        f"[green]✓[/green] {result['before'] / 1024:.0f} KiB -> {result['after'] / 1024:.0f} KiB"
+    )
+
+
+index_app = typer.Typer(help="Export and import portable index snapshots.")
+app.add_typer(index_app, name="index")
+
+
+@index_app.command("export")
+def index_export(
+    path: Path = typer.Argument(..., help="Snapshot file to write"),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+    precision: str = typer.Option(
+        "int8", "--precision", help="Embedding precision: int8 (smaller) or float32 (exact)"
+    ),
+):
+    """Write the vault's documents, chunks and embeddings to one snapshot file."""
+    from compass.config import Config
+    from compass.db.snapshot import QUANTIZATIONS, SnapshotError, export_snapshot
+
+    if precision not in QUANTIZATIONS:
+        console.print(f"[red]Error:[/red] --precision must be one of {', '.join(QUANTIZATIONS)}")
+        raise typer.Exit(1)
+    vault_obj = _require_vault(vault)
+    cfg = Config(profile_path=vault_obj.config_file)
+    try:
+        header = export_snapshot(
+            vault_obj.db_manager.get_reader(),
+            path,
+            quantization=precision,
+            embedder=cfg.get("rag.embedder", "dummy"),
+        )
+    except SnapshotError as e:
+        console.print(f"[red]Error:[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    counts = header["counts"]
+    console.print(
+        f"[green]✓[/green] Exported {counts['documents']} documents, {counts['chunks']} chunks "
+        f"and {counts['embeddings']} {precision} embeddings to {path} "
+        f"({path.stat().st_size / 1024:.0f} KiB)"
+    )
+
+
+@index_app.command("import")
+def index_import(
+    path: Path = typer.Argument(..., help="Snapshot file to load"),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+    replace: bool = typer.Option(
+        False, "--replace", help="Delete the vault's existing documents first"
+    ),
+):
+    """Load a snapshot into the vault instead of re-ingesting."""
+    from compass.config import Config
+    from compass.db.snapshot import SnapshotError, import_snapshot
+
+    if not path.exists():
+        console.print(f"[red]Error:[/red] Snapshot does not exist: {path}")
+        raise typer.Exit(1)
+    vault_obj = _require_vault(vault)
+    try:
+        header = import_snapshot(vault_obj.get_database_connection(), path, replace=replace)
+    except SnapshotError as e:
+        console.print(f"[red]Error:[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    counts = header["counts"]
+    console.print(
+        f"[green]✓[/green] Imported {counts['documents']} documents and {counts['chunks']} chunks "
+        f"into {vault_obj.path}"
+    )
+    embedder = Config(profile_path=vault_obj.config_file).get("rag.embedder", "dummy")
+    if header["embedder"] and header["embedder"] != embedder:
+        console.print(
+            f"[yellow]Warning:[/yellow] snapshot embeddings come from '{header['embedder']}' "
+            f"but this vault uses '{embedder}'; set rag.embedder to match or re-ingest"
+        )
+
+
+dedupe_app = typer.Typer(help="Find near-duplicate documents.")
+app.add_typer(dedupe_app, name="dedupe")
+
+
+@dedupe_app.command("report")
+def dedupe_report(
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+    threshold: Optional[float] = typer.Option(
+        None, "--threshold", help="Minimum Jaccard similarity (default: dedupe.threshold)"
+    ),
+):
+    """List clusters of near-duplicate documents and the chunks they cost."""
+    from rich.table import Table
+    from compass.config import Config
+    from compass.ingest import dedupe
+
+    vault_obj = _require_vault(vault)
+    conn = vault_obj.get_database_connection()
+    cfg = Config(profile_path=vault_obj.config_file)
+    threshold = threshold if threshold is not None else cfg.get("dedupe.threshold", 0.9)
+
+    signed = dedupe.sign_missing(conn)
+    if signed:
+        console.print(f"[dim]Computed signatures for {signed} document(s)[/dim]")
+    clusters = dedupe.report(conn, threshold)
+    if not clusters:
+        console.print(f"No near-duplicates at similarity >= {threshold:.2f}")
+        return
+
+    table = Table(title=f"Near-duplicates (similarity >= {threshold:.2f})")
+    table.add_column("#", justify="right")
+    table.add_column("document")
+    table.add_column("similarity", justify="right")
+    table.add_column("chunks", justify="right")
+    for number, cluster in enumerate(clusters, 1):
+        table.add_row(str(number), f"[bold]{escape(cluster['original']['path'])}[/bold]", "", "")
+        for duplicate in cluster["duplicates"]:
+            table.add_row(
+                "",
+                f"  {escape(duplicate['path'])}",
+                f"{duplicate['similarity']:.2f}",
+                str(duplicate["chunks"]),
+            )
+    console.print(table)
+    duplicates = sum(len(c["duplicates"]) for c in clusters)
+    chunks = sum(d["chunks"] for c in clusters for d in c["duplicates"])
+    console.print(
+        f"{duplicates} near-duplicate document(s) in {len(clusters)} cluster(s); "
+        f"removing them would save {chunks} chunk(s)"
+    )
+
+
+metrics_app = typer.Typer(help="Query time series from the vault's metrics/*.csv files.")
+app.add_typer(metrics_app, name="metrics")
+
+
+def _metrics_store(vault: Optional[Path]) -> "MetricsStore":
+    """Open a vault's metrics store, loading rows added since the last sync."""
+    from compass.config import Config
+    from compass.metrics import MetricsStore
+
+    vault_obj = _require_vault(vault)
+    cfg = Config(profile_path=vault_obj.config_file)
+    store = MetricsStore(vault_obj.get_database_connection())
+    store.sync(_metrics_dir(cfg, vault_obj))
+    return store
+
+
+@metrics_app.command("list")
+def metrics_list(vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path")):
+    """List metric series and their time ranges."""
+    from rich.table import Table
+
+    series = _metrics_store(vault).series()
+    if not series:
+        console.print("[dim]No metrics. Add CSV files with a date column to metrics/[/dim]")
+        return
+    table = Table(title="Metrics")
+    table.add_column("series")
+    table.add_column("points", justify="right")
+    table.add_column("first")
+    table.add_column("last")
+    for row in series:
+        table.add_row(
+            escape(row["name"]), str(row["points"]), row["first"] or "", row["last"] or ""
+        )
+    console.print(table)
+
+
+@metrics_app.command("query")
+def metrics_query(
+    question: str = typer.Argument(..., help='e.g. "average weight last 30 days"'),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+    as_json: bool = typer.Option(False, "--json", help="Print the full result as JSON"),
+):
+    """Answer an aggregate question from precomputed metrics."""
+    import json
+    import time
+
+    from compass.metrics import MetricsError
+    from compass.tools.metrics import MetricsTool
+
+    store = _metrics_store(vault)
+    start = time.perf_counter()
+    try:
+        result = MetricsTool(store).ask(question)
+    except (MetricsError, ValueError) as e:
+        console.print(f"[red]Error:[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    elapsed = (time.perf_counter() - start) * 1000
+    if as_json:
+        console.print_json(json.dumps(result))
+        return
+    console.print(escape(result["answer"]))
+    console.print(f"[dim]{elapsed:.1f} ms[/dim]")
+
+
+journal_app = typer.Typer(help="Record decisions and review how they turned out.")
+app.add_typer(journal_app, name="journal")
+
+
+def _journal(vault: Optional[Path]) -> "DecisionJournal":
+    """Open a vault's decision journal."""
+    from compass.config import Config
+    from compass.tools.decision_journal import DecisionJournal
+
+    vault_obj = _require_vault(vault)
+    cfg = Config(profile_path=vault_obj.config_file)
+    return DecisionJournal(
+        vault_obj.get_database_connection(), review_days=cfg.get("journal.review_days", 90)
+    )
+
+
+def _print_decisions(rows: List[dict], limit: int, field: str = "timestamp") -> None:
+    """Print one line per decision, then the cursor for the next page if there may be one."""
+    if not rows:
+        console.print("[dim]No decisions found[/dim]")
+        return
+    for row in rows:
+        console.print(
+            f"[bold]#{row['id']}[/bold]  {(row[field] or '')[:10]}  {row['status']:<9} "
+            f"{escape(row.get('snippet') or row['decision'])}"
+        )
+    if len(rows) == limit and "snippet" not in rows[0]:
+        console.print(f"[dim]More: --cursor {rows[-1]['cursor']}[/dim]")
+
+
+@journal_app.command("add")
+def journal_add(
+    decision: str = typer.Argument(..., help="What you decided"),
+    context: str = typer.Option("", "--context", help="Why, and what you knew at the time"),
+    expect: str = typer.Option("", "--expect", help="The outcome you expect"),
+    review_in: Optional[int] = typer.Option(
+        None, "--review-in", help="Days until review (default journal.review_days)"
+    ),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """Record a decision."""
+    journal = _journal(vault)
+    review_at = datetime.now() + timedelta(days=review_in) if review_in is not None else None
+    row = journal.record_decision(decision, context, expect, review_at=review_at)
+    console.print(
+        f"[green]✓[/green] Recorded decision #{row['id']}; review on {row['review_at'][:10]}"
+    )
+
+
+@journal_app.command("list")
+def journal_list(
+    status: Optional[str] = typer.Option(None, "--status", help="open, reviewed or abandoned"),
+    since: Optional[str] = typer.Option(
+        None, "--since", help="Only decisions made since (30d, 2026-01-01)"
+    ),
+    limit: int = typer.Option(20, "--limit", help="Decisions per page"),
+    cursor: Optional[str] = typer.Option(None, "--cursor", help="Continue from a previous page"),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """List decisions, newest first."""
+    journal = _journal(vault)
+    try:
+        rows = journal.list_decisions(
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            since=_parse_since(since) if since else None,
+        )
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    _print_decisions(rows, limit)
+
+
+@journal_app.command("due")
+def journal_due(
+    limit: int = typer.Option(20, "--limit", help="Decisions per page"),
+    cursor: Optional[str] = typer.Option(None, "--cursor", help="Continue from a previous page"),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """List open decisions due for review, most overdue first."""
+    journal = _journal(vault)
+    try:
+        rows = journal.due_for_review(limit=limit, cursor=cursor)
+    except ValueError as e:
+        console.print(f"[red]Error:[/red] {escape(str(e))}")
+        raise typer.Exit(1)
+    _print_decisions(rows, limit, field="review_at")
+
+
+@journal_app.command("review")
+def journal_review(
+    decision_id: int = typer.Argument(..., help="Decision number"),
+    outcome: str = typer.Argument(..., help="What actually happened"),
+    status: str = typer.Option(
+        "reviewed", "--status", help="reviewed, abandoned, or open to review again later"
+    ),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """Record the outcome of a decision."""
+    journal = _journal(vault)
+    try:
+        row = journal.review(decision_id, outcome, status=status)
+    except (KeyError, ValueError) as e:
+        console.print(f"[red]Error:[/red] {escape(str(e.args[0]))}")
+        raise typer.Exit(1)
+    console.print(f"[green]✓[/green] Decision #{row['id']} is {row['status']}")
+
+
+@journal_app.command("search")
+def journal_search(
+    text: str = typer.Argument(..., help="Text to search for"),
+    limit: int = typer.Option(20, "--limit", help="Maximum number of matches"),
+    vault: Optional[Path] = typer.Option(None, "--vault", help="Vault path"),
+):
+    """Full-text search over decisions, their context and outcomes."""
+    _print_decisions(_journal(vault).search(text, limit=limit), limit)
 
 
 if __name__ == "__main__":
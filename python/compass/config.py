@@ -5,10 +5,74 @@ is sent to external services. API keys and sensitive settings remain
 on the user's local filesystem only.
 """
 
+import hashlib
+import marshal
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional
-import toml
-from compass.paths import get_config_dir, ensure_dir
+from typing import Any, Dict, Optional, Tuple
+from compass.paths import get_cache_dir, get_config_dir, ensure_dir
+
+SNAPSHOT_VERSION = 1
+
+# Stat signature of a file: (mtime_ns, size), or None if it does not exist
+Stamp = Optional[Tuple[int, int]]
+
+# Process-wide caches: parsed files by path, and merged layers by source paths and stamps
+_parsed: Dict[str, Tuple[Stamp, dict]] = {}
+_merged: Dict[Tuple[Any, ...], Tuple[dict, dict, dict]] = {}
+
+_MISSING = object()
+
+
+def parse_value(text: str) -> Any:
+    """Parse a value given on the command line.
+
+    TOML literals (`false`, `0.8`, `30`, `["a", "b"]`, `"quoted"`) keep
+    their type, so `config set trace.enabled false` is really off;
+    anything else is taken as a plain string.
+    """
+    import toml
+
+    try:
+        return toml.loads(f"value = {text}")["value"]
+    except (toml.TomlDecodeError, IndexError, KeyError):
+        return text
+
+
+@lru_cache(maxsize=1024)
+def _split_key(key: str) -> Tuple[str, ...]:
+    """Split a dotted key once; lookups reuse the compiled parts."""
+    return tuple(key.split("."))
+
+
+def _stamp(path: Optional[Path]) -> Stamp:
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _copy_tree(data: dict) -> dict:
+    """Copy nested dicts so instances never share mutable sections."""
+    return {k: _copy_tree(v) if isinstance(v, dict) else v for k, v in data.items()}
+
+
+def _merge_dict(target: dict, source: dict) -> None:
+    for key, value in source.items():
+        if key in target and isinstance(target[key], dict) and isinstance(value, dict):
+            _merge_dict(target[key], value)
+        else:
+            target[key] = _copy_tree(value) if isinstance(value, dict) else value
+
+
+def clear_cache() -> None:
+    """Forget all cached configuration (the on-disk snapshot is kept)."""
+    _parsed.clear()
+    _merged.clear()
 
 
 class Config:
@@ -16,82 +80,189 @@ class Config:
     
     Stores all configuration locally in TOML format. Configuration files
     are stored in the XDG config directory (~/.config/compass/) by default.
+
+    Settings are layered: built-in defaults, then the user config file,
+    then an optional vault `profile.toml`. The merged result is cached
+    for the process and invalidated when a file's mtime or size changes.
+    For the default config, the merge is also saved as a marshal snapshot
+    in the cache directory so a cold start does not need to parse TOML.
     """
 
-    def __init__(self, config_path: Optional[Path] = None):
-        """Initialize config manager."""
+    def __init__(
+        self,
+        config_path: Optional[Path] = None,
+        profile_path: Optional[Path] = None,
+        snapshot_path: Optional[Path] = None,
+    ):
+        """Initialize config manager.
+
+        Args:
+            config_path: User config file. Defaults to get_config_dir()/config.toml
+            profile_path: Vault profile.toml layered over the user config
+            snapshot_path: Binary snapshot of the merged config. Defaults to a
+                           file in get_cache_dir() when config_path is not given;
+                           no snapshot is used for an explicit config_path
+                           unless one is passed.
+        """
         if config_path is None:
             config_path = get_config_dir() / "config.toml"
+            if snapshot_path is None:
+                sources = f"{config_path}|{profile_path}".encode("utf-8")
+                digest = hashlib.sha1(sources).hexdigest()[:12]
+                snapshot_path = get_cache_dir() / "config" / f"{digest}.snapshot"
         self.config_path = config_path
+        self.profile_path = profile_path
+        self.snapshot_path = snapshot_path
         self._data: Dict[str, Any] = {}
+        self._base: Dict[str, Any] = {}
         self._file_data: Dict[str, Any] = {}
+        self._profile_data: Dict[str, Any] = {}
+        self._values: Dict[str, Any] = {}
         self.load()
 
     def load(self) -> None:
         """Load configuration from file."""
-        # Start with defaults
-        self._data = self._get_defaults()
+        sources = (
+            str(self.config_path),
+            _stamp(self.config_path),
+            str(self.profile_path),
+            _stamp(self.profile_path),
+        )
+        layers = _merged.get(sources)
+        if layers is None:
+            layers = self._read_snapshot(sources)
+            if layers is None:
+                layers = self._build_layers()
+                self._write_snapshot(sources, layers)
+            _merged[sources] = layers
 
-        # Merge with file contents if exists
-        if self.config_path.exists():
-            self._file_data = toml.load(self.config_path)
-            self._merge_config(self._file_data)
-        else:
-            self._file_data = {}
+        file_data, profile_data, base = layers
+        self._file_data = file_data
+        self._profile_data = profile_data
+        self._base = _copy_tree(base)
+        self._data = _copy_tree(base)
+        _merge_dict(self._data, profile_data)
+        self._values = {}
 
     def save(self) -> None:
-        """Save configuration to file."""
+        """Save configuration to file.
+
+        Values from the vault profile are not written to the user config.
+        """
+        import toml
+
         ensure_dir(self.config_path.parent)
         with open(self.config_path, "w") as f:
-            toml.dump(self._data, f)
+            toml.dump(self._base, f)
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get config value using dot notation (e.g., 'llm.provider')."""
-        parts = key.split(".")
-        value = self._data
-        for part in parts:
-            if isinstance(value, dict):
-                value = value.get(part)
-            else:
-                return default
-            if value is None:
-                return default
-        return value
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._data
+            for part in _split_key(key):
+                if isinstance(value, dict):
+                    value = value.get(part)
+                else:
+                    value = None
+                if value is None:
+                    break
+            self._values[key] = value
+        return default if value is None else value
 
     def set(self, key: str, value: Any) -> None:
         """Set config value using dot notation."""
-        parts = key.split(".")
-        target = self._data
-        for part in parts[:-1]:
-            if part not in target:
-                target[part] = {}
-            target = target[part]
-        target[parts[-1]] = value
+        parts = _split_key(key)
+        for root in (self._data, self._base):
+            target = root
+            for part in parts[:-1]:
+                if part not in target:
+                    target[part] = {}
+                target = target[part]
+            target[parts[-1]] = value
+        self._values = {}
 
     def get_all(self) -> Dict[str, Any]:
         """Get all configuration as a dict."""
         return self._data.copy()
 
     def is_set(self, key: str) -> bool:
-        """Check if a config key is explicitly set in the file."""
-        parts = key.split(".")
-        value: Any = self._file_data
-        for part in parts:
-            if isinstance(value, dict) and part in value:
-                value = value[part]
+        """Check if a config key is explicitly set in the config or profile file."""
+        for layer in (self._profile_data, self._file_data):
+            value: Any = layer
+            for part in _split_key(key):
+                if isinstance(value, dict) and part in value:
+                    value = value[part]
+                else:
+                    break
             else:
-                return False
-        return True
+                return True
+        return False
 
     def _merge_config(self, source: Dict[str, Any]) -> None:
         """Merge source config into current config."""
-        def merge_dict(target: dict, source: dict) -> None:
-            for key, value in source.items():
-                if key in target and isinstance(target[key], dict) and isinstance(value, dict):
-                    merge_dict(target[key], value)
-                else:
-                    target[key] = value
-        merge_dict(self._data, source)
+        _merge_dict(self._data, source)
+        self._values = {}
+
+    def _build_layers(self) -> Tuple[dict, dict, dict]:
+        """Parse the config files and merge them over the defaults."""
+        file_data = self._parse(self.config_path)
+        profile_data = self._parse(self.profile_path)
+        base = self._get_defaults()
+        _merge_dict(base, file_data)
+        return file_data, profile_data, base
+
+    def _parse(self, path: Optional[Path]) -> Dict[str, Any]:
+        stamp = _stamp(path)
+        if path is None or stamp is None:
+            return {}
+        cached = _parsed.get(str(path))
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        import toml
+
+        data: Dict[str, Any] = toml.load(path)
+        _parsed[str(path)] = (stamp, data)
+        return data
+
+    def _read_snapshot(self, sources: Tuple[Any, ...]) -> Optional[Tuple[dict, dict, dict]]:
+        if self.snapshot_path is None:
+            return None
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if (
+            not isinstance(snapshot, dict)
+            or snapshot.get("version") != SNAPSHOT_VERSION
+            or snapshot.get("sources") != sources
+        ):
+            return None
+        return snapshot["file"], snapshot["profile"], snapshot["base"]
+
+    def _write_snapshot(self, sources: Tuple[Any, ...], layers: Tuple[dict, dict, dict]) -> None:
+        if self.snapshot_path is None:
+            return
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "sources": sources,
+            "file": layers[0],
+            "profile": layers[1],
+            "base": layers[2],
+        }
+        try:
+            # marshal rejects TOML dates and times; such configs are simply not snapshotted
+            payload = marshal.dumps(snapshot)
+            ensure_dir(self.snapshot_path.parent)
+            tmp = self.snapshot_path.with_suffix(f".tmp{os.getpid()}")
+            # The snapshot can contain API keys, so keep it private to the user
+            fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, self.snapshot_path)
+        except (OSError, ValueError):
+            return
 
     def _get_defaults(self) -> Dict[str, Any]:
         """Get default configuration."""
@@ -107,11 +278,61 @@ class Config:
                 "chunk_size": 512,
                 "chunk_overlap": 50,
                 "top_k": 5,
+                "embedder": "dummy",
+                "coarse_docs": 50,
+                "federated_normalize": "cosine",
+            },
+            "db": {
+                "optimize_interval_hours": 24,
+                "idle_minutes": 5,
+            },
+            "storage": {
+                "mode": "inline",
+                "codec": "zlib",
+            },
+            "dedupe": {
+                "action": "flag",
+                "threshold": 0.9,
+            },
+            "loaders": {
+                "isolate": True,
+                "timeout_seconds": 30,
+                "memory_mb": 1024,
+            },
+            "journal": {
+                "review_days": 90,
+            },
+            "metrics": {
+                "dir": "metrics",
+            },
+            "serve": {
+                "memory_budget_mb": 256,
+            },
+            "watch": {
+                "debounce_seconds": 0.5,
+                "poll_interval": 1.0,
+            },
+            "cache": {
+                "enabled": True,
+                "ttl_seconds": 7 * 24 * 3600,
+                "max_entries": 1000,
+                "max_bytes": 50 * 1024 * 1024,
+                "semantic": False,
+                "similarity_threshold": 0.95,
+            },
+            "session": {
+                "max_turns": 6,
+                "token_budget": 3000,
+                "summary_tokens": 500,
+            },
+            "trace": {
+                "enabled": False,
             },
             "user": {
                 "name": None,
             },
             "vault": {
                 "default_path": None,
+                "groups": {},
             },
         }
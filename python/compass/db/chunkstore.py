@@ -0,0 +1,250 @@
+"""Tiered, memory-budgeted store of chunk and document vectors.
+
+Vectors are held in compact array-backed blocks, one per document. A hot
+tier keeps recently used blocks in memory under a byte budget, evicting
+the least recently used; everything else is read from the vault database
+(the cold tier) on demand. One hot tier can be shared by several vaults,
+so a resident process stays within a fixed memory limit however large
+its vaults grow. All data stays in the local vault databases.
+"""
+
+import math
+import sqlite3
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from itertools import count
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+# Hot tier budget when none is configured
+DEFAULT_BUDGET = 256 * 1024 * 1024
+# Documents read from the cold tier per query
+COLD_BATCH = 512
+# Dictionary entry and key overhead per cached block, on top of the block itself
+_ENTRY_OVERHEAD = 200
+
+_owners = count()
+
+
+class VectorBlock:
+    """The vectors of one document's chunks, or of all document centroids.
+
+    Vectors are stored back to back in a single float32 array, which costs
+    a few bytes per dimension instead of a Python object per chunk.
+    """
+
+    __slots__ = ("dim", "ids", "norms", "vectors")
+
+    def __init__(self, ids: array, vectors: array, norms: array, dim: int):
+        """Initialize a block.
+
+        Args:
+            ids: Chunk (or document) ids, typecode "q"
+            vectors: Concatenated vectors, typecode "f"
+            norms: Euclidean norm of each vector, typecode "d"
+            dim: Vector dimension
+        """
+        self.ids = ids
+        self.vectors = vectors
+        self.norms = norms
+        self.dim = dim
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[int, bytes]]) -> "VectorBlock":
+        """Build a block from (id, float32 blob) rows."""
+        ids, vectors, norms = array("q"), array("f"), array("d")
+        dim = 0
+        for row_id, blob in rows:
+            vector = array("f", blob)
+            dim = len(vector)
+            ids.append(row_id)
+            vectors.extend(vector)
+            norms.append(math.sqrt(sum(x * x for x in vector)) or 1.0)
+        return cls(ids, vectors, norms, dim)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Tuple[int, memoryview, float]]:
+        """Yield (id, vector, norm); vectors are views into the block, not copies."""
+        view = memoryview(self.vectors)
+        dim = self.dim
+        for i, (row_id, norm) in enumerate(zip(self.ids, self.norms)):
+            yield row_id, view[i * dim : (i + 1) * dim], norm
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the block."""
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(self.ids)
+            + sys.getsizeof(self.vectors)
+            + sys.getsizeof(self.norms)
+        )
+
+
+class HotTier:
+    """Thread-safe LRU cache bounded by total bytes rather than entries."""
+
+    def __init__(self, budget_bytes: int):
+        """Initialize hot tier.
+
+        Args:
+            budget_bytes: Upper bound on the memory held by cached entries.
+                          0 disables caching
+        """
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached value and mark it recently used, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int, evict: bool = True) -> bool:
+        """Cache a value of `size` bytes.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            size: Approximate bytes held by the value
+            evict: Evict least recently used entries to make room. Full scans
+                   pass False, so one pass over a large vault does not flush
+                   the working set
+
+        Returns:
+            Whether the value was cached
+        """
+        size += _ENTRY_OVERHEAD
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.used_bytes -= previous[1]
+            if size > self.budget_bytes:
+                return False
+            if not evict and self.used_bytes + size > self.budget_bytes:
+                return False
+            while self.used_bytes + size > self.budget_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.used_bytes -= evicted
+                self.evictions += 1
+            self._entries[key] = (value, size)
+            self.used_bytes += size
+            return True
+
+    def discard(self, owner: Hashable) -> None:
+        """Drop every entry whose key is a tuple starting with `owner`."""
+        with self._lock:
+            for key in [k for k in self._entries if isinstance(k, tuple) and k[0] == owner]:
+                self.used_bytes -= self._entries.pop(key)[1]
+
+    def stats(self) -> Dict[str, Any]:
+        """Report hits, misses, hit rate, evictions and memory use."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "used_bytes": self.used_bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+
+class ChunkStore:
+    """Chunk and centroid vectors of one vault, from the hot tier or the database."""
+
+    def __init__(self, conn: sqlite3.Connection, hot: Optional[HotTier] = None):
+        """Initialize chunk store.
+
+        Args:
+            conn: Vault database connection
+            hot: Hot tier, possibly shared with other vaults. Without one,
+                 every read goes to the database
+        """
+        self.conn = conn
+        self.hot = hot if hot is not None else HotTier(0)
+        self.cold_reads = 0
+        self._owner = next(_owners)
+        self._data_version: Optional[int] = None
+
+    def centroids(self) -> VectorBlock:
+        """Get the document vectors of all searchable documents."""
+        self._check()
+        key = (self._owner, "centroids")
+        block = self.hot.get(key)
+        if block is None:
+            block = VectorBlock.from_rows(
+                self.conn.execute(
+                    "SELECT id, centroid FROM documents "
+                    "WHERE length(centroid) > 0 AND duplicate_of IS NULL"
+                ).fetchall()
+            )
+            self.cold_reads += 1
+            self.hot.put(key, block, block.nbytes)
+        return block
+
+    def documents(self, documents: Optional[List[int]] = None) -> Iterator[Tuple[int, VectorBlock]]:
+        """Yield (document_id, block) for `documents`, or for every searchable
+        document. Documents without embedded chunks are skipped."""
+        self._check()
+        scan = documents is None
+        if documents is None:
+            # Documents flagged as near-duplicates would only crowd the top_k
+            documents = [
+                row[0]
+                for row in self.conn.execute("SELECT id FROM documents WHERE duplicate_of IS NULL")
+            ]
+        misses = []
+        for doc_id in documents:
+            block = self.hot.get((self._owner, doc_id))
+            if block is None:
+                misses.append(doc_id)
+            elif len(block):
+                yield doc_id, block
+        for start in range(0, len(misses), COLD_BATCH):
+            batch = misses[start : start + COLD_BATCH]
+            rows: Dict[int, List[Tuple[int, bytes]]] = {doc_id: [] for doc_id in batch}
+            for doc_id, chunk_id, blob in self.conn.execute(
+                "SELECT c.document_id, c.id, c.embedding FROM chunks c "
+                f"WHERE c.document_id IN ({', '.join('?' * len(batch))}) "
+                "AND c.embedding IS NOT NULL",
+                batch,
+            ):
+                rows[doc_id].append((chunk_id, blob))
+            self.cold_reads += 1
+            for doc_id in batch:
+                block = VectorBlock.from_rows(rows[doc_id])
+                self.hot.put((self._owner, doc_id), block, block.nbytes, evict=not scan)
+                if len(block):
+                    yield doc_id, block
+
+    def stats(self) -> Dict[str, Any]:
+        """Report hot tier statistics and the number of cold reads by this store."""
+        return {**self.hot.stats(), "cold_reads": self.cold_reads}
+
+    def close(self) -> None:
+        """Release this store's share of the hot tier."""
+        self.hot.discard(self._owner)
+
+    def _check(self) -> None:
+        # data_version changes whenever another connection commits to the database
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            if self._data_version is not None:
+                self.hot.discard(self._owner)
+            self._data_version = version
@@ -0,0 +1,233 @@
+"""Vault database maintenance: statistics, compaction and query plans.
+
+All maintenance runs locally against the vault database. Nothing is sent
+anywhere; the report only describes the local file.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# The queries on retrieval, ingest and session hot paths, checked with
+# EXPLAIN QUERY PLAN in the optimize report
+STANDARD_QUERIES: Dict[str, Tuple[str, Tuple[Any, ...]]] = {
+    "retrieve.scan": ("SELECT id FROM documents WHERE duplicate_of IS NULL", ()),
+    "retrieve.coarse": (
+        "SELECT id, centroid FROM documents WHERE length(centroid) > 0 AND duplicate_of IS NULL",
+        (),
+    ),
+    "retrieve.fine": (
+        "SELECT c.document_id, c.id, c.embedding FROM chunks c "
+        "WHERE c.document_id IN (?, ?) AND c.embedding IS NOT NULL",
+        (1, 2),
+    ),
+    "retrieve.load_chunk": (
+        "SELECT c.position, c.metadata, d.path "
+        "FROM chunks c JOIN documents d ON d.id = c.document_id WHERE c.id = ?",
+        (1,),
+    ),
+    "ingest.lookup": ("SELECT id, hash FROM documents WHERE path = ?", ("",)),
+    "ingest.replace_chunks": ("DELETE FROM chunks WHERE document_id = ?", (1,)),
+    "ingest.dedupe_candidates": (
+        "SELECT document_id FROM minhash_buckets WHERE (band, bucket) IN (VALUES (?, ?))",
+        (0, 0),
+    ),
+    "sessions.list": (
+        "SELECT id, created_at, updated_at FROM sessions "
+        "WHERE updated_at >= ? ORDER BY updated_at DESC LIMIT 20",
+        ("",),
+    ),
+    "sessions.search": (
+        "SELECT rowid FROM session_messages_fts WHERE session_messages_fts MATCH ? LIMIT 20",
+        ("x",),
+    ),
+    "journal.page": (
+        "SELECT id FROM decisions WHERE status = ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT 10",
+        ("open", "", 0),
+    ),
+    "journal.due": (
+        "SELECT id FROM decisions WHERE status = 'open' AND review_at <= ? "
+        "ORDER BY review_at, id LIMIT 20",
+        ("",),
+    ),
+}
+
+Progress = Callable[[str], None]
+
+
+def fts_tables(conn: sqlite3.Connection) -> List[str]:
+    """List the FTS5 tables in the database."""
+    return [
+        name
+        for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master "
+            "WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL%'"
+        )
+        if "fts5" in sql.lower()
+    ]
+
+
+def storage_report(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Describe the size and fragmentation of the database.
+
+    Returns:
+        Page size and counts, free pages, and per table/index sizes
+        (`objects`, largest first). Per-object sizes need SQLite's dbstat
+        table and are empty when it is not compiled in.
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    objects = []
+    try:
+        rows = conn.execute(
+            "SELECT d.name, COALESCE(m.type, 'internal'), SUM(d.pgsize), SUM(d.unused), COUNT(*) "
+            "FROM dbstat d LEFT JOIN sqlite_master m ON m.name = d.name "
+            "GROUP BY d.name ORDER BY SUM(d.pgsize) DESC"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    for name, kind, size, unused, pages in rows:
+        objects.append(
+            {
+                "name": name,
+                "type": kind,
+                "bytes": size,
+                "pages": pages,
+                "unused_pct": 100.0 * unused / size if size else 0.0,
+            }
+        )
+    return {
+        "page_size": page_size,
+        "page_count": page_count,
+        "bytes": page_size * page_count,
+        "free_pages": freelist,
+        "free_pct": 100.0 * freelist / page_count if page_count else 0.0,
+        "auto_vacuum": ("none", "full", "incremental")[
+            conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        ],
+        "objects": objects,
+    }
+
+
+def query_plans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """Run EXPLAIN QUERY PLAN for each of STANDARD_QUERIES."""
+    plans = {}
+    for name, (sql, params) in STANDARD_QUERIES.items():
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        except sqlite3.OperationalError as e:
+            plans[name] = [f"error: {e}"]
+            continue
+        plans[name] = [row[3] for row in rows]
+    return plans
+
+
+def plan_steps(conn: sqlite3.Connection) -> List[str]:
+    """List the steps optimize() would run, in order."""
+    steps = ["analyze"]
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        steps.append("incremental_vacuum")
+    else:
+        # Switching to incremental auto-vacuum needs one full VACUUM
+        steps.append("vacuum")
+    steps.extend(f"fts_optimize:{name}" for name in fts_tables(conn))
+    steps.append("pragma_optimize")
+    return steps
+
+
+def optimize(
+    conn: sqlite3.Connection,
+    dry_run: bool = False,
+    progress: Optional[Progress] = None,
+) -> Dict[str, Any]:
+    """Analyze, compact and tune the database.
+
+    Args:
+        conn: Read-write vault database connection
+        dry_run: Only report what would run
+        progress: Called with each step name before it runs
+
+    Returns:
+        Steps with their durations in milliseconds, and the database size
+        before and after
+    """
+    steps = plan_steps(conn)
+    before = storage_report(conn)["bytes"]
+    if dry_run:
+        return {"steps": [{"name": step, "ms": None} for step in steps], "before": before}
+
+    timings = []
+    for step in steps:
+        if progress is not None:
+            progress(step)
+        start = time.perf_counter()
+        if step == "analyze":
+            conn.execute("ANALYZE")
+        elif step == "incremental_vacuum":
+            # execute() stops after the first freed page; a script runs it to completion
+            conn.executescript("PRAGMA incremental_vacuum;")
+        elif step == "vacuum":
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        elif step.startswith("fts_optimize:"):
+            table = step.split(":", 1)[1]
+            with conn:
+                conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        elif step == "pragma_optimize":
+            conn.execute("PRAGMA optimize")
+        conn.commit()
+        timings.append({"name": step, "ms": (time.perf_counter() - start) * 1000})
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO maintenance (task, last_run) VALUES ('optimize', ?)",
+            (datetime.now().isoformat(),),
+        )
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return {"steps": timings, "before": before, "after": storage_report(conn)["bytes"]}
+
+
+def last_run(conn: sqlite3.Connection, task: str = "optimize") -> Optional[datetime]:
+    """Get when a maintenance task last completed."""
+    row = conn.execute("SELECT last_run FROM maintenance WHERE task = ?", (task,)).fetchone()
+    return datetime.fromisoformat(row[0]) if row else None
+
+
+def last_write_time(db_path: Path) -> float:
+    """Get the latest modification time of the database or its WAL.
+
+    Call this before opening a connection, which touches the WAL file.
+    """
+    return max(
+        (os.stat(p).st_mtime for p in (db_path, Path(f"{db_path}-wal")) if p.exists()),
+        default=0.0,
+    )
+
+
+def idle_reason(
+    conn: sqlite3.Connection,
+    last_write: float,
+    interval: timedelta = timedelta(hours=24),
+    idle_for: timedelta = timedelta(minutes=5),
+) -> Optional[str]:
+    """Check whether idle maintenance should be skipped.
+
+    Args:
+        conn: Vault database connection
+        last_write: Result of last_write_time() taken before connecting
+        interval: Minimum time between optimize runs
+        idle_for: Quiet period required since the last write
+
+    Returns:
+        Why optimize should not run now, or None if it is due
+    """
+    previous = last_run(conn)
+    if previous is not None and datetime.now() - previous < interval:
+        return f"last run {previous:%Y-%m-%d %H:%M}, next due {previous + interval:%Y-%m-%d %H:%M}"
+    if time.time() - last_write < idle_for.total_seconds():
+        return "database was written recently"
+    return None
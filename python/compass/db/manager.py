@@ -2,8 +2,9 @@
 
 import sqlite3
 from pathlib import Path
-from typing import Optional
-from compass.db.migrate import init_database
+from typing import Dict, Optional
+from compass.db.migrate import init_database, migrate
+from compass.db.pool import ConnectionPool
 
 
 class DatabaseManager:
@@ -23,6 +24,8 @@ class DatabaseManager:
         self.vault_path = vault_path.resolve()
         self.compass_dir = self.vault_path / ".compass"
         self.db_path = self.compass_dir / "compass.db"
+        self._migrated = False
+        self._pool: Optional[ConnectionPool] = None
         
     def ensure_database(self) -> Path:
         """Ensure database exists and is initialized.
@@ -35,22 +38,57 @@ class DatabaseManager:
         # Create .compass directory if it doesn't exist
         self.compass_dir.mkdir(parents=True, exist_ok=True)
         
-        # Initialize database if it doesn't exist
+        # Initialize database if it doesn't exist, otherwise apply pending migrations
         if not self.db_path.exists():
             init_database(self.db_path)
+        elif not self._migrated:
+            migrate(self.db_path)
+        self._migrated = True
         
         return self.db_path
     
+    @property
+    def pool(self) -> ConnectionPool:
+        """Connection pool for the database, created on first use."""
+        if self._pool is None:
+            self.ensure_database()
+            self._pool = ConnectionPool(self.db_path)
+        return self._pool
+
     def get_connection(self) -> sqlite3.Connection:
         """Get a database connection.
         
-        Ensures database exists before returning connection.
+        Ensures database exists before returning connection. The
+        connection is this thread's pooled writer; it stays open for
+        reuse and is closed by `close()`.
         
         Returns:
             SQLite connection object
         """
-        self.ensure_database()
-        return sqlite3.connect(self.db_path)
+        return self.pool.writer()
+
+    def get_reader(self) -> sqlite3.Connection:
+        """Get this thread's pooled read-only connection.
+
+        Reads through it are not blocked by a concurrent ingest.
+        """
+        return self.pool.reader()
+
+    def connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a tuned connection outside the pool, owned by the caller.
+
+        Suitable for sharing between threads (check_same_thread=False).
+        """
+        return self.pool.connect(read_only=read_only)
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Get connection pool statistics."""
+        return self.pool.stats()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        if self._pool is not None:
+            self._pool.close()
     
     def exists(self) -> bool:
         """Check if database file exists."""
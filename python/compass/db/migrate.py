@@ -1,22 +1,194 @@
-"""Database migration utilities."""
+"""Database migration utilities.
 
+The schema version of a vault database is tracked in `PRAGMA user_version`.
+Migrations run in order and each one is applied in its own transaction, so
+an interrupted upgrade resumes from the last completed migration. Long
+data backfills run in small batches so the database stays usable by other
+readers (and the vault stays local) while an old vault is upgraded.
+"""
+
+import hashlib
 import sqlite3
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, List, Optional
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# A backfill processes at most `batch_size` rows and returns how many it
+# changed; it is called repeatedly until it returns 0.
+Backfill = Callable[[sqlite3.Connection, int], int]
+
+
+@dataclass
+class Migration:
+    """A schema migration: either a SQL script or a batched backfill."""
+
+    version: int
+    name: str
+    script: Optional[Path] = None
+    backfill: Optional[Backfill] = None
+
+
+def backfill_document_hashes(conn: sqlite3.Connection, batch_size: int) -> int:
+    """Fill in content hashes for documents stored before hashes were recorded."""
+    rows = conn.execute(
+        "SELECT id, content FROM documents WHERE hash IS NULL LIMIT ?", (batch_size,)
+    ).fetchall()
+    conn.executemany(
+        "UPDATE documents SET hash = ? WHERE id = ?",
+        [
+            (hashlib.sha256((content or "").encode("utf-8")).hexdigest(), doc_id)
+            for doc_id, content in rows
+        ],
+    )
+    return len(rows)
+
+
+def backfill_chunk_offsets(conn: sqlite3.Connection, batch_size: int) -> int:
+    """Copy chunk offsets from the JSON metadata into their own columns."""
+    return conn.execute(
+        "UPDATE chunks SET start_offset = json_extract(metadata, '$.start'), "
+        "end_offset = json_extract(metadata, '$.end') WHERE id IN ("
+        "SELECT id FROM chunks WHERE start_offset IS NULL "
+        "AND json_extract(metadata, '$.start') IS NOT NULL LIMIT ?)",
+        (batch_size,),
+    ).rowcount
+
+
+def backfill_document_centroids(conn: sqlite3.Connection, batch_size: int) -> int:
+    """Compute document vectors from the chunk embeddings of existing documents."""
+    from compass.rag.retrieve import document_vector
+
+    ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM documents WHERE centroid IS NULL LIMIT ?", (batch_size,)
+        )
+    ]
+    for doc_id in ids:
+        blobs = conn.execute(
+            "SELECT embedding FROM chunks WHERE document_id = ? ORDER BY position", (doc_id,)
+        )
+        conn.execute(
+            "UPDATE documents SET centroid = ? WHERE id = ?",
+            (document_vector(blob for (blob,) in blobs), doc_id),
+        )
+    return len(ids)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline", script=Path(__file__).parent / "schema.sql"),
+    Migration(2, "performance_indexes", script=MIGRATIONS_DIR / "0002_performance_indexes.sql"),
+    Migration(3, "document_hashes", backfill=backfill_document_hashes),
+    Migration(4, "compressed_storage", script=MIGRATIONS_DIR / "0004_compressed_storage.sql"),
+    Migration(5, "chunk_offsets", backfill=backfill_chunk_offsets),
+    Migration(6, "maintenance", script=MIGRATIONS_DIR / "0006_maintenance.sql"),
+    Migration(7, "dedupe", script=MIGRATIONS_DIR / "0007_dedupe.sql"),
+    Migration(8, "centroid_column", script=MIGRATIONS_DIR / "0008_document_centroids.sql"),
+    Migration(9, "document_centroids", backfill=backfill_document_centroids),
+    Migration(10, "metrics", script=MIGRATIONS_DIR / "0010_metrics.sql"),
+    Migration(11, "decisions", script=MIGRATIONS_DIR / "0011_decisions.sql"),
+]
+
+
+def latest_version() -> int:
+    """Get the schema version the code expects."""
+    return MIGRATIONS[-1].version
+
+
+def get_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version of an open database."""
+    version: int = conn.execute("PRAGMA user_version").fetchone()[0]
+    return version
 
 
 def init_database(db_path: Path) -> None:
     """Initialize database with schema."""
-    schema_path = Path(__file__).parent / "schema.sql"
-    schema = schema_path.read_text()
-
     conn = sqlite3.connect(db_path)
-    conn.executescript(schema)
-    conn.commit()
+    # Must be set before the first table exists; lets `compass db optimize`
+    # return free pages with an incremental vacuum instead of a full VACUUM
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
     conn.close()
+    migrate(db_path)
+
+
+def migrate(db_path: Path, version: Optional[int] = None, batch_size: int = 500) -> int:
+    """Bring a database up to a schema version.
+
+    Safe to run from several processes at once: each step takes the write
+    lock and re-reads the schema version before doing anything, so a step
+    another process already applied is skipped.
+
+    Args:
+        db_path: Database file (created if missing)
+        version: Target version. Defaults to latest_version()
+        batch_size: Rows per transaction for backfills
+
+    Returns:
+        Schema version after migrating
+    """
+    target = latest_version() if version is None else version
+    # Transactions are managed explicitly; wait for other migrating processes
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    try:
+        for migration in MIGRATIONS:
+            if get_version(conn) < migration.version <= target:
+                apply_migration(conn, migration, batch_size)
+        return get_version(conn)
+    finally:
+        conn.close()
+
+
+def apply_migration(conn: sqlite3.Connection, migration: Migration, batch_size: int = 500) -> bool:
+    """Apply one migration and record its version.
+
+    A script and its version bump commit together. Backfill batches
+    commit one at a time, so other connections can read and write
+    between them; an interrupted backfill continues on the next run.
+    Every transaction starts with BEGIN IMMEDIATE and checks the version
+    again, so concurrent migrations never apply a step twice.
+
+    Args:
+        conn: Connection in autocommit mode (isolation_level=None)
+        migration: Migration to apply
+        batch_size: Rows per transaction for backfills
+
+    Returns:
+        False if the database was already at or past the migration
+    """
+    statements = [] if migration.script is None else _statements(migration.script.read_text())
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_version(conn) >= migration.version:
+                conn.execute("ROLLBACK")
+                return False
+            if migration.backfill is not None and migration.backfill(conn, batch_size) > 0:
+                conn.execute("COMMIT")
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {migration.version}")
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
 
 
-def migrate(db_path: Path, version: Optional[int] = None) -> None:
-    """Run database migrations (stub)."""
-    # Placeholder for future migration system
-    pass
+def _statements(script: str) -> List[str]:
+    """Split a SQL script into statements (executescript() would commit)."""
+    statements: List[str] = []
+    pending = ""
+    for line in script.splitlines(keepends=True):
+        pending += line
+        if sqlite3.complete_statement(pending):
+            statements.append(pending.strip())
+            pending = ""
+    if pending.strip() and not all(
+        part.strip().startswith("--") or not part.strip() for part in pending.splitlines()
+    ):
+        raise ValueError(f"Incomplete SQL statement: {pending.strip()[:80]}")
+    return statements
@@ -0,0 +1,15 @@
+-- Indexes for ingest, retrieval and session listing hot paths
+
+CREATE INDEX IF NOT EXISTS idx_documents_hash ON documents(hash);
+CREATE INDEX IF NOT EXISTS idx_documents_updated_at ON documents(updated_at);
+
+-- Covers ordered chunk lookups by document; supersedes idx_chunks_document_id
+CREATE INDEX IF NOT EXISTS idx_chunks_document_position ON chunks(document_id, position);
+DROP INDEX IF EXISTS idx_chunks_document_id;
+
+-- The UNIQUE constraint already indexes path; the extra index only slowed writes
+DROP INDEX IF EXISTS idx_documents_path;
+
+-- Covers `compass sessions list` (ordered by updated_at) without touching the table
+CREATE INDEX IF NOT EXISTS idx_sessions_updated_covering ON sessions(updated_at, created_at, id);
+DROP INDEX IF EXISTS idx_sessions_updated_at;
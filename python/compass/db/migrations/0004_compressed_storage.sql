@@ -0,0 +1,7 @@
+-- Compressed document text and offset-based chunks (see db/storage.py).
+-- Inline rows keep using documents.content and chunks.content.
+
+ALTER TABLE documents ADD COLUMN content_blob BLOB;
+ALTER TABLE documents ADD COLUMN codec TEXT;
+ALTER TABLE chunks ADD COLUMN start_offset INTEGER;
+ALTER TABLE chunks ADD COLUMN end_offset INTEGER;
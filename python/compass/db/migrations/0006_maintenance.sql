@@ -0,0 +1,6 @@
+-- When maintenance tasks (e.g. `compass db optimize`) last completed
+
+CREATE TABLE IF NOT EXISTS maintenance (
+    task TEXT PRIMARY KEY,
+    last_run TIMESTAMP
+);
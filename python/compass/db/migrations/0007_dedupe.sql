@@ -0,0 +1,14 @@
+-- MinHash signatures and LSH buckets for near-duplicate detection (see ingest/dedupe.py)
+
+ALTER TABLE documents ADD COLUMN minhash BLOB;
+ALTER TABLE documents ADD COLUMN duplicate_of INTEGER REFERENCES documents(id) ON DELETE SET NULL;
+
+CREATE TABLE IF NOT EXISTS minhash_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    document_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, document_id),
+    FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_minhash_buckets_document ON minhash_buckets(document_id);
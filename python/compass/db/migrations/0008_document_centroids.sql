@@ -0,0 +1,4 @@
+-- Document-level vectors for two-stage retrieval (see rag/retrieve.py).
+-- An empty blob marks a document without chunk embeddings.
+
+ALTER TABLE documents ADD COLUMN centroid BLOB;
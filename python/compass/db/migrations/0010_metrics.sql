@@ -0,0 +1,46 @@
+-- Time series loaded from metrics/*.csv (see compass/metrics.py)
+
+-- The prefix of each CSV file already loaded, so appends load only new rows
+CREATE TABLE IF NOT EXISTS metric_sources (
+    path TEXT PRIMARY KEY,
+    bytes_read INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    header TEXT NOT NULL
+);
+
+-- One series per numeric CSV column, named "<file stem>.<column>"
+CREATE TABLE IF NOT EXISTS metric_series (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    FOREIGN KEY (source) REFERENCES metric_sources(path) ON DELETE CASCADE
+);
+
+-- Observations clustered by series and time (unix seconds). The cum_*
+-- columns are running totals up to and including each row, so the count,
+-- sum, mean and variance of any window take two index lookups
+CREATE TABLE IF NOT EXISTS metric_points (
+    series_id INTEGER NOT NULL,
+    t INTEGER NOT NULL,
+    value REAL NOT NULL,
+    cum_count INTEGER NOT NULL DEFAULT 0,
+    cum_sum REAL NOT NULL DEFAULT 0,
+    cum_sumsq REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (series_id, t),
+    FOREIGN KEY (series_id) REFERENCES metric_series(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Weekly (from Monday) and monthly downsampled aggregates
+CREATE TABLE IF NOT EXISTS metric_rollups (
+    series_id INTEGER NOT NULL,
+    period TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    sumsq REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (series_id, period, start),
+    FOREIGN KEY (series_id) REFERENCES metric_series(id) ON DELETE CASCADE
+) WITHOUT ROWID;
@@ -0,0 +1,45 @@
+-- Decision journal (see tools/decision_journal.py). Times are ISO strings
+
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    decision TEXT NOT NULL,
+    context TEXT NOT NULL DEFAULT '',
+    expected_outcome TEXT NOT NULL DEFAULT '',
+    outcome TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    created_at TEXT NOT NULL,
+    review_at TEXT,
+    reviewed_at TEXT
+);
+
+-- Keyset pagination walks (created_at, id); secondary indexes end in the rowid
+CREATE INDEX IF NOT EXISTS idx_decisions_created_at ON decisions(created_at);
+CREATE INDEX IF NOT EXISTS idx_decisions_status_created_at ON decisions(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_decisions_due ON decisions(status, review_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS decisions_fts USING fts5(
+    decision,
+    context,
+    expected_outcome,
+    outcome,
+    content='decisions',
+    content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS decisions_ai AFTER INSERT ON decisions BEGIN
+    INSERT INTO decisions_fts(rowid, decision, context, expected_outcome, outcome)
+    VALUES (new.id, new.decision, new.context, new.expected_outcome, new.outcome);
+END;
+
+CREATE TRIGGER IF NOT EXISTS decisions_ad AFTER DELETE ON decisions BEGIN
+    INSERT INTO decisions_fts(decisions_fts, rowid, decision, context, expected_outcome, outcome)
+    VALUES ('delete', old.id, old.decision, old.context, old.expected_outcome, old.outcome);
+END;
+
+CREATE TRIGGER IF NOT EXISTS decisions_au AFTER UPDATE OF decision, context, expected_outcome, outcome
+ON decisions BEGIN
+    INSERT INTO decisions_fts(decisions_fts, rowid, decision, context, expected_outcome, outcome)
+    VALUES ('delete', old.id, old.decision, old.context, old.expected_outcome, old.outcome);
+    INSERT INTO decisions_fts(rowid, decision, context, expected_outcome, outcome)
+    VALUES (new.id, new.decision, new.context, new.expected_outcome, new.outcome);
+END;
@@ -0,0 +1,112 @@
+"""Pooled, tuned SQLite connections for a vault database.
+
+Connections are opened against the local vault database only. Each thread
+reuses one writer and one read-only reader connection, so commands and
+the daemon stop paying for a fresh connection per query.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Applied to every connection. WAL lets readers run while an ingest writes;
+# synchronous=NORMAL is durable in WAL mode except across power loss.
+DEFAULT_PRAGMAS: Dict[str, object] = {
+    "synchronous": "NORMAL",
+    "foreign_keys": "ON",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,  # KiB when negative
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+
+
+class ConnectionPool:
+    """Per-thread writer and read-only reader connections for one database."""
+
+    def __init__(self, db_path: Path, pragmas: Dict[str, object] = DEFAULT_PRAGMAS):
+        """Initialize the pool.
+
+        Args:
+            db_path: Database file, which must already exist
+            pragmas: PRAGMA settings applied to each new connection
+        """
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._stats = {"opened": 0, "reused": 0, "reopened": 0}
+        self._wal = False
+
+    def connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a new tuned connection that is not pooled.
+
+        Useful for long-lived connections shared between threads; the
+        caller owns and closes it.
+        """
+        if read_only:
+            conn = sqlite3.connect(
+                f"{self.db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if not self._wal and not read_only:
+            # journal_mode is stored in the database file, so this runs once
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._wal = True
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        with self._lock:
+            self._stats["opened"] += 1
+        return conn
+
+    def writer(self) -> sqlite3.Connection:
+        """Get this thread's read-write connection."""
+        return self._get("writer", read_only=False)
+
+    def reader(self) -> sqlite3.Connection:
+        """Get this thread's read-only connection.
+
+        Readers see the last committed state and are not blocked by a
+        concurrent write transaction.
+        """
+        if not self._wal:
+            # A read-only connection cannot switch the database to WAL
+            self.writer()
+        return self._get("reader", read_only=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Pool statistics: connections opened, reused and open now."""
+        with self._lock:
+            return {**self._stats, "open": len(self._connections)}
+
+    def close(self) -> None:
+        """Close every pooled connection."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _get(self, kind: str, read_only: bool) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, kind, None)
+        if conn is not None:
+            try:
+                conn.total_changes  # raises if a caller closed it
+            except sqlite3.ProgrammingError:
+                with self._lock:
+                    self._stats["reopened"] += 1
+                    self._connections.remove(conn)
+            else:
+                with self._lock:
+                    self._stats["reused"] += 1
+                return conn
+        conn = self.connect(read_only=read_only)
+        setattr(self._local, kind, conn)
+        with self._lock:
+            self._connections.append(conn)
+        return conn
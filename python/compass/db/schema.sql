@@ -1,4 +1,5 @@
 -- Compass database schema
+-- Baseline schema (migration 1). Later changes go in migrations/ (see migrate.py).
 
 CREATE TABLE IF NOT EXISTS documents (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -30,3 +31,31 @@ CREATE TABLE IF NOT EXISTS sessions (
 CREATE INDEX IF NOT EXISTS idx_documents_path ON documents(path);
 CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks(document_id);
 CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions(created_at);
+
+CREATE TABLE IF NOT EXISTS session_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TIMESTAMP,
+    UNIQUE (session_id, seq),
+    FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS session_messages_fts USING fts5(
+    content,
+    content='session_messages',
+    content_rowid='id'
+);
+
+CREATE TRIGGER IF NOT EXISTS session_messages_ai AFTER INSERT ON session_messages BEGIN
+    INSERT INTO session_messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+
+CREATE TRIGGER IF NOT EXISTS session_messages_ad AFTER DELETE ON session_messages BEGIN
+    INSERT INTO session_messages_fts(session_messages_fts, rowid, content)
+    VALUES ('delete', old.id, old.content);
+END;
@@ -0,0 +1,144 @@
+"""Compressed document storage and offset-based chunk text.
+
+In compressed mode a document's text is stored once, compressed, in
+`documents.content_blob`, and chunks keep only `(start_offset, end_offset)`
+into it. Chunk text is sliced out on demand; recently used documents are
+kept decompressed in a small in-memory LRU. Everything stays in the local
+vault database.
+"""
+
+import lzma
+import sqlite3
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+CODECS = ("zlib", "lzma", "zstd")
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("The zstd codec requires the zstandard package (pip install zstandard)")
+    return zstandard
+
+
+def compress(text: str, codec: str = "zlib") -> bytes:
+    """Compress document text with a codec from CODECS."""
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    if codec == "lzma":
+        return lzma.compress(data, preset=6)
+    if codec == "zstd":
+        blob: bytes = _zstd().ZstdCompressor(level=9).compress(data)
+        return blob
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decompress(blob: bytes, codec: str) -> str:
+    """Decompress document text stored with `codec`."""
+    if codec == "zlib":
+        data = zlib.decompress(blob)
+    elif codec == "lzma":
+        data = lzma.decompress(blob)
+    elif codec == "zstd":
+        data = _zstd().ZstdDecompressor().decompress(blob)
+    else:
+        raise ValueError(f"Unknown codec: {codec}")
+    return data.decode("utf-8")
+
+
+class DocumentStore:
+    """Reads document and chunk text regardless of how it was stored."""
+
+    def __init__(self, conn: sqlite3.Connection, cache_size: int = 32):
+        """Initialize document store.
+
+        Args:
+            conn: Vault database connection
+            cache_size: Number of decompressed documents kept in memory
+        """
+        self.conn = conn
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+
+    def document_text(self, document_id: int) -> Optional[str]:
+        """Get the full text of a document, or None if it does not exist."""
+        text = self._cache.get(document_id)
+        if text is not None:
+            self._cache.move_to_end(document_id)
+            return text
+        row = self.conn.execute(
+            "SELECT content, content_blob, codec FROM documents WHERE id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        content: Optional[str]
+        content, blob, codec = row
+        if blob is None:
+            return content
+        text = decompress(blob, codec)
+        self._cache[document_id] = text
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return text
+
+    def chunk_texts(self, chunk_ids: Iterable[int]) -> Dict[int, str]:
+        """Get the text of several chunks, slicing compressed documents as needed."""
+        texts = {}
+        for chunk_id in chunk_ids:
+            row = self.conn.execute(
+                "SELECT document_id, content, start_offset, end_offset FROM chunks WHERE id = ?",
+                (chunk_id,),
+            ).fetchone()
+            if row is None:
+                continue
+            document_id, content, start, end = row
+            if content or start is None:
+                texts[chunk_id] = content
+            else:
+                texts[chunk_id] = (self.document_text(document_id) or "")[start:end]
+        return texts
+
+
+def compress_documents(
+    conn: sqlite3.Connection, codec: str = "zlib", batch_size: int = 100
+) -> Dict[str, int]:
+    """Convert inline documents to compressed storage in batches.
+
+    Chunk text is dropped in favour of offsets only where the stored
+    offsets reproduce it exactly.
+
+    Returns:
+        Counts of documents converted and chunks switched to offsets
+    """
+    stats = {"documents": 0, "chunks": 0}
+    while True:
+        with conn:
+            rows = conn.execute(
+                "SELECT id, content FROM documents WHERE content_blob IS NULL "
+                "AND content IS NOT NULL LIMIT ?",
+                (batch_size,),
+            ).fetchall()
+            for document_id, content in rows:
+                conn.execute(
+                    "UPDATE documents SET content = NULL, content_blob = ?, codec = ? WHERE id = ?",
+                    (compress(content, codec), codec, document_id),
+                )
+                chunks = conn.execute(
+                    "SELECT id, content, start_offset, end_offset FROM chunks "
+                    "WHERE document_id = ?",
+                    (document_id,),
+                ).fetchall()
+                offset_ids = [
+                    (chunk_id,)
+                    for chunk_id, text, start, end in chunks
+                    if start is not None and text and content[start:end] == text
+                ]
+                conn.executemany("UPDATE chunks SET content = '' WHERE id = ?", offset_ids)
+                stats["chunks"] += len(offset_ids)
+            stats["documents"] += len(rows)
+        if not rows:
+            return stats
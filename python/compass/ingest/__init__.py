@@ -1,3 +1,3 @@
 """Document ingestion pipeline."""
 
-__all__ = ["loaders", "chunking", "pipeline"]
+__all__ = ["loaders", "formats", "worker", "chunking", "pipeline", "watch"]
@@ -0,0 +1,232 @@
+"""Near-duplicate document detection with MinHash and LSH.
+
+Each document gets a MinHash signature over its word 3-shingles at ingest.
+Signatures are split into bands, and each band is hashed into
+`minhash_buckets`, so candidate duplicates are found by a few indexed
+lookups instead of comparing against every document. Candidates are then
+confirmed by the Jaccard similarity estimated from their signatures. All
+of this is computed and stored locally in the vault database.
+"""
+
+import hashlib
+import random
+import re
+import sqlite3
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+NUM_PERM = 64
+# 16 bands of 4 rows make documents with Jaccard similarity above about
+# (1/16)^(1/4) = 0.5 likely to share a bucket, so any threshold from 0.5 up
+# can be applied without rebuilding the buckets
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+ACTIONS = ("off", "flag", "skip")
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)  # fixed, so signatures agree across machines
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r"\w+")
+
+
+def shingles(text: str, size: int = 3) -> List[int]:
+    """Hash the overlapping word n-grams of normalized text."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        words = [" ".join(words)] if words else []
+        size = 1
+    return list(
+        {
+            zlib.crc32(" ".join(words[i : i + size]).encode("utf-8"))
+            for i in range(len(words) - size + 1)
+        }
+    )
+
+
+def signature(text: str) -> Optional[array]:
+    """Compute the MinHash signature of a text, or None if it has no words."""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    return array("Q", [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS])
+
+
+def similarity(left: array, right: array) -> float:
+    """Estimate Jaccard similarity from two signatures."""
+    matches: int = sum(x == y for x, y in zip(left, right))
+    return matches / len(left)
+
+
+def buckets(sig: array) -> List[Tuple[int, int]]:
+    """Hash each band of a signature to a (band, bucket) pair."""
+    return [
+        (
+            band,
+            int.from_bytes(
+                hashlib.blake2b(
+                    sig[band * ROWS : (band + 1) * ROWS].tobytes(), digest_size=8
+                ).digest(),
+                "little",
+                signed=True,
+            ),
+        )
+        for band in range(BANDS)
+    ]
+
+
+class Deduplicator:
+    """Finds stored documents that nearly duplicate new ones."""
+
+    def __init__(self, threshold: float = 0.9, action: str = "flag"):
+        """Initialize deduplicator.
+
+        Args:
+            threshold: Minimum estimated Jaccard similarity for a duplicate
+            action: "flag" stores duplicates but marks them (retrieval
+                    skips flagged documents); "skip" does not store or embed
+                    them; "off" only records signatures
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown dedupe action: {action}")
+        self.threshold = threshold
+        self.action = action
+
+    def find(
+        self, conn: sqlite3.Connection, sig: array, path: str
+    ) -> Optional[Tuple[int, str, float]]:
+        """Find the most similar original document above the threshold.
+
+        Args:
+            conn: Vault database connection
+            sig: Signature of the new document
+            path: Path of the new document, excluded from matches
+
+        Returns:
+            (document id, path, similarity) of the best match, or None
+        """
+        if self.action == "off":
+            return None
+        pairs = buckets(sig)
+        rows = conn.execute(
+            "SELECT d.id, d.path, d.minhash FROM documents d WHERE d.id IN ("
+            "SELECT document_id FROM minhash_buckets WHERE (band, bucket) IN (VALUES "
+            + ", ".join("(?, ?)" for _ in pairs)
+            + ")) AND d.path != ? AND d.duplicate_of IS NULL",
+            [value for pair in pairs for value in pair] + [path],
+        ).fetchall()
+        best = None
+        for document_id, other_path, blob in rows:
+            score = similarity(sig, array("Q", blob))
+            if score >= self.threshold and (best is None or score > best[2]):
+                best = (document_id, other_path, score)
+        return best
+
+
+def store_signature(conn: sqlite3.Connection, document_id: int, sig: Optional[array]) -> None:
+    """Save a document's signature and LSH buckets, inside the caller's transaction."""
+    conn.execute(
+        "UPDATE documents SET minhash = ? WHERE id = ?",
+        (sig.tobytes() if sig is not None else None, document_id),
+    )
+    conn.execute("DELETE FROM minhash_buckets WHERE document_id = ?", (document_id,))
+    if sig is not None:
+        conn.executemany(
+            "INSERT OR IGNORE INTO minhash_buckets (band, bucket, document_id) VALUES (?, ?, ?)",
+            [(band, bucket, document_id) for band, bucket in buckets(sig)],
+        )
+
+
+def sign_missing(conn: sqlite3.Connection, batch_size: int = 200) -> int:
+    """Compute signatures for documents stored before dedupe existed.
+
+    Returns:
+        Number of documents signed
+    """
+    from compass.db.storage import DocumentStore
+
+    store = DocumentStore(conn, cache_size=0)
+    signed = 0
+    last_id = 0
+    while True:
+        ids = [
+            row[0]
+            for row in conn.execute(
+                "SELECT id FROM documents WHERE minhash IS NULL AND id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            )
+        ]
+        if not ids:
+            return signed
+        with conn:
+            for document_id in ids:
+                sig = signature(store.document_text(document_id) or "")
+                if sig is not None:
+                    store_signature(conn, document_id, sig)
+                    signed += 1
+        last_id = ids[-1]
+
+
+def report(conn: sqlite3.Connection, threshold: float = 0.9) -> List[Dict[str, Any]]:
+    """Group stored documents into clusters of near-duplicates.
+
+    Returns:
+        Clusters, largest first. Each has the `original` (the earliest
+        stored document) and its `duplicates` with their similarity to it
+        and chunk counts.
+    """
+    candidates: Set[Tuple[int, int]] = set()
+    for (ids,) in conn.execute(
+        "SELECT group_concat(document_id) FROM minhash_buckets "
+        "GROUP BY band, bucket HAVING COUNT(*) > 1"
+    ):
+        members = sorted(int(i) for i in ids.split(","))
+        candidates.update((a, b) for i, a in enumerate(members) for b in members[i + 1 :])
+    if not candidates:
+        return []
+
+    info = {
+        document_id: (path, array("Q", blob), chunks)
+        for document_id, path, blob, chunks in conn.execute(
+            "SELECT d.id, d.path, d.minhash, "
+            "(SELECT COUNT(*) FROM chunks c WHERE c.document_id = d.id) "
+            "FROM documents d WHERE d.minhash IS NOT NULL"
+        )
+    }
+    parent: Dict[int, int] = {}
+
+    def root(x: int) -> int:
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    for a, b in candidates:
+        if a in info and b in info and similarity(info[a][1], info[b][1]) >= threshold:
+            parent.setdefault(a, a)
+            parent.setdefault(b, b)
+            root_a, root_b = root(a), root(b)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters: Dict[int, List[int]] = {}
+    for document_id in parent:
+        clusters.setdefault(root(document_id), []).append(document_id)
+    result: List[Dict[str, Any]] = []
+    for original, members in clusters.items():
+        sig = info[original][1]
+        duplicates: List[Dict[str, Any]] = [
+            {
+                "id": member,
+                "path": info[member][0],
+                "similarity": similarity(sig, info[member][1]),
+                "chunks": info[member][2],
+            }
+            for member in members
+            if member != original
+        ]
+        duplicates.sort(key=lambda d: -d["similarity"])
+        result.append(
+            {"original": {"id": original, "path": info[original][0]}, "duplicates": duplicates}
+        )
+    result.sort(key=lambda c: -len(c["duplicates"]))
+    return result
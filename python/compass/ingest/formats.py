@@ -0,0 +1,132 @@
+"""Loaders for structured and binary document formats.
+
+Each loader imports its parser only when it loads a file, so this module
+is cheap to import. PDF support needs the optional pypdf package
+(`pip install compass-cli[pdf]`); the others use the standard library.
+Files are parsed locally, normally inside the isolated loader worker.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List
+from compass.ingest.loaders import DocumentLoader, LoaderError
+
+
+class CsvLoader(DocumentLoader):
+    """Load CSV files as one "column: value" line per row."""
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """Load CSV file."""
+        import csv
+
+        with path.open(newline="", encoding="utf-8", errors="ignore") as f:
+            rows = list(csv.reader(f))
+        header, body = (rows[0], rows[1:]) if rows else ([], [])
+        lines = [
+            " | ".join(f"{name}: {value}" for name, value in zip(header, row) if value)
+            for row in body
+        ]
+        return {
+            "content": "\n".join([" | ".join(header)] + lines),
+            "metadata": {
+                "source": str(path),
+                "type": "csv",
+                "columns": header,
+                "rows": len(body),
+            },
+        }
+
+
+class HtmlLoader(DocumentLoader):
+    """Load the visible text of HTML files."""
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """Load HTML file."""
+        from html.parser import HTMLParser
+
+        class TextExtractor(HTMLParser):
+            skip = frozenset({"script", "style", "noscript", "template"})
+            blocks = frozenset({"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"})
+
+            def __init__(self) -> None:
+                super().__init__()
+                self.parts: List[str] = []
+                self.title: List[str] = []
+                self.stack: List[str] = []
+
+            def handle_starttag(self, tag: str, attrs: Any) -> None:
+                self.stack.append(tag)
+                if tag in self.blocks:
+                    self.parts.append("\n")
+
+            def handle_endtag(self, tag: str) -> None:
+                if tag in self.stack:
+                    del self.stack[len(self.stack) - 1 - self.stack[::-1].index(tag) :]
+
+            def handle_data(self, data: str) -> None:
+                if "title" in self.stack:
+                    self.title.append(data)
+                elif not self.skip.intersection(self.stack):
+                    self.parts.append(data)
+
+        parser = TextExtractor()
+        parser.feed(path.read_text(encoding="utf-8", errors="ignore"))
+        parser.close()
+        lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+        return {
+            "content": "\n".join(line for line in lines if line),
+            "metadata": {
+                "source": str(path),
+                "type": "html",
+                "title": " ".join("".join(parser.title).split()),
+            },
+        }
+
+
+class DocxLoader(DocumentLoader):
+    """Load the paragraphs of Word (.docx) files."""
+
+    _NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """Load DOCX file."""
+        import zipfile
+        from xml.etree import ElementTree
+
+        try:
+            with zipfile.ZipFile(path) as archive:
+                root = ElementTree.fromstring(archive.read("word/document.xml"))
+        except (zipfile.BadZipFile, KeyError) as e:
+            raise LoaderError(f"Not a Word document: {e}")
+        paragraphs = [
+            "".join(node.text or "" for node in paragraph.iter(f"{self._NS}t"))
+            for paragraph in root.iter(f"{self._NS}p")
+        ]
+        return {
+            "content": "\n".join(p for p in paragraphs if p.strip()),
+            "metadata": {
+                "source": str(path),
+                "type": "docx",
+            },
+        }
+
+
+class PdfLoader(DocumentLoader):
+    """Load the text of PDF files."""
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """Load PDF file."""
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise LoaderError("PDF files require the pypdf package (pip install pypdf)")
+
+        reader = PdfReader(path)
+        pages = [page.extract_text() or "" for page in reader.pages]
+        return {
+            "content": "\n\n".join(pages),
+            "metadata": {
+                "source": str(path),
+                "type": "pdf",
+                "pages": len(pages),
+            },
+        }
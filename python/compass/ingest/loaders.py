@@ -1,7 +1,49 @@
-"""Document loaders for various file formats."""
+"""Document loaders for various file formats.
 
+Loaders are registered by file suffix as "module:Class" targets and only
+imported when a file with that suffix is ingested, so installing more
+loaders does not slow down startup. Third-party packages add loaders
+through the `compass.loaders` entry point group, named by suffix:
+
+    [project.entry-points."compass.loaders"]
+    rst = "compass_rst:RstLoader"
+
+Loaders for complex formats (and all plugins) run in an isolated worker
+process with per-file time and memory limits; see compass.ingest.worker.
+All parsing happens locally.
+"""
+
+from importlib import import_module
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from compass.ingest.worker import LoaderWorker
+
+ENTRY_POINT_GROUP = "compass.loaders"
+
+# Built-in loaders by suffix: (target, isolated). Plain text formats are
+# cheap and safe to parse in-process.
+BUILTIN_LOADERS: Dict[str, Tuple[str, bool]] = {
+    ".md": ("compass.ingest.loaders:MarkdownLoader", False),
+    ".txt": ("compass.ingest.loaders:TextLoader", False),
+    ".log": ("compass.ingest.loaders:TextLoader", False),
+    ".csv": ("compass.ingest.formats:CsvLoader", False),
+    ".html": ("compass.ingest.formats:HtmlLoader", True),
+    ".htm": ("compass.ingest.formats:HtmlLoader", True),
+    ".docx": ("compass.ingest.formats:DocxLoader", True),
+    ".pdf": ("compass.ingest.formats:PdfLoader", True),
+}
+
+
+class LoaderError(Exception):
+    """A document could not be loaded."""
+
+
+def load_target(target: str) -> Any:
+    """Import the object named by a "module:attribute" target."""
+    module, _, attr = target.partition(":")
+    return getattr(import_module(module), attr)
 
 
 class DocumentLoader:
@@ -42,11 +84,114 @@ class MarkdownLoader(DocumentLoader):
         }
 
 
+class IsolatedLoader(DocumentLoader):
+    """Runs another loader in a worker process."""
+
+    def __init__(self, target: str, worker: "LoaderWorker"):
+        """Initialize isolated loader.
+
+        Args:
+            target: "module:Class" of the loader to run in the worker
+            worker: Worker process to run it in
+        """
+        self.target = target
+        self.worker = worker
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        """Load a file in the worker.
+
+        Raises:
+            LoaderError: If loading fails, times out or runs out of memory
+        """
+        return self.worker.load(self.target, path)
+
+
+class LoaderRegistry:
+    """Maps file suffixes to loaders, importing each one on first use."""
+
+    def __init__(self, isolate: bool = True, timeout: float = 30.0, memory_mb: int = 1024):
+        """Initialize registry with the built-in loaders.
+
+        Args:
+            isolate: Run loaders marked isolated in a worker process. When
+                     False every loader runs in-process
+            timeout: Seconds a worker may spend on one file
+            memory_mb: Memory limit of the worker process
+        """
+        self.isolate = isolate
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._targets: Dict[str, Tuple[str, bool]] = dict(BUILTIN_LOADERS)
+        self._instances: Dict[str, DocumentLoader] = {}
+        self._discovered = False
+        self._worker: Optional["LoaderWorker"] = None
+
+    def register(self, suffix: str, target: str, isolated: bool = True) -> None:
+        """Register a loader for a suffix, replacing any existing one.
+
+        Args:
+            suffix: File suffix including the dot, e.g. ".rst"
+            target: "module:Class" of a DocumentLoader subclass
+            isolated: Run the loader in the worker process
+        """
+        self._targets[suffix.lower()] = (target, isolated)
+
+    def suffixes(self) -> List[str]:
+        """List the suffixes with a registered loader."""
+        self._discover()
+        return sorted(self._targets)
+
+    def get(self, path: Path) -> Optional[DocumentLoader]:
+        """Get the loader for a file, or None if its suffix has none."""
+        self._discover()
+        entry = self._targets.get(path.suffix.lower())
+        if entry is None:
+            return None
+        target, isolated = entry
+        if isolated and self.isolate:
+            return IsolatedLoader(target, self._get_worker())
+        loader = self._instances.get(target)
+        if loader is None:
+            loader = self._instances[target] = load_target(target)()
+        return loader
+
+    def close(self) -> None:
+        """Stop the worker process, if one was started."""
+        if self._worker is not None:
+            self._worker.close()
+            self._worker = None
+
+    def _get_worker(self) -> "LoaderWorker":
+        if self._worker is None:
+            from compass.ingest.worker import LoaderWorker
+
+            self._worker = LoaderWorker(self.timeout, self.memory_mb)
+        return self._worker
+
+    def _discover(self) -> None:
+        """Add entry point plugins; they are isolated and not imported here."""
+        if self._discovered:
+            return
+        self._discovered = True
+        for entry_point in _entry_points():
+            self.register(f".{entry_point.name.lstrip('.')}", entry_point.value)
+
+
+def _entry_points() -> List[Any]:
+    from importlib.metadata import entry_points
+
+    found = entry_points()
+    if hasattr(found, "select"):
+        return list(found.select(group=ENTRY_POINT_GROUP))
+    return list(found.get(ENTRY_POINT_GROUP, []))  # Python 3.9
+
+
+_default: Optional[LoaderRegistry] = None
+
+
 def get_loader(path: Path) -> Optional[DocumentLoader]:
-    """Get appropriate loader for file."""
-    suffix = path.suffix.lower()
-    if suffix == ".md":
-        return MarkdownLoader()
-    elif suffix in [".txt", ".log"]:
-        return TextLoader()
-    return None
+    """Get appropriate loader for file from the default registry."""
+    global _default
+    if _default is None:
+        _default = LoaderRegistry()
+    return _default.get(path)
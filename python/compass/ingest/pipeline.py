@@ -4,31 +4,89 @@ Documents are processed locally and stored in the vault's SQLite database.
 No document content is sent to external services during ingestion.
 """
 
+import hashlib
+import json
+import os
+import sqlite3
+from array import array
 from pathlib import Path
-from typing import List, Dict, Any
-from compass.ingest.loaders import get_loader
-from compass.ingest.chunking import SimpleChunker
+from typing import Iterable, List, Dict, Any, Optional, cast
+from compass.ingest.loaders import LoaderError, LoaderRegistry
+from compass.ingest.chunking import Chunker, SimpleChunker
+from compass.ingest.dedupe import Deduplicator, signature, store_signature
+from compass.db.storage import compress
+from compass.rag.embed import Embedder
+from compass.rag.retrieve import document_vector
+from compass.tracing import span
 
 
 class IngestionPipeline:
     """Orchestrates document ingestion.
-    
+
     Processes documents locally and stores them in the vault database.
     All document content remains on the local filesystem.
     """
 
-    def __init__(self):
-        """Initialize pipeline."""
-        self.chunker = SimpleChunker()
+    def __init__(
+        self,
+        chunker: Optional[Chunker] = None,
+        embedder: Optional[Embedder] = None,
+        storage: str = "inline",
+        codec: str = "zlib",
+        dedupe: Optional[Deduplicator] = None,
+        loaders: Optional[LoaderRegistry] = None,
+        exclude: Optional[List[Path]] = None,
+    ):
+        """Initialize pipeline.
+
+        Args:
+            chunker: Chunker for document text
+            embedder: Embedder for chunks. Chunks are stored without
+                      embeddings when no embedder is given.
+            storage: "inline" stores document and chunk text as is;
+                     "compressed" stores the document once, compressed with
+                     `codec`, and chunks as offsets into it
+            codec: Compression codec for compressed storage (zlib, lzma, zstd)
+            dedupe: Near-duplicate detection. Signatures are not recorded
+                    without it
+            loaders: Loaders by file suffix. Defaults to the built-in and
+                     installed plugin loaders with default limits
+            exclude: Directories whose files are not ingested as text, such
+                     as the vault's metrics (see compass.metrics)
+        """
+        if storage not in ("inline", "compressed"):
+            raise ValueError(f"Unknown storage mode: {storage}")
+        self.chunker = chunker or SimpleChunker()
+        self.embedder = embedder
+        self.storage = storage
+        self.codec = codec
+        self.dedupe = dedupe
+        self.loaders = loaders or LoaderRegistry()
+        self.exclude = [p.resolve() for p in exclude or []]
 
     def process_file(self, path: Path) -> Dict[str, Any]:
-        """Process a single file."""
-        loader = get_loader(path)
+        """Process a single file.
+
+        Returns:
+            The document and its chunks, or an `error` (with `failed` set
+            when a loader exists but could not load the file)
+        """
+        loader = self.loaders.get(path)
         if loader is None:
             return {"error": f"No loader for {path.suffix}"}
 
-        doc = loader.load(path)
-        chunks = self.chunker.chunk(doc["content"])
+        with span("ingest.load"):
+            try:
+                doc = loader.load(path)
+            except LoaderError as e:
+                return {"error": str(e), "failed": True}
+            except Exception as e:
+                # In-process loaders fail like isolated ones: for this file only,
+                # e.g. when it was deleted mid-ingest or could not be decoded
+                return {"error": f"{path.name}: {type(e).__name__}: {e}", "failed": True}
+        with span("ingest.chunk") as s:
+            chunks = self.chunker.chunk(doc["content"])
+            s.set(count=len(chunks))
 
         return {
             "document": doc,
@@ -36,11 +94,283 @@ class IngestionPipeline:
             "path": str(path),
         }
 
+    def walk(self, path: Path) -> List[Path]:
+        """List the files to ingest under a path."""
+        if path.is_file():
+            return [] if self._excluded(path) else [path]
+        with span("ingest.walk") as s:
+            files = [
+                p
+                for p in path.rglob("*")
+                if p.is_file() and ".compass" not in p.parts and not self._excluded(p)
+            ]
+            s.set(count=len(files))
+        return files
+
+    def _excluded(self, path: Path) -> bool:
+        if not self.exclude:
+            return False
+        resolved = path.resolve()
+        return any(resolved.is_relative_to(directory) for directory in self.exclude)
+
     def process_directory(self, path: Path) -> List[Dict[str, Any]]:
         """Process all files in directory."""
         results = []
-        for file_path in path.rglob("*"):
-            if file_path.is_file():
-                result = self.process_file(file_path)
-                results.append(result)
+        for file_path in self.walk(path):
+            result = self.process_file(file_path)
+            results.append(result)
         return results
+
+    def ingest(self, path: Path, conn: sqlite3.Connection) -> Dict[str, int]:
+        """Process a file or directory and store the results.
+
+        Unchanged documents (same content hash) are skipped.
+
+        Returns:
+            Counts of stored and unchanged files, files skipped for lack of
+            a loader, files whose loader failed, near-duplicates (flagged or
+            skipped) and stored chunks
+        """
+        stats = {
+            "stored": 0,
+            "unchanged": 0,
+            "skipped": 0,
+            "failed": 0,
+            "duplicates": 0,
+            "chunks": 0,
+        }
+        for file_path in self.walk(path):
+            result = self.process_file(file_path)
+            if "error" in result:
+                stats["failed" if result.get("failed") else "skipped"] += 1
+                continue
+            item = self._prepare(result, conn)
+            if item is None:
+                stats["unchanged"] += 1
+                continue
+            stats["duplicates"] += item["duplicate_of"] is not None
+            if item["skip"]:
+                continue
+            with span("ingest.db_write") as s, conn:
+                stored = self._write(item, conn)
+                s.set(count=stored)
+            stats["stored"] += 1
+            stats["chunks"] += stored
+        return stats
+
+    def store(self, result: Dict[str, Any], conn: sqlite3.Connection) -> Optional[int]:
+        """Store a processed file and its chunks in the vault database.
+
+        Returns:
+            Number of chunks stored, or None if the document is unchanged
+            or skipped as a near-duplicate
+        """
+        prepared = self._prepare(result, conn)
+        if prepared is None or prepared["skip"]:
+            return None
+        with span("ingest.db_write") as s, conn:
+            stored = self._write(prepared, conn)
+            s.set(count=stored)
+        return stored
+
+    def update(self, paths: Iterable[Path], conn: sqlite3.Connection) -> Dict[str, int]:
+        """Re-index specific files, as reported by a watcher.
+
+        Existing paths are ingested (directories are walked) and missing
+        ones are removed along with anything stored beneath them. Files
+        are loaded and embedded first; all writes then commit in one
+        transaction.
+
+        Returns:
+            Counts of stored, unchanged, skipped, failed and removed files,
+            near-duplicates and stored chunks
+        """
+        stats = {
+            "stored": 0,
+            "unchanged": 0,
+            "skipped": 0,
+            "failed": 0,
+            "removed": 0,
+            "duplicates": 0,
+            "chunks": 0,
+        }
+        prepared: List[Dict[str, Any]] = []
+        removed: List[str] = []
+        for path in paths:
+            if not path.exists():
+                removed.append(str(path))
+                continue
+            if path.is_dir():
+                # After a watcher overflow only the root is reported: find deletions too
+                removed.extend(self._vanished(path, conn))
+            for file_path in self.walk(path):
+                result = self.process_file(file_path)
+                if "error" in result:
+                    stats["failed" if result.get("failed") else "skipped"] += 1
+                    continue
+                item = self._prepare(result, conn)
+                if item is None:
+                    stats["unchanged"] += 1
+                    continue
+                stats["duplicates"] += item["duplicate_of"] is not None
+                if not item["skip"]:
+                    prepared.append(item)
+        if not prepared and not removed:
+            return stats
+        with span("ingest.db_write") as s, conn:
+            for item in prepared:
+                stats["chunks"] += self._write(item, conn)
+                stats["stored"] += 1
+            for stale in removed:
+                stats["removed"] += self._remove(stale, conn)
+            s.set(count=stats["stored"] + stats["removed"])
+        return stats
+
+    def close(self) -> None:
+        """Stop the loader worker process, if one was started."""
+        self.loaders.close()
+
+    def _vanished(self, directory: Path, conn: sqlite3.Connection) -> List[str]:
+        """Stored documents under a directory whose files no longer exist."""
+        prefix = str(directory).rstrip("/") + "/"
+        rows = conn.execute(
+            "SELECT path FROM documents WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+        )
+        return [path for (path,) in rows if not os.path.exists(path)]
+
+    def _prepare(
+        self, result: Dict[str, Any], conn: sqlite3.Connection
+    ) -> Optional[Dict[str, Any]]:
+        """Hash, dedupe, embed and encode a processed file; None if it is unchanged.
+
+        A near-duplicate is marked `skip` (and not embedded) when dedupe is
+        set to skip and the path is new; a path already in the vault is
+        flagged instead, so its old version does not linger.
+        """
+        doc = result["document"]
+        content_hash = hashlib.sha256(doc["content"].encode("utf-8")).hexdigest()
+        row = conn.execute(
+            "SELECT id, hash FROM documents WHERE path = ?", (result["path"],)
+        ).fetchone()
+        if row is not None and row[1] == content_hash:
+            return None
+
+        sig, duplicate_of = None, None
+        if self.dedupe is not None:
+            with span("ingest.dedupe"):
+                sig = signature(doc["content"])
+                match = self.dedupe.find(conn, sig, result["path"]) if sig is not None else None
+            duplicate_of = match[0] if match is not None else None
+            if duplicate_of is not None and self.dedupe.action == "skip" and row is None:
+                return {"path": result["path"], "duplicate_of": duplicate_of, "skip": True}
+
+        embeddings: List[Optional[bytes]] = [None] * len(result["chunks"])
+        if self.embedder is not None and result["chunks"]:
+            with span("ingest.embed") as s:
+                vectors = self.embedder.embed_batch([c["content"] for c in result["chunks"]])
+                embeddings = [array("f", v).tobytes() for v in vectors]
+                s.set(count=len(vectors))
+
+        if self.storage == "compressed":
+            content, blob, codec = None, compress(doc["content"], self.codec), self.codec
+        else:
+            content, blob, codec = doc["content"], None, None
+        return {
+            "path": result["path"],
+            "chunks": result["chunks"],
+            "embeddings": embeddings,
+            "content": content,
+            "blob": blob,
+            "codec": codec,
+            "metadata": json.dumps(doc["metadata"]),
+            "hash": content_hash,
+            "minhash": sig,
+            "duplicate_of": duplicate_of,
+            "skip": False,
+        }
+
+    def _write(self, item: Dict[str, Any], conn: sqlite3.Connection) -> int:
+        """Write a prepared document inside the caller's transaction."""
+        values = (
+            item["content"],
+            item["blob"],
+            item["codec"],
+            item["metadata"],
+            item["hash"],
+            item["duplicate_of"],
+            document_vector(item["embeddings"]),
+        )
+        # Looked up again: the row may have changed since _prepare()
+        row = conn.execute("SELECT id FROM documents WHERE path = ?", (item["path"],)).fetchone()
+        if row is None:
+            document_id = cast(
+                int,
+                conn.execute(
+                    "INSERT INTO documents (path, content, content_blob, codec, metadata, hash, "
+                    "duplicate_of, centroid) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (item["path"], *values),
+                ).lastrowid,
+            )
+        else:
+            document_id = row[0]
+            conn.execute(
+                "UPDATE documents SET content = ?, content_blob = ?, codec = ?, metadata = ?, "
+                "hash = ?, duplicate_of = ?, centroid = ?, updated_at = CURRENT_TIMESTAMP "
+                "WHERE id = ?",
+                (*values, document_id),
+            )
+            conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+        store_signature(conn, document_id, item["minhash"])
+        if row is not None:
+            self._recheck_duplicates(document_id, conn)
+        compressed = item["blob"] is not None
+        conn.executemany(
+            "INSERT INTO chunks (document_id, content, embedding, position, metadata, "
+            "start_offset, end_offset) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    document_id,
+                    "" if compressed else chunk["content"],
+                    embedding,
+                    chunk["position"],
+                    json.dumps({"start": chunk["start"], "end": chunk["end"]}),
+                    chunk["start"],
+                    chunk["end"],
+                )
+                for chunk, embedding in zip(item["chunks"], item["embeddings"])
+            ],
+        )
+        return len(item["chunks"])
+
+    def _recheck_duplicates(self, document_id: int, conn: sqlite3.Connection) -> None:
+        """Match the near-duplicates of a changed document again.
+
+        Documents flagged against the old content would otherwise stay
+        hidden from retrieval even if they no longer resemble it.
+        """
+        rows = conn.execute(
+            "SELECT id, path, minhash FROM documents WHERE duplicate_of = ? ORDER BY id",
+            (document_id,),
+        ).fetchall()
+        # Oldest first, so the oldest former copy becomes the original of the rest
+        for other_id, other_path, blob in rows:
+            match = None
+            if self.dedupe is not None and blob is not None:
+                match = self.dedupe.find(conn, array("Q", blob), other_path)
+            conn.execute(
+                "UPDATE documents SET duplicate_of = ? WHERE id = ?",
+                (match[0] if match is not None else None, other_id),
+            )
+
+    def _remove(self, path: str, conn: sqlite3.Connection) -> int:
+        """Delete a document, or every document under a directory, with their chunks."""
+        prefix = path.rstrip("/") + "/"
+        where = "path = ? OR substr(path, 1, ?) = ?"
+        params = (path, len(prefix), prefix)
+        for table in ("chunks", "minhash_buckets"):
+            conn.execute(
+                f"DELETE FROM {table} WHERE document_id IN "
+                f"(SELECT id FROM documents WHERE {where})",
+                params,
+            )
+        return conn.execute(f"DELETE FROM documents WHERE {where}", params).rowcount
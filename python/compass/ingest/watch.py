@@ -0,0 +1,308 @@
+"""Watch a vault and re-index changed files incrementally.
+
+On Linux, changes are reported by inotify (through ctypes, with no extra
+dependency); elsewhere, or when inotify is unavailable, the tree is polled
+for modification times. Bursts of events, such as an editor's save
+sequence, are debounced and coalesced per file. Only the changed paths go
+through the ingestion pipeline, so files are read from and written to the
+local vault as usual.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# inotify event masks, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT = struct.Struct("iIII")
+
+
+def is_ignored(path: Path, root: Path) -> bool:
+    """Skip hidden paths (including .compass) and editor backup files."""
+    try:
+        parts = path.relative_to(root).parts
+    except ValueError:
+        return True
+    return any(part.startswith(".") for part in parts) or path.name.endswith("~")
+
+
+class Watcher:
+    """Reports paths under a root that changed since the last read."""
+
+    def __init__(self, root: Path):
+        """Initialize watcher.
+
+        Args:
+            root: Directory to watch recursively
+        """
+        self.root = root
+
+    def read(self, timeout: float) -> List[Path]:
+        """Wait up to `timeout` seconds and return changed paths.
+
+        Paths may be files or directories, and may no longer exist.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release watcher resources."""
+
+
+class PollingWatcher(Watcher):
+    """Detects changes by comparing modification times on each read."""
+
+    def __init__(self, root: Path, interval: float = 1.0):
+        """Initialize watcher.
+
+        Args:
+            root: Directory to watch recursively
+            interval: Minimum seconds between scans
+        """
+        super().__init__(root)
+        self.interval = interval
+        self._stamps = self._scan()
+        self._scanned = time.monotonic()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        stamps = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                path = Path(dirpath, name)
+                if is_ignored(path, self.root):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                stamps[path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def read(self, timeout: float) -> List[Path]:
+        """Wait up to `timeout` seconds, then rescan if the interval has passed."""
+        wait = min(timeout, self.interval - (time.monotonic() - self._scanned))
+        if wait > 0:
+            time.sleep(wait)
+        if time.monotonic() - self._scanned < self.interval:
+            return []
+        stamps = self._scan()
+        self._scanned = time.monotonic()
+        changed = [p for p, stamp in stamps.items() if self._stamps.get(p) != stamp]
+        changed.extend(p for p in self._stamps if p not in stamps)
+        self._stamps = stamps
+        return changed
+
+
+class InotifyWatcher(Watcher):
+    """Linux inotify watcher with one watch per directory."""
+
+    def __init__(self, root: Path):
+        """Initialize watcher.
+
+        Raises:
+            OSError: If inotify is not available
+        """
+        super().__init__(root)
+        libc = _libc()
+        if libc is None:
+            raise OSError("inotify is not available")
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        self._add_tree(root)
+
+    def _add_tree(self, top: Path) -> None:
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), _WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = Path(dirpath)
+
+    def read(self, timeout: float) -> List[Path]:
+        """Wait up to `timeout` seconds for events and return their paths."""
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        changed: List[Path] = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size : offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; re-check the whole tree (unchanged files are cheap)
+                changed.append(self.root)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            if is_ignored(path, self.root):
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_tree(path)
+            elif mask & IN_CREATE:
+                # The file's IN_CLOSE_WRITE follows once it has been written
+                continue
+            changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        """Close the inotify descriptor."""
+        os.close(self._fd)
+
+
+def _libc() -> Optional[ctypes.CDLL]:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 - raises AttributeError on libcs without inotify
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def create_watcher(root: Path, polling: bool = False, interval: float = 1.0) -> Watcher:
+    """Create an inotify watcher, falling back to polling where it is unavailable.
+
+    Args:
+        root: Directory to watch recursively
+        polling: Always poll, e.g. for network filesystems inotify cannot see
+        interval: Seconds between scans when polling
+    """
+    if not polling:
+        try:
+            return InotifyWatcher(root)
+        except OSError:
+            pass
+    return PollingWatcher(root, interval)
+
+
+class Debouncer:
+    """Coalesces events per path until the path has been quiet for a while."""
+
+    def __init__(self, delay: float = 0.5, max_delay: Optional[float] = None):
+        """Initialize debouncer.
+
+        Args:
+            delay: Seconds a path must go without events before it is ready
+            max_delay: Upper bound on how long a constantly changing path is
+                       held back. Defaults to ten times `delay`
+        """
+        self.delay = delay
+        self.max_delay = max_delay if max_delay is not None else delay * 10
+        self._pending: Dict[Path, Tuple[float, float]] = {}
+
+    def add(self, paths: List[Path], now: float) -> None:
+        """Record events for paths at time `now`."""
+        for path in paths:
+            first = self._pending.get(path, (now, now))[0]
+            self._pending[path] = (first, now)
+
+    def ready(self, now: float) -> List[Path]:
+        """Remove and return the paths that are ready to re-index."""
+        ready = [
+            path
+            for path, (first, last) in self._pending.items()
+            if now - last >= self.delay or now - first >= self.max_delay
+        ]
+        for path in ready:
+            del self._pending[path]
+        return ready
+
+    def defer(self, paths: List[Path], until: float) -> None:
+        """Hold paths back until `until`, e.g. to retry a failed update."""
+        for path in paths:
+            self._pending[path] = (until - self.delay, until - self.delay)
+
+    def timeout(self, now: float, idle: float = 1.0) -> float:
+        """Seconds until the next path could become ready, or `idle`."""
+        if not self._pending:
+            return idle
+        return max(
+            0.0,
+            min(
+                min(last + self.delay, first + self.max_delay) - now
+                for first, last in self._pending.values()
+            ),
+        )
+
+
+def watch(
+    watcher: Watcher,
+    update: Callable[[List[Path]], Dict[str, int]],
+    debounce: float = 0.5,
+    stop: Optional[threading.Event] = None,
+    on_batch: Optional[Callable[[List[Path], Dict[str, int]], None]] = None,
+    on_error: Optional[Callable[[List[Path], Exception, float], None]] = None,
+    max_backoff: float = 60.0,
+) -> None:
+    """Feed debounced changes from a watcher into `update` until stopped.
+
+    A batch whose update raises (say, the database is locked by a running
+    `compass ingest`, or the embedder is unreachable) is retried after a
+    backoff that doubles with each consecutive failure.
+
+    Args:
+        watcher: Source of changed paths
+        update: Re-indexes a batch of paths, e.g. IngestionPipeline.update
+        debounce: Quiet period per path before it is re-indexed
+        stop: Event that ends the loop. Runs until interrupted if omitted
+        on_batch: Called with each batch and its stats
+        on_error: Called with a failed batch, the error and the retry delay
+        max_backoff: Longest wait in seconds before retrying a failed batch
+    """
+    stop = stop or threading.Event()
+    debouncer = Debouncer(debounce)
+    failures = 0
+    while not stop.is_set():
+        changed = watcher.read(debouncer.timeout(time.monotonic(), idle=0.5))
+        now = time.monotonic()
+        debouncer.add(changed, now)
+        batch = _collapse(debouncer.ready(now))
+        if not batch:
+            continue
+        try:
+            stats = update(batch)
+        except Exception as e:
+            failures += 1
+            delay = min(max_backoff, max(debounce, 0.5) * 2 ** (failures - 1))
+            debouncer.defer(batch, time.monotonic() + delay)
+            if on_error is not None:
+                on_error(batch, e, delay)
+            continue
+        failures = 0
+        if on_batch is not None:
+            on_batch(batch, stats)
+
+
+def _collapse(paths: List[Path]) -> List[Path]:
+    """Drop paths inside a directory that is itself in the batch."""
+    dirs: Set[Path] = {p for p in paths if p.is_dir() or not p.exists()}
+    return sorted(p for p in paths if not any(d in p.parents for d in dirs))
@@ -0,0 +1,164 @@
+"""Run document loaders in an isolated worker process.
+
+Parsers for formats such as PDF are large, third-party and occasionally
+hang or exhaust memory on malformed files. They run in a child process
+with an address-space limit, and each file has a timeout; a worker that
+times out or dies is replaced, so one bad file only fails itself. The
+worker reads files from the local filesystem and talks to its parent over
+pipes; nothing leaves the machine.
+
+The protocol is newline-delimited JSON: the parent writes
+`{"id": 1, "loader": "module:Class", "path": "..."}` and the worker
+answers `{"id": 1, "ok": true, "document": {...}}` or
+`{"id": 1, "ok": false, "error": "..."}`. Replies go out on a private
+copy of the worker's original stdout; file descriptor 1 is pointed at
+stderr first, so anything a parser prints cannot corrupt the protocol.
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from itertools import count
+from typing import Any, Dict, Optional
+from compass.ingest.loaders import LoaderError, load_target
+
+
+class LoaderWorker:
+    """A long-lived worker process that loads one file at a time."""
+
+    def __init__(self, timeout: float = 30.0, memory_mb: int = 1024):
+        """Initialize worker; the process starts with the first file.
+
+        Args:
+            timeout: Seconds allowed per file
+            memory_mb: Address-space limit of the worker process. 0 for none
+        """
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self._proc: Optional[subprocess.Popen] = None
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._ids = count(1)
+
+    def load(self, target: str, path: Path) -> Dict[str, Any]:
+        """Load `path` with the loader class `target` in the worker.
+
+        Raises:
+            LoaderError: If the loader fails, runs out of time or memory, or
+                         the worker dies
+        """
+        proc = self._start()
+        request_id = next(self._ids)
+        request = {"id": request_id, "loader": target, "path": str(path)}
+        try:
+            if proc.stdin is None:
+                raise OSError("no stdin")
+            proc.stdin.write(json.dumps(request) + "\n")
+            proc.stdin.flush()
+        except OSError:
+            self.close()
+            raise LoaderError(f"{path.name}: loader worker exited")
+        try:
+            line = self._lines.get(timeout=self.timeout)
+        except queue.Empty:
+            self.close()
+            raise LoaderError(f"{path.name}: timed out after {self.timeout:g}s")
+        if line is None:
+            self.close()
+            raise LoaderError(f"{path.name}: loader worker exited (out of memory?)")
+        try:
+            response = json.loads(line)
+            if response["id"] != request_id:
+                raise ValueError(f"reply to request {response['id']}")
+        except (ValueError, TypeError, KeyError) as e:
+            # Out of step with the worker: start a fresh one for the next file
+            self.close()
+            raise LoaderError(f"{path.name}: bad reply from loader worker ({e})")
+        if not response["ok"]:
+            raise LoaderError(f"{path.name}: {response['error']}")
+        document: Dict[str, Any] = response["document"]
+        return document
+
+    def close(self) -> None:
+        """Stop the worker process."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        proc.kill()
+        proc.wait()
+        if proc.stdin is not None:
+            proc.stdin.close()
+
+    def _start(self) -> subprocess.Popen:
+        if self._proc is not None and self._proc.poll() is None:
+            return self._proc
+        self.close()
+        env = dict(os.environ)
+        # The worker imports loaders from wherever this process can
+        env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+        self._proc = subprocess.Popen(
+            [sys.executable, "-m", "compass.ingest.worker", str(self.memory_mb)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=env,
+        )
+        # Responses are read on a thread so the wait can time out on any platform
+        self._lines = queue.Queue()
+        threading.Thread(target=_pump, args=(self._proc.stdout, self._lines), daemon=True).start()
+        return self._proc
+
+
+def _pump(stream: Any, lines: "queue.Queue[Optional[str]]") -> None:
+    with stream:
+        for line in stream:
+            lines.put(line)
+    lines.put(None)
+
+
+def _limit_memory(memory_mb: int) -> None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    limit = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def main() -> None:
+    """Serve load requests from stdin until it closes."""
+    # Keep the real stdout for replies and send everything else to stderr
+    replies = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    memory_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    if memory_mb:
+        _limit_memory(memory_mb)
+    loaders: Dict[str, Any] = {}
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            loader = loaders.get(request["loader"])
+            if loader is None:
+                loader = loaders[request["loader"]] = load_target(request["loader"])()
+            response = {"ok": True, "document": loader.load(Path(request["path"]))}
+        except MemoryError:
+            response = {"ok": False, "error": "out of memory"}
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        try:
+            reply = json.dumps(dict(response, id=request["id"]))
+        except (TypeError, ValueError) as e:
+            reply = json.dumps(
+                {"id": request["id"], "ok": False, "error": f"loader returned non-JSON data: {e}"}
+            )
+        replies.write(reply + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    main()
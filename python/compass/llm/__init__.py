@@ -1,3 +1,3 @@
 """LLM provider interfaces."""
 
-__all__ = ["base", "api_openai", "api_anthropic", "api_google", "local_ollama"]
+__all__ = ["base", "api_openai", "api_anthropic", "api_google", "local_ollama", "cache", "factory"]
@@ -0,0 +1,326 @@
+"""Response cache for LLM completions.
+
+Cached responses are stored locally in a SQLite file under the Compass
+cache directory. A cache hit returns the stored completion without
+calling the provider, so repeated prompts (scheduled `compass exec` jobs,
+slash commands) cost nothing after the first run.
+
+The cache has two tiers:
+
+- Exact: keyed by provider, model, temperature and the other generation
+  options (such as max_tokens), messages and a hash of the retrieved
+  context.
+- Semantic (optional): matches the final user message by embedding
+  similarity within the same provider/model/context scope.
+"""
+
+import hashlib
+import json
+import math
+import sqlite3
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from compass.llm.base import LLMProvider, Message
+from compass.paths import ensure_dir, get_cache_dir
+from compass.rag.embed import Embedder
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    response TEXT NOT NULL,
+    embedding BLOB,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_responses_scope ON responses(scope);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses(accessed_at);
+"""
+
+
+def _digest(payload: Any) -> str:
+    """Return a stable SHA-256 digest of a JSON-serializable payload."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode(
+        "utf-8"
+    )
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def hash_context(chunks: Iterable[Dict[str, Any]]) -> str:
+    """Hash retrieved context chunks for use in a cache key."""
+    return _digest(
+        [
+            [chunk.get("content", ""), chunk.get("metadata", {}).get("source", "")]
+            for chunk in chunks
+        ]
+    )
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    """Cosine similarity between two vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """Two-tier (exact + semantic) cache for LLM responses.
+
+    Entries expire after `ttl_seconds`; once the cache holds more than
+    `max_entries` entries or `max_bytes` of response text, the least
+    recently used entries are evicted.
+    """
+
+    def __init__(
+        self,
+        cache_path: Optional[Path] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 1000,
+        max_bytes: int = 50 * 1024 * 1024,
+        embedder: Optional[Embedder] = None,
+        similarity_threshold: float = 0.95,
+    ):
+        """Initialize response cache.
+
+        Args:
+            cache_path: SQLite file for the cache. Defaults to
+                        get_cache_dir()/llm/responses.db
+            ttl_seconds: Lifetime of an entry in seconds
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses
+            embedder: Embedder for the semantic tier. The semantic tier is
+                      disabled when no embedder is given.
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+        """
+        if cache_path is None:
+            cache_path = ensure_dir(get_cache_dir() / "llm") / "responses.db"
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazily open the cache database."""
+        if self._conn is None:
+            ensure_dir(self.cache_path.parent)
+            self._conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self._conn.executescript(CACHE_SCHEMA)
+        return self._conn
+
+    def close(self) -> None:
+        """Close the cache database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: str,
+        temperature: float,
+        messages: List[Message],
+        context_hash: str = "",
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Build the exact-tier key for a request.
+
+        `options` are the other generation kwargs (such as max_tokens).
+        """
+        return _digest(
+            [
+                provider,
+                model,
+                temperature,
+                [m.to_dict() for m in messages],
+                context_hash,
+                options or {},
+            ]
+        )
+
+    @staticmethod
+    def make_scope(
+        provider: str,
+        model: str,
+        temperature: float,
+        messages: List[Message],
+        context_hash: str = "",
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Build the semantic-tier scope for a request.
+
+        The scope covers everything except the final message, which is the
+        query compared by embedding similarity.
+        """
+        return _digest(
+            [
+                provider,
+                model,
+                temperature,
+                [m.to_dict() for m in messages[:-1]],
+                context_hash,
+                options or {},
+            ]
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up an exact-tier entry."""
+        row = self.conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or self._expired(row[1]):
+            return None
+        self._touch(key)
+        response: str = row[0]
+        return response
+
+    def get_similar(self, scope: str, query: str) -> Optional[str]:
+        """Look up the most similar semantic-tier entry in a scope."""
+        if self.embedder is None:
+            return None
+        query_embedding = self.embedder.embed(query)
+        best_key, best_response, best_score = None, None, self.similarity_threshold
+        rows = self.conn.execute(
+            "SELECT key, response, embedding, created_at FROM responses "
+            "WHERE scope = ? AND embedding IS NOT NULL",
+            (scope,),
+        )
+        for key, response, blob, created_at in rows:
+            if self._expired(created_at):
+                continue
+            score = _cosine(query_embedding, array("f", blob).tolist())
+            if score >= best_score:
+                best_key, best_response, best_score = key, response, score
+        if best_key is not None:
+            self._touch(best_key)
+        return best_response
+
+    def lookup(self, key: str, scope: str, query: str) -> Optional[str]:
+        """Look up a response in the exact tier, then the semantic tier."""
+        response = self.get(key)
+        if response is None:
+            response = self.get_similar(scope, query)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, key: str, scope: str, query: str, response: str) -> None:
+        """Store a response and evict entries over the size limits."""
+        embedding = None
+        if self.embedder is not None:
+            embedding = array("f", self.embedder.embed(query)).tobytes()
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses "
+            "(key, scope, response, embedding, size, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, scope, response, embedding, len(response.encode("utf-8")), now, now),
+        )
+        self.evict()
+        self.conn.commit()
+
+    def evict(self) -> int:
+        """Remove expired entries, then least recently used ones over the limits.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = self.conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+        ).rowcount
+        count, total = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return removed
+
+        stale = []
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        return removed + len(stale)
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        self.conn.execute("DELETE FROM responses")
+        self.conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit statistics."""
+        count, total = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def _expired(self, created_at: float) -> bool:
+        return time.time() - created_at > self.ttl_seconds
+
+    def _touch(self, key: str) -> None:
+        self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self.conn.commit()
+
+
+class CachedProvider(LLMProvider):
+    """LLM provider wrapper that serves repeated requests from a ResponseCache.
+
+    Pass `context_hash=hash_context(chunks)` to `complete` or `stream` so
+    that the same prompt over different retrieved context is not confused.
+    """
+
+    def __init__(self, provider: LLMProvider, cache: ResponseCache, provider_name: str):
+        """Wrap a provider with a response cache."""
+        super().__init__(provider.model, provider.temperature, provider.max_tokens)
+        self.provider = provider
+        self.cache = cache
+        self.provider_name = provider_name
+
+    def _keys(self, messages: List[Message], kwargs: Dict[str, Any]):
+        context_hash = kwargs.pop("context_hash", "")
+        temperature = kwargs.get("temperature", self.temperature)
+        # Every other generation kwarg can change the response, e.g. a lower max_tokens
+        options = {"max_tokens": self.max_tokens, **kwargs}
+        options.pop("temperature", None)
+        args = (self.provider_name, self.model, temperature, messages, context_hash, options)
+        query = messages[-1].content if messages else ""
+        return ResponseCache.make_key(*args), ResponseCache.make_scope(*args), query
+
+    def complete(self, messages: List[Message], **kwargs) -> str:
+        """Generate completion, returning a cached response when available."""
+        key, scope, query = self._keys(messages, kwargs)
+        cached = self.cache.lookup(key, scope, query)
+        if cached is not None:
+            return cached
+        response = self.provider.complete(messages, **kwargs)
+        self.cache.put(key, scope, query, response)
+        return response
+
+    def stream(self, messages: List[Message], **kwargs):
+        """Generate streaming completion, replaying cached responses in one piece."""
+        key, scope, query = self._keys(messages, kwargs)
+        cached = self.cache.lookup(key, scope, query)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        for part in self.provider.stream(messages, **kwargs):
+            parts.append(part)
+            yield part
+        self.cache.put(key, scope, query, "".join(parts))
@@ -0,0 +1,57 @@
+"""Provider construction from configuration."""
+
+from typing import Dict, Type
+
+from compass.config import Config
+from compass.llm.api_anthropic import AnthropicProvider
+from compass.llm.api_google import GoogleProvider
+from compass.llm.api_openai import OpenAIProvider
+from compass.llm.base import LLMProvider
+from compass.llm.cache import CachedProvider, ResponseCache
+from compass.llm.local_ollama import OllamaProvider
+
+PROVIDERS: Dict[str, Type[LLMProvider]] = {
+    "openai": OpenAIProvider,
+    "anthropic": AnthropicProvider,
+    "google": GoogleProvider,
+    "ollama": OllamaProvider,
+}
+
+
+def create_provider(cfg: Config, use_cache: bool = True) -> LLMProvider:
+    """Create the configured LLM provider.
+
+    Args:
+        cfg: Compass configuration
+        use_cache: Wrap the provider in the response cache when
+                   `cache.enabled` is set. Pass False for --no-cache.
+
+    Returns:
+        LLM provider instance
+    """
+    name = cfg.get("llm.provider", "openai")
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {name}")
+
+    provider = PROVIDERS[name](
+        model=cfg.get("llm.model", "gpt-4"),
+        temperature=cfg.get("llm.temperature", 0.7),
+        max_tokens=cfg.get("llm.max_tokens", 2000),
+    )
+    if not use_cache or not cfg.get("cache.enabled", True):
+        return provider
+
+    embedder = None
+    if cfg.get("cache.semantic", False):
+        from compass.rag.embed import create_embedder
+
+        embedder = create_embedder(cfg)
+
+    cache = ResponseCache(
+        ttl_seconds=cfg.get("cache.ttl_seconds", 7 * 24 * 3600),
+        max_entries=cfg.get("cache.max_entries", 1000),
+        max_bytes=cfg.get("cache.max_bytes", 50 * 1024 * 1024),
+        embedder=embedder,
+        similarity_threshold=cfg.get("cache.similarity_threshold", 0.95),
+    )
+    return CachedProvider(provider, cache, name)
@@ -5,36 +5,85 @@ external services or analytics platforms. Logs remain on the user's
 local filesystem only.
 """
 
+import atexit
 import json
-from datetime import datetime
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from compass.paths import get_state_dir, ensure_dir
 
 
 class RunLogger:
     """Logger for command execution history.
-    
+
     Logs are written to local JSONL files. All logging is local-only -
     no telemetry or analytics are sent to external services.
+
+    `log` only enqueues the event; a background thread writes events in
+    batches and is flushed at exit. The active file is rotated when it
+    exceeds `max_bytes` or the day changes, and rotated segments are
+    gzip-compressed (`runs-<timestamp>.jsonl.gz`), keeping at most
+    `backup_count` of them. Several processes (such as `compass serve`
+    and the CLI) may share a log: each batch is written under a lock
+    file, and a writer reopens the log when another process rotated it.
     """
 
-    def __init__(self, log_file: Optional[Path] = None):
-        """Initialize run logger."""
+    def __init__(
+        self,
+        log_file: Optional[Path] = None,
+        max_bytes: int = 10 * 1024 * 1024,
+        rotate_daily: bool = True,
+        backup_count: int = 30,
+        max_queue: int = 100_000,
+        batch_size: int = 1000,
+    ):
+        """Initialize run logger.
+
+        Args:
+            log_file: Active log file. Defaults to get_state_dir()/logs/runs.jsonl
+            max_bytes: Rotate the active file once it grows past this size
+            rotate_daily: Also rotate when the day changes
+            backup_count: Number of compressed segments to keep
+            max_queue: Events buffered before new events are dropped
+            batch_size: Maximum events written per batch
+        """
         if log_file is None:
             log_dir = ensure_dir(get_state_dir() / "logs")
             log_file = log_dir / "runs.jsonl"
         self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.rotate_daily = rotate_daily
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._file: Any = None
+        self._lock_file: Any = None
 
     def log(self, event_type: str, data: Dict[str, Any]) -> None:
-        """Log an event."""
+        """Log an event.
+
+        Never blocks: if the buffer is full the event is dropped and
+        counted in `dropped`, as is an event whose data cannot be
+        serialized to JSON.
+        """
         entry = {
             "timestamp": datetime.now().isoformat(),
             "type": event_type,
             "data": data,
         }
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
 
     def log_command(self, command: str, args: Dict[str, Any]) -> None:
         """Log a command execution."""
@@ -47,3 +96,171 @@ class RunLogger:
     def log_completion(self, command: str, duration_ms: float) -> None:
         """Log command completion."""
         self.log("completion", {"command": command, "duration_ms": duration_ms})
+
+    def flush(self) -> None:
+        """Block until all logged events are written."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        """Flush outstanding events and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def segments(self) -> List[Path]:
+        """List log files oldest first: rotated segments, then the active file."""
+        stem = self.log_file.name.split(".")[0]
+        files = sorted(self.log_file.parent.glob(f"{stem}-*.jsonl.gz"))
+        if self.log_file.exists():
+            files.append(self.log_file)
+        return files
+
+    def read(self, since: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over logged events, oldest first.
+
+        Rotated segments whose file was last modified before `since` are
+        skipped without being decompressed.
+        """
+        import gzip
+
+        self.flush()
+        for path in self.segments():
+            if since is not None and datetime.fromtimestamp(path.stat().st_mtime) < since:
+                continue
+            opener = gzip.open if path.suffix == ".gz" else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if since is None or entry["timestamp"] >= since.isoformat():
+                        yield entry
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="compass-run-logger", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            batch: List[str] = []
+            waiters: List[threading.Event] = []
+            stop = False
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    try:
+                        batch.append(json.dumps(item) + "\n")
+                    except (TypeError, ValueError):  # data that is not JSON-serializable
+                        self.dropped += 1
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write("".join(batch))
+                except OSError:
+                    self.dropped += len(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                for f in (self._file, self._lock_file):
+                    if f is not None:
+                        f.close()
+                self._file = self._lock_file = None
+                return
+
+    def _write(self, data: str) -> None:
+        with self._locked():
+            if self._file is None or self._replaced():
+                self._open()
+            stat = os.fstat(self._file.fileno())
+            if stat.st_size > 0 and (
+                stat.st_size + len(data.encode("utf-8")) > self.max_bytes
+                or (self.rotate_daily and date.fromtimestamp(stat.st_mtime) != date.today())
+            ):
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the lock shared by all processes writing this log."""
+        try:
+            import fcntl
+        except ImportError:  # Windows: writers are not coordinated
+            yield
+            return
+        if self._lock_file is None:
+            ensure_dir(self.log_file.parent)
+            self._lock_file = open(self.log_file.with_name(self.log_file.name + ".lock"), "a")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _replaced(self) -> bool:
+        """Whether another process rotated the active file since we opened it."""
+        try:
+            return os.stat(self.log_file).st_ino != os.fstat(self._file.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def _open(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        ensure_dir(self.log_file.parent)
+        self._file = open(self.log_file, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        """Compress the active file into a timestamped segment and start a new one."""
+        import gzip
+        import shutil
+
+        stem = self.log_file.name.split(".")[0]
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        segment = self.log_file.with_name(f"{stem}-{stamp}.jsonl")
+        # Rename rather than delete: no writer is left appending to an unlinked file
+        os.replace(self.log_file, segment)
+        self._open()
+        with open(segment, "rb") as src, gzip.open(f"{segment}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        segment.unlink()
+
+        rotated = sorted(self.log_file.parent.glob(f"{stem}-*.jsonl.gz"))
+        for old in rotated[: max(0, len(rotated) - self.backup_count)]:
+            old.unlink()
+
+
+_default_logger: Optional[RunLogger] = None
+
+
+def get_run_logger() -> RunLogger:
+    """Get the process-wide logger for the default runs.jsonl."""
+    global _default_logger
+    if _default_logger is None:
+        _default_logger = RunLogger()
+    return _default_logger
@@ -0,0 +1,470 @@
+"""Time series metrics from CSV files in the vault.
+
+Each numeric column of a `metrics/*.csv` file becomes a series of typed
+(time, value) rows in the vault database. Every row also carries running
+totals, so the count, sum, mean and standard deviation of any time window
+come from two index lookups, and weekly and monthly rollups are kept up to
+date as rows arrive. Appending rows to a CSV file loads only the new
+rows. Questions such as "average weight over the last 30 days" are
+answered from these aggregates, so raw rows never need to go into a
+prompt. All data stays in the local vault database.
+"""
+
+import calendar
+import csv
+import hashlib
+import io
+import json
+import math
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+AGGREGATES = ("avg", "sum", "count", "min", "max", "stddev", "first", "last", "change")
+PERIODS = ("week", "month")
+TIME_COLUMNS = ("date", "time", "timestamp", "datetime", "day")
+
+_DAY = 86400
+# An unterminated last line is loaded once the file is this old (seconds);
+# until then it may be a row that is still being written
+_SETTLE = 2.0
+
+
+class MetricsError(Exception):
+    """A metric query could not be answered."""
+
+
+def parse_time(value: str) -> int:
+    """Parse an ISO date or datetime to unix seconds.
+
+    Naive times are taken as they are written (wall-clock time), so days
+    and weeks line up with the dates in the file.
+    """
+    parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return calendar.timegm(parsed.timetuple())
+
+
+def format_time(t: int) -> str:
+    """Format unix seconds as an ISO date, or datetime if not at midnight."""
+    moment = datetime(1970, 1, 1) + timedelta(seconds=t)
+    return moment.date().isoformat() if t % _DAY == 0 else moment.isoformat()
+
+
+def now() -> int:
+    """The current wall-clock time in the same scale as parse_time()."""
+    return calendar.timegm(datetime.now().timetuple())
+
+
+def period_start(t: int, period: str) -> int:
+    """Start of the week (Monday) or month containing `t`."""
+    if period == "week":
+        day = t // _DAY
+        return (day - (day + 3) % 7) * _DAY  # 1970-01-01 was a Thursday
+    if period == "month":
+        moment = datetime(1970, 1, 1) + timedelta(seconds=t)
+        return calendar.timegm((moment.year, moment.month, 1, 0, 0, 0))
+    raise ValueError(f"Unknown period: {period}")
+
+
+def _period_end(start: int, period: str) -> int:
+    if period == "week":
+        return start + 7 * _DAY
+    moment = datetime(1970, 1, 1) + timedelta(seconds=start)
+    year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+    return calendar.timegm((year, month, 1, 0, 0, 0))
+
+
+class MetricsStore:
+    """Loads CSV time series and answers aggregate queries over them."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        """Initialize metrics store.
+
+        Args:
+            conn: Vault database connection
+        """
+        self.conn = conn
+
+    def sync(self, directory: Path) -> Dict[str, int]:
+        """Load new rows from every CSV file in a directory.
+
+        Series of files that no longer exist are removed.
+
+        Returns:
+            Counts of files read, points added and sources removed
+        """
+        stats = {"files": 0, "points": 0, "removed": 0}
+        paths = sorted(directory.glob("*.csv")) if directory.is_dir() else []
+        for path in paths:
+            stats["files"] += 1
+            stats["points"] += self.load_csv(path)
+        present = {str(path.resolve()) for path in paths}
+        prefix = str(directory.resolve())
+        with self.conn:
+            for (source,) in self.conn.execute("SELECT path FROM metric_sources").fetchall():
+                if source not in present and Path(source).parent == Path(prefix):
+                    self._drop_source(source)
+                    stats["removed"] += 1
+        return stats
+
+    def load_csv(self, path: Path) -> int:
+        """Load a CSV file's rows, or only the rows appended since the last load.
+
+        The first column named like a date (or else the first column) is
+        the time; every other column whose values are numbers is a series.
+        A file that changed other than by appending is reloaded in full.
+        Only complete lines are read, so a row caught half-written is
+        read again, whole, on the next load.
+
+        Returns:
+            Number of points added or updated
+        """
+        source = str(path.resolve())
+        data = path.read_bytes()
+        if not data.endswith(b"\n") and time.time() - path.stat().st_mtime < _SETTLE:
+            data = data[: data.rfind(b"\n") + 1]
+        row = self.conn.execute(
+            "SELECT bytes_read, digest, header FROM metric_sources WHERE path = ?", (source,)
+        ).fetchone()
+        start, header = 0, None
+        if row is not None:
+            bytes_read, digest, header_json = row
+            if len(data) >= bytes_read and hashlib.sha256(data[:bytes_read]).hexdigest() == digest:
+                start, header = bytes_read, json.loads(header_json)
+        if row is not None and start == len(data):
+            return 0
+
+        rows = list(csv.reader(io.StringIO(data[start:].decode("utf-8", errors="replace"))))
+        with self.conn:
+            if header is None:
+                if row is not None:
+                    self._drop_source(source)
+                if not rows:
+                    return 0
+                header, rows = [name.strip() for name in rows[0]], rows[1:]
+            time_index = next(
+                (i for i, name in enumerate(header) if name.lower() in TIME_COLUMNS), 0
+            )
+            points = self._parse(rows, time_index, len(header))
+            # An upsert, since REPLACE would cascade to the file's series
+            self.conn.execute(
+                "INSERT INTO metric_sources (path, bytes_read, digest, header) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (path) DO UPDATE SET "
+                "bytes_read = excluded.bytes_read, digest = excluded.digest",
+                (source, len(data), hashlib.sha256(data).hexdigest(), json.dumps(header)),
+            )
+            series = self._series_ids(source, path.stem, header, time_index, points, start == 0)
+            added = 0
+            for column, series_id in series.items():
+                values = points.get(column, [])
+                if not values:
+                    continue
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO metric_points (series_id, t, value) VALUES (?, ?, ?)",
+                    [(series_id, t, value) for t, value in values],
+                )
+                self._refresh(series_id, min(t for t, _ in values))
+                added += len(values)
+        return added
+
+    def series(self) -> List[Dict[str, Any]]:
+        """List series with their point counts and time ranges."""
+        return [
+            {
+                "name": name,
+                "source": source,
+                "points": count,
+                "first": format_time(first) if first is not None else None,
+                "last": format_time(last) if last is not None else None,
+            }
+            for name, source, count, first, last in self.conn.execute(
+                "SELECT s.name, s.source, COUNT(p.t), MIN(p.t), MAX(p.t) FROM metric_series s "
+                "LEFT JOIN metric_points p ON p.series_id = s.id GROUP BY s.id ORDER BY s.name"
+            )
+        ]
+
+    def resolve(self, name: str) -> Tuple[int, str]:
+        """Find a series by full name, file stem or column name.
+
+        Raises:
+            MetricsError: If no series, or more than one, matches
+        """
+        rows = self.conn.execute("SELECT id, name, column_name FROM metric_series").fetchall()
+        wanted = name.lower()
+        for matches in (
+            [r for r in rows if r[1].lower() == wanted],
+            [r for r in rows if wanted in (r[1].split(".")[0].lower(), r[2].lower())],
+            [r for r in rows if r[1].lower().startswith(wanted)],
+        ):
+            if len(matches) == 1:
+                return matches[0][0], matches[0][1]
+            if len(matches) > 1:
+                raise MetricsError(
+                    f"'{name}' matches several series: {', '.join(sorted(r[1] for r in matches))}"
+                )
+        known = ", ".join(sorted(r[1] for r in rows)) or "none loaded"
+        raise MetricsError(f"No metric named '{name}' (known: {known})")
+
+    def aggregate(
+        self,
+        name: str,
+        func: str = "avg",
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Aggregate a series over a time window.
+
+        Args:
+            name: Series, see resolve()
+            func: One of AGGREGATES
+            start: First time included (unix seconds). Open if omitted
+            end: Last time included. Open if omitted
+
+        Returns:
+            The series name, function, value (None if the window is
+            empty), point count and the window's first and last point times
+        """
+        if func not in AGGREGATES:
+            raise MetricsError(f"Unknown aggregate: {func} (use {', '.join(AGGREGATES)})")
+        series_id, series_name = self.resolve(name)
+        low = -(1 << 62) if start is None else start
+        high = (1 << 62) if end is None else end
+        first = self._edge(series_id, low, high, "ASC")
+        last = self._edge(series_id, low, high, "DESC")
+        result: Dict[str, Any] = {
+            "series": series_name,
+            "func": func,
+            "value": None,
+            "count": 0,
+            "from": format_time(first[0]) if first else None,
+            "to": format_time(last[0]) if last else None,
+        }
+        if first is None or last is None:
+            return result
+        before = self.conn.execute(
+            "SELECT cum_count, cum_sum, cum_sumsq FROM metric_points "
+            "WHERE series_id = ? AND t < ? ORDER BY t DESC LIMIT 1",
+            (series_id, first[0]),
+        ).fetchone() or (0, 0.0, 0.0)
+        count = last[2] - before[0]
+        total = last[3] - before[1]
+        squares = last[4] - before[2]
+        result["count"] = count
+        if func == "avg":
+            result["value"] = total / count
+        elif func == "sum":
+            result["value"] = total
+        elif func == "count":
+            result["value"] = count
+        elif func == "stddev":
+            mean = total / count
+            result["value"] = math.sqrt(max(0.0, squares / count - mean * mean))
+        elif func == "first":
+            result["value"] = first[1]
+        elif func == "last":
+            result["value"] = last[1]
+        elif func == "change":
+            result["value"] = last[1] - first[1]
+        else:
+            result["value"] = self._extreme(series_id, func, first[0], last[0])
+        return result
+
+    def rollup(
+        self,
+        name: str,
+        period: str = "week",
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the weekly or monthly aggregates of a series, oldest first.
+
+        Args:
+            name: Series, see resolve()
+            period: "week" or "month"
+            start: Only periods starting at or after this time
+            end: Only periods starting at or before this time
+        """
+        if period not in PERIODS:
+            raise MetricsError(f"Unknown period: {period} (use {', '.join(PERIODS)})")
+        series_id, _ = self.resolve(name)
+        rows = self.conn.execute(
+            "SELECT start, count, sum, sumsq, min, max FROM metric_rollups "
+            "WHERE series_id = ? AND period = ? AND start BETWEEN ? AND ? ORDER BY start",
+            (
+                series_id,
+                period,
+                -(1 << 62) if start is None else period_start(start, period),
+                (1 << 62) if end is None else end,
+            ),
+        )
+        return [
+            {
+                "start": format_time(begin),
+                "count": count,
+                "avg": total / count,
+                "stddev": math.sqrt(max(0.0, squares / count - (total / count) ** 2)),
+                "min": low,
+                "max": high,
+            }
+            for begin, count, total, squares, low, high in rows
+        ]
+
+    def _parse(
+        self, rows: List[List[str]], time_index: int, width: int
+    ) -> Dict[int, List[Tuple[int, float]]]:
+        """Parse CSV rows into (t, value) points per numeric-looking column."""
+        points: Dict[int, List[Tuple[int, float]]] = {}
+        for row in rows:
+            if len(row) <= time_index or not row[time_index].strip():
+                continue
+            try:
+                t = parse_time(row[time_index])
+            except ValueError:
+                continue
+            for column in range(min(width, len(row))):
+                if column == time_index or not row[column].strip():
+                    continue
+                try:
+                    value = float(row[column])
+                except ValueError:
+                    points.setdefault(column, []).append((t, math.nan))
+                    continue
+                points.setdefault(column, []).append((t, value))
+        return points
+
+    def _series_ids(
+        self,
+        source: str,
+        stem: str,
+        header: List[str],
+        time_index: int,
+        points: Dict[int, List[Tuple[int, float]]],
+        new: bool,
+    ) -> Dict[int, int]:
+        """Get series ids by column, creating them for numeric columns of a new file.
+
+        Values that are not numbers are dropped from `points`.
+        """
+        if new:
+            for column, values in points.items():
+                # A column is a series when most of its values are numbers;
+                # the odd "n/a" is dropped rather than losing the column
+                if sum(not math.isnan(v) for _, v in values) * 2 > len(values):
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO metric_series (name, source, column_name) "
+                        "VALUES (?, ?, ?)",
+                        (f"{stem}.{header[column]}", source, header[column]),
+                    )
+        columns = {name: i for i, name in enumerate(header) if i != time_index}
+        series = {
+            columns[column_name]: series_id
+            for series_id, column_name in self.conn.execute(
+                "SELECT id, column_name FROM metric_series WHERE source = ?", (source,)
+            )
+            if column_name in columns
+        }
+        for column in series:
+            points[column] = [(t, v) for t, v in points.get(column, []) if not math.isnan(v)]
+        return series
+
+    def _refresh(self, series_id: int, since: int) -> None:
+        """Recompute running totals and rollups from time `since` onwards."""
+        count, total, squares = self.conn.execute(
+            "SELECT cum_count, cum_sum, cum_sumsq FROM metric_points "
+            "WHERE series_id = ? AND t < ? ORDER BY t DESC LIMIT 1",
+            (series_id, since),
+        ).fetchone() or (0, 0.0, 0.0)
+        updates = []
+        for t, value in self.conn.execute(
+            "SELECT t, value FROM metric_points WHERE series_id = ? AND t >= ? ORDER BY t",
+            (series_id, since),
+        ).fetchall():
+            count += 1
+            total += value
+            squares += value * value
+            updates.append((count, total, squares, series_id, t))
+        self.conn.executemany(
+            "UPDATE metric_points SET cum_count = ?, cum_sum = ?, cum_sumsq = ? "
+            "WHERE series_id = ? AND t = ?",
+            updates,
+        )
+        for period in PERIODS:
+            begin = period_start(since, period)
+            self.conn.execute(
+                "DELETE FROM metric_rollups WHERE series_id = ? AND period = ? AND start >= ?",
+                (series_id, period, begin),
+            )
+            rollups: Dict[int, List[float]] = {}
+            for t, value in self.conn.execute(
+                "SELECT t, value FROM metric_points WHERE series_id = ? AND t >= ? ORDER BY t",
+                (series_id, begin),
+            ):
+                bucket = rollups.get(period_start(t, period))
+                if bucket is None:
+                    rollups[period_start(t, period)] = [1, value, value * value, value, value]
+                else:
+                    bucket[0] += 1
+                    bucket[1] += value
+                    bucket[2] += value * value
+                    bucket[3] = min(bucket[3], value)
+                    bucket[4] = max(bucket[4], value)
+            self.conn.executemany(
+                "INSERT INTO metric_rollups "
+                "(series_id, period, start, count, sum, sumsq, min, max) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(series_id, period, begin, *values) for begin, values in rollups.items()],
+            )
+
+    def _edge(self, series_id: int, low: int, high: int, order: str) -> Optional[Tuple[Any, ...]]:
+        row: Optional[Tuple[Any, ...]] = self.conn.execute(
+            "SELECT t, value, cum_count, cum_sum, cum_sumsq FROM metric_points "
+            f"WHERE series_id = ? AND t BETWEEN ? AND ? ORDER BY t {order} LIMIT 1",
+            (series_id, low, high),
+        ).fetchone()
+        return row
+
+    def _extreme(self, series_id: int, func: str, first: int, last: int) -> float:
+        """Min or max over [first, last]: monthly rollups for whole months, raw
+        points only for the partial months at either end."""
+        pick = min if func == "min" else max
+        inner_start = _period_end(period_start(first, "month"), "month")
+        inner_end = period_start(last, "month")
+        if period_start(first, "month") == first:
+            inner_start = first
+        candidates: List[Optional[float]] = []
+        if inner_start < inner_end:
+            candidates.append(
+                self.conn.execute(
+                    f"SELECT {func}({func}) FROM metric_rollups WHERE series_id = ? "
+                    "AND period = 'month' AND start >= ? AND start < ?",
+                    (series_id, inner_start, inner_end),
+                ).fetchone()[0]
+            )
+            ranges = [(first, inner_start - 1), (inner_end, last)]
+        else:
+            ranges = [(first, last)]
+        for low, high in ranges:
+            candidates.append(
+                self.conn.execute(
+                    f"SELECT {func}(value) FROM metric_points "
+                    "WHERE series_id = ? AND t BETWEEN ? AND ?",
+                    (series_id, low, high),
+                ).fetchone()[0]
+            )
+        return float(pick(c for c in candidates if c is not None))
+
+    def _drop_source(self, source: str) -> None:
+        ids = [
+            (series_id,)
+            for (series_id,) in self.conn.execute(
+                "SELECT id FROM metric_series WHERE source = ?", (source,)
+            )
+        ]
+        for table in ("metric_rollups", "metric_points"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE series_id = ?", ids)
+        self.conn.execute("DELETE FROM metric_series WHERE source = ?", (source,))
+        self.conn.execute("DELETE FROM metric_sources WHERE path = ?", (source,))
@@ -0,0 +1,94 @@
+"""CPU and allocation profiling for CLI commands.
+
+Profiles are written locally to the Compass state directory so they can
+be attached to performance bug reports. Nothing is uploaded.
+"""
+
+import cProfile
+import pstats
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from compass.paths import ensure_dir, get_state_dir
+
+
+def get_profiles_dir() -> Path:
+    """Get the directory where profiles are saved."""
+    return get_state_dir() / "profiles"
+
+
+class Profiler:
+    """Runs cProfile and tracemalloc around a command."""
+
+    def __init__(self, name: str, output_dir: Optional[Path] = None, frames: int = 10):
+        """Initialize profiler.
+
+        Args:
+            name: Name used in output file names (usually the command)
+            output_dir: Directory for profiles. Defaults to get_state_dir()/profiles
+            frames: Stack frames kept per allocation by tracemalloc
+        """
+        self.name = name
+        self.output_dir = output_dir or get_profiles_dir()
+        self.frames = frames
+        self._profile = cProfile.Profile()
+        self.prof_path: Optional[Path] = None
+        self.alloc_path: Optional[Path] = None
+
+    def start(self) -> None:
+        """Start CPU and allocation profiling."""
+        tracemalloc.start(self.frames)
+        self._profile.enable()
+
+    def stop(self, top: int = 25) -> None:
+        """Stop profiling and write the .prof file and allocation report."""
+        self._profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        ensure_dir(self.output_dir)
+        stem = f"{self.name}-{datetime.now():%Y%m%d-%H%M%S}"
+        self.prof_path = self.output_dir / f"{stem}.prof"
+        self.alloc_path = self.output_dir / f"{stem}-alloc.txt"
+        self._profile.dump_stats(str(self.prof_path))
+
+        snapshot = snapshot.filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen *>"),
+            ]
+        )
+        lines = [
+            f"Current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB",
+            f"Top {top} allocation sites:",
+            "",
+        ]
+        for stat in snapshot.statistics("lineno")[:top]:
+            frame = stat.traceback[0]
+            lines.append(
+                f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  "
+                f"{frame.filename}:{frame.lineno}"
+            )
+        self.alloc_path.write_text("\n".join(lines) + "\n")
+
+    def hot_functions(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Functions with the most self time, from the saved profile."""
+        # Stats.stats is missing from the type stubs; get_stats_profile() would
+        # merge same-named functions from different files
+        entries: Dict[Tuple[str, int, str], Tuple[Any, ...]] = getattr(
+            pstats.Stats(str(self.prof_path)), "stats"
+        )
+        rows = []
+        for (filename, lineno, func), (_, ncalls, tottime, cumtime, _) in entries.items():
+            rows.append(
+                {
+                    "function": f"{Path(filename).name}:{lineno}({func})",
+                    "calls": ncalls,
+                    "self_ms": tottime * 1000,
+                    "cumulative_ms": cumtime * 1000,
+                }
+            )
+        rows.sort(key=lambda row: row["self_ms"], reverse=True)
+        return rows[:limit]
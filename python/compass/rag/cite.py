@@ -1,6 +1,7 @@
 """Citation generation for RAG responses."""
 
 from typing import List, Dict, Any
+from compass.tracing import traced
 
 
 def generate_citations(chunks: List[Dict[str, Any]]) -> str:
@@ -10,12 +11,16 @@ def generate_citations(chunks: List[Dict[str, Any]]) -> str:
 
     citations = []
     for i, chunk in enumerate(chunks, 1):
-        source = chunk.get("metadata", {}).get("source", "unknown")
+        metadata = chunk.get("metadata", {})
+        source = metadata.get("source", "unknown")
+        if "vault" in metadata:
+            source = f"{metadata['vault']}: {source}"
         citations.append(f"[{i}] {source}")
 
     return "\n\nSources:\n" + "\n".join(citations)
 
 
+@traced("pack")
 def format_context(chunks: List[Dict[str, Any]]) -> str:
     """Format retrieved chunks as context for LLM."""
     if not chunks:
@@ -24,7 +29,10 @@ def format_context(chunks: List[Dict[str, Any]]) -> str:
     context_parts = []
     for i, chunk in enumerate(chunks, 1):
         content = chunk.get("content", "")
-        source = chunk.get("metadata", {}).get("source", "unknown")
+        metadata = chunk.get("metadata", {})
+        source = metadata.get("source", "unknown")
+        if "vault" in metadata:
+            source = f"{metadata['vault']}: {source}"
         context_parts.append(f"[Document {i} - {source}]\n{content}")
 
     return "\n\n".join(context_parts)
@@ -8,6 +8,7 @@ complete privacy.
 
 from typing import List
 import hashlib
+from compass.config import Config
 
 
 class Embedder:
@@ -35,3 +36,11 @@ class DummyEmbedder(Embedder):
         hash_bytes = hashlib.md5(text.encode()).digest()
         # Convert to list of floats normalized to [-1, 1]
         return [(b / 255.0) * 2 - 1 for b in hash_bytes]
+
+
+def create_embedder(cfg: Config) -> Embedder:
+    """Create the embedder configured in `rag.embedder`."""
+    name = cfg.get("rag.embedder", "dummy")
+    if name == "dummy":
+        return DummyEmbedder()
+    raise ValueError(f"Unknown embedder: {name}")
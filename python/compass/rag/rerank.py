@@ -1,6 +1,7 @@
 """Result reranking."""
 
 from typing import List, Dict, Any
+from compass.tracing import traced
 
 
 class Reranker:
@@ -16,6 +17,7 @@ class Reranker:
 class NoOpReranker(Reranker):
     """Pass-through reranker (no reranking)."""
 
+    @traced("rerank")
     def rerank(
         self, query: str, documents: List[Dict[str, Any]], top_k: int = 5
     ) -> List[Dict[str, Any]]:
@@ -1,6 +1,25 @@
 """Document retrieval."""
 
-from typing import List, Dict, Any
+import heapq
+import json
+import math
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from operator import mul
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+from compass.db.chunkstore import DEFAULT_BUDGET, ChunkStore, HotTier, VectorBlock
+from compass.db.storage import DocumentStore
+from compass.rag.embed import Embedder
+from compass.tracing import span
+
+# Chunk vectors decoded and scored together by retrieve_batch()
+BATCH_BLOCK = 512
+
+# (chunk_id, vector, norm) triples: a batch of decoded rows or a cached VectorBlock
+Block = Union[List[Tuple[int, Any, float]], VectorBlock]
 
 
 class Retriever:
@@ -10,6 +29,14 @@ class Retriever:
         """Retrieve relevant documents."""
         raise NotImplementedError
 
+    def retrieve_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Retrieve for many queries at once.
+
+        Returns:
+            One result list per query, in input order
+        """
+        return [self.retrieve(query, top_k) for query in queries]
+
 
 class DummyRetriever(Retriever):
     """Dummy retriever for testing."""
@@ -21,3 +48,377 @@ class DummyRetriever(Retriever):
     def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Return first top_k documents (no actual retrieval)."""
         return self.documents[:top_k]
+
+
+class VectorRetriever(Retriever):
+    """Cosine similarity search over chunk embeddings.
+
+    By default every chunk is scored. With `coarse_docs` set, retrieval runs
+    in two stages: document vectors are scored first, then only the chunks
+    of the best documents, so query cost follows the number of documents
+    rather than chunks. Reads embeddings from the vault database; all
+    scoring happens locally.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        embedder: Embedder,
+        keep_vectors: bool = False,
+        coarse_docs: int = 0,
+        chunk_store: Optional[ChunkStore] = None,
+    ):
+        """Initialize with a vault database connection and embedder.
+
+        Args:
+            conn: Vault database connection
+            embedder: Embedder for queries
+            keep_vectors: Keep decoded vectors in memory between queries, up to
+                          DEFAULT_BUDGET bytes. Ignored when `chunk_store` is
+                          given
+            coarse_docs: Number of documents (M) whose chunks are scored
+                         after the document stage. Larger values trade speed
+                         for recall; 0 scores every chunk
+            chunk_store: Source of chunk vectors. Long-lived processes
+                         (`compass serve`) pass one with a shared hot tier;
+                         cached vectors are dropped when another connection
+                         changes the database
+        """
+        self.conn = conn
+        self.embedder = embedder
+        self.coarse_docs = coarse_docs
+        self.store = DocumentStore(conn)
+        if chunk_store is None:
+            chunk_store = ChunkStore(conn, HotTier(DEFAULT_BUDGET if keep_vectors else 0))
+        self.chunk_store = chunk_store
+
+    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Return the top_k chunks most similar to the query."""
+        with span("retrieve") as s:
+            with span("retrieve.embed"):
+                query_vector = self.embedder.embed(query)
+            query_norm = math.sqrt(sum(x * x for x in query_vector)) or 1.0
+
+            documents = None
+            if self.coarse_docs > 0:
+                with span("retrieve.coarse") as coarse:
+                    per_query = self._top_documents([query_vector])
+                    documents = per_query[0] if per_query is not None else None
+                    coarse.set(count=len(documents) if documents is not None else 0)
+            scored = []
+            for chunk_id, vector, norm in self._iter_vectors(documents):
+                score = sum(x * y for x, y in zip(query_vector, vector)) / (norm * query_norm)
+                scored.append((score, chunk_id))
+            best = heapq.nlargest(top_k, scored)
+            s.set(candidates=len(scored))
+        return self._load_chunks(best)
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Return the top_k chunks for each query, in input order.
+
+        Queries are embedded in one call and scored together: each block of
+        chunk vectors is decoded once and scored against every query that
+        needs it, keeping a bounded top-k per query. When numpy is
+        installed a block is scored as one matrix product. With
+        `coarse_docs` set, each query only scores the chunks of its own top
+        documents, as in retrieve().
+        """
+        if not queries:
+            return []
+        with span("retrieve.batch") as s:
+            with span("retrieve.embed") as e:
+                query_vectors = self.embedder.embed_batch(list(queries))
+                e.set(count=len(queries))
+            units = [_unit(vector) for vector in query_vectors]
+            best: List[List[Tuple[float, int]]] = [[] for _ in queries]
+            everyone = range(len(queries))
+            np = _numpy()
+            if np is not None:
+                matrix = np.array(units, dtype=np.float64)
+
+                def score(block: Block, indexes: Iterable[int]) -> int:
+                    return _score_block_numpy(np, block, matrix, indexes, best, top_k)
+
+            else:
+
+                def score(block: Block, indexes: Iterable[int]) -> int:
+                    return _score_block(block, units, indexes, best, top_k)
+
+            per_query = None
+            if self.coarse_docs > 0:
+                with span("retrieve.coarse"):
+                    per_query = self._top_documents(units)
+            pairs = 0
+            if per_query is None:
+                for block in _blocks(self._iter_vectors(), BATCH_BLOCK):
+                    pairs += score(block, everyone)
+            else:
+                interested: Dict[int, List[int]] = {}
+                for index, documents in enumerate(per_query):
+                    for doc_id in documents:
+                        interested.setdefault(doc_id, []).append(index)
+                for doc_id, vectors in self.chunk_store.documents(list(interested)):
+                    pairs += score(vectors, interested[doc_id])
+            s.set(count=len(queries), candidates=pairs)
+
+        loaded: Dict[int, Dict[str, Any]] = {}
+        missing = list({chunk_id for scored in best for _, chunk_id in scored})
+        for result in self._load_chunks([(0.0, chunk_id) for chunk_id in missing]):
+            loaded[result["id"]] = result
+        return [
+            [{**loaded[chunk_id], "score": score} for score, chunk_id in scored] for scored in best
+        ]
+
+    def _top_documents(self, query_vectors: List[List[float]]) -> Optional[List[List[int]]]:
+        """Pick, for each query, the documents whose chunks are worth scoring.
+
+        Returns:
+            Document ids per query, or None if every document should be searched
+        """
+        centroids = self.chunk_store.centroids()
+        if len(centroids) <= self.coarse_docs:
+            return None
+        # Documents without a vector yet (e.g. from an older snapshot) are always searched
+        missing = [
+            doc_id
+            for (doc_id,) in self.conn.execute(
+                "SELECT id FROM documents WHERE centroid IS NULL AND duplicate_of IS NULL"
+            )
+        ]
+        ids = list(centroids.ids)
+        block = [(vector, norm) for _, vector, norm in centroids]
+        selected = []
+        for query_vector in query_vectors:
+            query = _unit(query_vector)
+            scores = [sum(map(mul, query, vector)) / norm for vector, norm in block]
+            best = heapq.nlargest(self.coarse_docs, zip(scores, ids))
+            selected.append([doc_id for _, doc_id in best] + missing)
+        return selected
+
+    def _iter_vectors(self, documents: Optional[List[int]] = None) -> Iterator[Any]:
+        """Yield (chunk_id, vector, norm) for all chunks or those of `documents`."""
+        return chain.from_iterable(block for _, block in self.chunk_store.documents(documents))
+
+    def _load_chunks(self, scored: List[Any]) -> List[Dict[str, Any]]:
+        """Fetch content and source for scored (score, chunk_id) pairs."""
+        texts = self.store.chunk_texts(chunk_id for _, chunk_id in scored)
+        results = []
+        for score, chunk_id in scored:
+            position, metadata, path = self.conn.execute(
+                "SELECT c.position, c.metadata, d.path "
+                "FROM chunks c JOIN documents d ON d.id = c.document_id WHERE c.id = ?",
+                (chunk_id,),
+            ).fetchone()
+            results.append(
+                {
+                    "id": chunk_id,
+                    "content": texts[chunk_id],
+                    "score": score,
+                    "metadata": {
+                        **json.loads(metadata or "{}"),
+                        "source": path,
+                        "position": position,
+                    },
+                }
+            )
+        return results
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _unit(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _blocks(entries: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(entries)
+    while True:
+        block = list(islice(iterator, size))
+        if not block:
+            return
+        yield block
+
+
+def _score_block(
+    block: Block,
+    queries: List[List[float]],
+    indexes: Iterable[int],
+    best: List[List[Tuple[float, int]]],
+    top_k: int,
+) -> int:
+    """Score a block of (chunk_id, vector, norm) against unit query vectors,
+    merging into each query's running top_k. Returns the pairs scored."""
+    ids = [chunk_id for chunk_id, _, _ in block]
+    pairs = 0
+    for index in indexes:
+        query = queries[index]
+        scores = [sum(map(mul, query, vector)) / norm for _, vector, norm in block]
+        best[index] = heapq.nlargest(top_k, chain(best[index], zip(scores, ids)))
+        pairs += len(block)
+    return pairs
+
+
+def _score_block_numpy(
+    np: Any,
+    block: Block,
+    queries: Any,
+    indexes: Iterable[int],
+    best: List[List[Tuple[float, int]]],
+    top_k: int,
+) -> int:
+    """_score_block() as one (queries x block) matrix product."""
+    rows = list(indexes)
+    ids = [chunk_id for chunk_id, _, _ in block]
+    chunks = np.array([vector for _, vector, _ in block], dtype=np.float64)
+    norms = np.array([norm for _, _, norm in block], dtype=np.float64)
+    scores = (queries[rows] @ chunks.T) / norms
+    if top_k < len(ids):
+        # Only the block's own top_k per query can enter the running top_k
+        top = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+    else:
+        top = np.broadcast_to(np.arange(len(ids)), (len(rows), len(ids)))
+    for row, index in enumerate(rows):
+        candidates = top[row].tolist()
+        best[index] = heapq.nlargest(
+            top_k,
+            chain(best[index], zip(scores[row, candidates].tolist(), (ids[i] for i in candidates))),
+        )
+    return len(rows) * len(ids)
+
+
+def document_vector(embeddings: Iterable[Optional[bytes]]) -> bytes:
+    """Average a document's chunk embeddings into one vector for the document stage.
+
+    Chunk vectors are normalized first, so every chunk counts equally.
+
+    Returns:
+        float32 blob, empty when no chunk has an embedding
+    """
+    total: Optional[List[float]] = None
+    for blob in embeddings:
+        if blob is None:
+            continue
+        vector = array("f", blob)
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        if total is None:
+            total = [0.0] * len(vector)
+        for i, x in enumerate(vector):
+            total[i] += x / norm
+    return array("f", total).tobytes() if total is not None else b""
+
+
+def normalize_scores(results: List[Dict[str, Any]], method: str = "cosine") -> List[Dict[str, Any]]:
+    """Map retrieval scores to [0, 1] so results from several vaults can be merged.
+
+    Args:
+        results: Retrieved chunks with a `score`
+        method: "cosine" rescales cosine similarity from [-1, 1], which keeps
+                vaults with the same embedder comparable; "minmax" rescales
+                each result list to its own range, for vaults whose
+                embedders differ
+
+    Returns:
+        The same results with `score` normalized and the original in `raw_score`
+    """
+    if method not in ("cosine", "minmax"):
+        raise ValueError(f"Unknown score normalization: {method}")
+    scores = [r["score"] for r in results]
+    low, high = (min(scores), max(scores)) if scores else (0.0, 0.0)
+    for result in results:
+        result["raw_score"] = result["score"]
+        if method == "cosine":
+            result["score"] = (result["score"] + 1.0) / 2.0
+        else:
+            result["score"] = (result["score"] - low) / (high - low) if high > low else 1.0
+    return results
+
+
+class LockedRetriever(Retriever):
+    """Serializes queries to a retriever that is not safe to share between
+    threads, e.g. a daemon's warm per-vault retriever in a federated search."""
+
+    def __init__(self, lock: threading.Lock, retriever: Callable[[], Retriever]):
+        """Initialize.
+
+        Args:
+            lock: Held for the whole of each query
+            retriever: Returns the retriever to query; called with the lock held
+        """
+        self.lock = lock
+        self.retriever = retriever
+
+    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Retrieve relevant documents while holding the lock."""
+        with self.lock:
+            return self.retriever().retrieve(query, top_k=top_k)
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Retrieve for many queries while holding the lock."""
+        with self.lock:
+            return self.retriever().retrieve_batch(queries, top_k=top_k)
+
+
+class FederatedRetriever(Retriever):
+    """Queries several vaults in parallel and merges their results.
+
+    Each result's metadata gains a `vault` entry naming the vault it came
+    from, so citations show provenance.
+    """
+
+    def __init__(
+        self,
+        retrievers: Dict[str, Retriever],
+        normalize: str = "cosine",
+        max_workers: Optional[int] = None,
+    ):
+        """Initialize with one retriever per vault.
+
+        Args:
+            retrievers: Retrievers keyed by vault name. Each must be safe to
+                        call from a worker thread.
+            normalize: Score normalization, see normalize_scores()
+            max_workers: Parallel queries. Defaults to one per vault
+        """
+        self.retrievers = retrievers
+        self.normalize = normalize
+        self.max_workers = max_workers or max(1, len(retrievers))
+
+    def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Return the global top_k chunks across all vaults."""
+        with span("retrieve.federated") as s:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    name: pool.submit(retriever.retrieve, query, top_k)
+                    for name, retriever in self.retrievers.items()
+                }
+                merged = []
+                for name, future in futures.items():
+                    for result in normalize_scores(future.result(), self.normalize):
+                        result["metadata"] = {**result.get("metadata", {}), "vault": name}
+                        merged.append(result)
+            s.set(count=len(self.retrievers))
+        return heapq.nlargest(top_k, merged, key=lambda r: r["score"])
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Return the global top_k chunks for each query, batching per vault."""
+        with span("retrieve.federated") as s:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    name: pool.submit(retriever.retrieve_batch, queries, top_k)
+                    for name, retriever in self.retrievers.items()
+                }
+                merged: List[List[Dict[str, Any]]] = [[] for _ in queries]
+                for name, future in futures.items():
+                    for index, results in enumerate(future.result()):
+                        for result in normalize_scores(results, self.normalize):
+                            result["metadata"] = {**result.get("metadata", {}), "vault": name}
+                            merged[index].append(result)
+            s.set(count=len(self.retrievers))
+        return [heapq.nlargest(top_k, results, key=lambda r: r["score"]) for results in merged]
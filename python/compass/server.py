@@ -0,0 +1,484 @@
+"""Resident Compass daemon and its thin client.
+
+`compass serve` keeps vault databases, in-memory chunk vectors and LLM
+providers warm between commands, and answers requests over a Unix domain
+socket in the local state directory. The socket is only accessible to
+the current user and never listens on the network; requests and
+responses stay on the local machine.
+
+The protocol is newline-delimited JSON. Each request is an object with an
+`op` and its parameters; each response is `{"ok": true, "result": ...}` or
+`{"ok": false, "error": "..."}`. A connection may carry many requests.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from compass import __version__, tracing
+from compass.paths import ensure_dir, get_state_dir
+
+if TYPE_CHECKING:
+    from compass.config import Config
+    from compass.db.chunkstore import ChunkStore, HotTier
+    from compass.llm.base import LLMProvider
+    from compass.rag.retrieve import VectorRetriever
+    from compass.sessions import ContextWindow, Session, SessionManager
+
+PROTOCOL_VERSION = 1
+
+
+def get_socket_path() -> Path:
+    """Get the default daemon socket path."""
+    return get_state_dir() / "compass.sock"
+
+
+class ServerError(Exception):
+    """An error reported by the daemon for a request."""
+
+
+class VaultState:
+    """Warm resources for one vault: connection, retriever and sessions."""
+
+    def __init__(self, vault_path: Path, hot: "HotTier"):
+        """Open the vault database and prepare its retriever.
+
+        Args:
+            vault_path: Path to an initialized vault
+            hot: In-memory vector tier shared by all vaults of the daemon
+        """
+        from compass.db.chunkstore import ChunkStore
+        from compass.sessions import SessionIndex, SessionManager
+        from compass.vault import Vault
+
+        self.vault = Vault(vault_path)
+        # Read-only, so retrieval never waits on an ingest in another process
+        self.conn = self.vault.db_manager.connect(read_only=True)
+        self.chunk_store: "ChunkStore" = ChunkStore(self.conn, hot)
+        self.lock = threading.Lock()
+        self.sessions = SessionManager(index=SessionIndex(self.vault.db_manager))
+        self._retriever: Optional["VectorRetriever"] = None
+        self._embedder_name: Optional[str] = None
+
+    def retriever(self, cfg: "Config") -> "VectorRetriever":
+        """Get the retriever, rebuilding it if the configured embedder changed."""
+        from compass.rag.embed import create_embedder
+        from compass.rag.retrieve import VectorRetriever
+
+        name = cfg.get("rag.embedder", "dummy")
+        if self._retriever is None or name != self._embedder_name:
+            self._retriever = VectorRetriever(
+                self.conn, create_embedder(cfg), chunk_store=self.chunk_store
+            )
+            self._embedder_name = name
+        self._retriever.coarse_docs = cfg.get("rag.coarse_docs", 50)
+        return self._retriever
+
+    def close(self) -> None:
+        """Close the database connection and flush session writes."""
+        self.chunk_store.close()
+        self.sessions.close()
+        self.conn.close()
+        self.vault.db_manager.close()
+
+
+class CompassService:
+    """Request handlers for the daemon, independent of the transport."""
+
+    def __init__(self, memory_budget: Optional[int] = None) -> None:
+        """Initialize the service.
+
+        Args:
+            memory_budget: Bytes of chunk vectors kept in memory across all
+                           vaults. Defaults to `serve.memory_budget_mb`
+        """
+        from compass.config import Config
+        from compass.db.chunkstore import HotTier
+
+        if memory_budget is None:
+            memory_budget = int(Config().get("serve.memory_budget_mb", 256) * 1024 * 1024)
+        self._hot = HotTier(memory_budget)
+        self._vaults: Dict[Path, VaultState] = {}
+        self._providers: Dict[Tuple[Any, ...], "LLMProvider"] = {}
+        self._chats: Dict[str, Tuple[Optional[Path], "Session", "ContextWindow", bool]] = {}
+        self._lock = threading.Lock()
+        self._local_sessions: Optional["SessionManager"] = None
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "ping": self.ping,
+            "stats": self.stats,
+            "retrieve": self.retrieve,
+            "exec": self.exec,
+            "chat_open": self.chat_open,
+            "chat": self.chat,
+            "chat_close": self.chat_close,
+        }
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch one request and wrap the result or error."""
+        handler = self.handlers.get(request.get("op", ""))
+        if handler is None:
+            return {"ok": False, "error": f"Unknown op: {request.get('op')}"}
+        try:
+            return {"ok": True, "result": handler(request)}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def ping(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Report the daemon version and process id."""
+        return {"version": __version__, "protocol": PROTOCOL_VERSION, "pid": os.getpid()}
+
+    def stats(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Report the in-memory vector tier's hit rate and size, and cold reads per vault."""
+        with self._lock:
+            states = dict(self._vaults)
+        return {
+            "hot": self._hot.stats(),
+            "vaults": {str(path): state.chunk_store.cold_reads for path, state in states.items()},
+        }
+
+    def retrieve(self, request: Dict[str, Any]) -> list:
+        """Retrieve and rerank chunks for `query` from `vault`, or from each of
+        `vaults` in parallel."""
+        from compass.rag.rerank import NoOpReranker
+        from compass.rag.retrieve import FederatedRetriever, LockedRetriever
+        from compass.vault import vault_labels
+
+        states = self._states(request)
+        if not states:
+            return []
+        cfg = self._config(states[0])
+        top_k = request.get("top_k") or cfg.get("rag.top_k", 5)
+        if len(states) == 1:
+            with states[0].lock:
+                chunks = states[0].retriever(cfg).retrieve(request["query"], top_k=top_k)
+        else:
+            retriever = FederatedRetriever(
+                {
+                    label: LockedRetriever(
+                        state.lock, partial(state.retriever, self._config(state))
+                    )
+                    for label, state in zip(vault_labels([s.vault.path for s in states]), states)
+                },
+                normalize=cfg.get("rag.federated_normalize", "cosine"),
+            )
+            chunks = retriever.retrieve(request["query"], top_k=top_k)
+        return NoOpReranker().rerank(request["query"], chunks, top_k=top_k)
+
+    def exec(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a one-off `prompt` with context retrieved from `vault` or `vaults`."""
+        from compass.llm.base import Message
+        from compass.llm.cache import hash_context
+        from compass.rag.cite import format_context, generate_citations
+
+        states = self._states(request)
+        cfg = self._config(states[0] if states else None)
+        chunks = self.retrieve({**request, "query": request["prompt"]}) if states else []
+        messages = [Message("user", request["prompt"])]
+        if chunks:
+            messages.insert(0, Message("system", format_context(chunks)))
+        provider = self._provider(cfg, not request.get("no_cache", False))
+        response = self._complete(provider, messages, context_hash=hash_context(chunks))
+        return {"response": response, "citations": generate_citations(chunks)}
+
+    def chat_open(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Start or resume a chat session and return its id."""
+        from compass.sessions import ContextWindow, Session, llm_summarizer
+
+        vault_path = self._vault_path(request.get("vault"))
+        state = self._vault(request.get("vault"))
+        cfg = self._config(state)
+        use_cache = not request.get("no_cache", False)
+        window = ContextWindow(
+            max_turns=cfg.get("session.max_turns", 6),
+            token_budget=cfg.get("session.token_budget", 3000),
+            summary_tokens=cfg.get("session.summary_tokens", 500),
+            summarizer=llm_summarizer(self._provider(cfg, use_cache)),
+        )
+        session = None
+        resume = request.get("session_id")
+        if resume:
+            session = self._sessions(state).load(resume, tail=2 * window.max_turns + 2)
+        resumed = session is not None
+        if session is None:
+            session = Session()
+        with self._lock:
+            self._chats[session.id] = (vault_path, session, window, use_cache)
+        return {"session_id": session.id, "resumed": resumed}
+
+    def chat(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Add `message` to an open session and return the reply."""
+        with self._lock:
+            entry = self._chats.get(request["session_id"])
+        if entry is None:
+            raise ServerError(f"Unknown session: {request['session_id']}")
+        vault_path, session, window, use_cache = entry
+        state = self._vault(str(vault_path) if vault_path else None)
+        provider = self._provider(self._config(state), use_cache)
+
+        session.add_message("user", request["message"])
+        response = self._complete(provider, window.build_messages(session))
+        if response is None:
+            response = f"[Placeholder response to: {request['message'][:50]}...]"
+        session.add_message("assistant", response)
+        self._sessions(state).save(session)
+        return {"response": response}
+
+    def chat_close(self, request: Dict[str, Any]) -> None:
+        """Forget an open session; its history is already saved."""
+        with self._lock:
+            self._chats.pop(request["session_id"], None)
+
+    def close(self) -> None:
+        """Release all warm resources."""
+        for state in self._vaults.values():
+            state.close()
+        if self._local_sessions is not None:
+            self._local_sessions.close()
+        self._vaults.clear()
+
+    def _vault_path(self, vault: Optional[str]) -> Optional[Path]:
+        return Path(vault).resolve() if vault else None
+
+    def _vault(self, vault: Optional[str]) -> Optional[VaultState]:
+        from compass.vault import Vault
+
+        path = self._vault_path(vault)
+        if path is None:
+            return None
+        with self._lock:
+            state = self._vaults.get(path)
+            if state is None:
+                if not Vault(path).exists():
+                    raise ServerError(f"No vault at {path}")
+                state = self._vaults[path] = VaultState(path, self._hot)
+        return state
+
+    def _states(self, request: Dict[str, Any]) -> List[VaultState]:
+        values = request.get("vaults") or [request.get("vault")]
+        return [state for state in map(self._vault, values) if state is not None]
+
+    def _config(self, state: Optional[VaultState]) -> "Config":
+        from compass.config import Config
+
+        # Config construction is cached and revalidated by file mtime
+        return Config(profile_path=state.vault.config_file if state else None)
+
+    def _provider(self, cfg: "Config", use_cache: bool) -> "LLMProvider":
+        from compass.llm.factory import create_provider
+
+        key = (repr(cfg.get("llm")), repr(cfg.get("cache")), use_cache)
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is None:
+                provider = self._providers[key] = create_provider(cfg, use_cache=use_cache)
+        return provider
+
+    def _sessions(self, state: Optional[VaultState]) -> "SessionManager":
+        from compass.sessions import SessionManager
+
+        if state is not None:
+            return state.sessions
+        with self._lock:
+            if self._local_sessions is None:
+                self._local_sessions = SessionManager()
+        return self._local_sessions
+
+    def _complete(self, provider: "LLMProvider", messages: list, **kwargs: Any) -> Optional[str]:
+        from compass.llm.cache import CachedProvider
+
+        if not isinstance(provider, CachedProvider):
+            kwargs.pop("context_hash", None)
+        try:
+            return "".join(tracing.trace_stream(provider.stream(messages, **kwargs)))
+        except NotImplementedError:
+            return None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "CompassServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                response = {"ok": False, "error": "Invalid JSON"}
+            else:
+                if request.get("op") == "shutdown":
+                    self._send({"ok": True, "result": None})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                response = self.server.service.handle(request)
+            self._send(response)
+
+    def _send(self, response: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+class CompassServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server for CompassService."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Optional[Path] = None):
+        """Bind the daemon socket.
+
+        Args:
+            socket_path: Socket to listen on. Defaults to get_socket_path()
+
+        Raises:
+            ServerError: If another daemon is already listening on the socket
+        """
+        self.socket_path = socket_path or get_socket_path()
+        self.service = CompassService()
+        ensure_dir(self.socket_path.parent)
+        if self.socket_path.exists():
+            if Client.connect(self.socket_path) is not None:
+                raise ServerError(f"A daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        """Close the socket, remove its file and release warm resources."""
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+        self.service.close()
+
+
+class Client:
+    """Thin client for a running daemon."""
+
+    def __init__(self, sock: socket.socket):
+        """Wrap a connected socket."""
+        self.sock = sock
+        self._file = sock.makefile("rb")
+
+    @classmethod
+    def connect(
+        cls, socket_path: Optional[Path] = None, timeout: float = 0.5
+    ) -> Optional["Client"]:
+        """Connect to the daemon, or return None if none is running.
+
+        A daemon started from another Compass version (for example one
+        still running after an upgrade) is not used.
+
+        Args:
+            socket_path: Daemon socket. Defaults to get_socket_path()
+            timeout: Seconds to wait for the connection and the ping
+
+        Returns:
+            Connected client, or None
+        """
+        path = socket_path or get_socket_path()
+        if not path.exists():
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        client = cls(sock)
+        try:
+            sock.connect(str(path))
+            info = client.request("ping")
+        except (OSError, ServerError, ValueError):
+            client.close()
+            return None
+        if (info.get("version"), info.get("protocol")) != (__version__, PROTOCOL_VERSION):
+            client.close()
+            return None
+        sock.settimeout(None)
+        return client
+
+    def request(self, op: str, **params: Any) -> Any:
+        """Send a request and return its result.
+
+        Raises:
+            ServerError: If the daemon reports an error
+            ConnectionError: If the daemon closed the connection
+        """
+        self.sock.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Daemon closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise ServerError(response["error"])
+        return response["result"]
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._file.close()
+        self.sock.close()
+
+
+def thin_exec(args: List[str], socket_path: Optional[Path] = None) -> bool:
+    """Answer `compass exec` through a running daemon without loading the CLI.
+
+    Only the plain form `exec PROMPT [--vault PATH ...] [--no-cache]` is handled.
+
+    Returns:
+        False if the arguments are not handled or no daemon answered, in
+        which case the full CLI should run instead
+    """
+    if not args or args[0] != "exec":
+        return False
+    prompt, vaults, no_cache = None, [], False
+    rest = iter(args[1:])
+    for arg in rest:
+        if arg == "--no-cache":
+            no_cache = True
+        elif arg == "--vault":
+            vault = next(rest, None)
+            if vault is None:
+                return False
+            vaults.append(vault)
+        elif arg.startswith("-") or prompt is not None:
+            return False
+        else:
+            prompt = arg
+    if prompt is None:
+        return False
+
+    from compass.vault import Vault, resolve_vault_paths
+
+    vault_paths = resolve_vault_paths(vaults)
+    if vaults and not all(Vault(path).exists() for path in vault_paths):
+        return False  # The full CLI reports the unknown vault
+    vault_paths = [path for path in vault_paths if Vault(path).exists()]
+
+    client = Client.connect(socket_path)
+    if client is None:
+        return False
+
+    from compass.logging import get_run_logger
+
+    try:
+        result = client.request(
+            "exec",
+            prompt=prompt,
+            vaults=[str(path) for path in vault_paths],
+            no_cache=no_cache,
+        )
+    except (ServerError, OSError):
+        return False
+    finally:
+        client.close()
+
+    print(f"Prompt: {prompt}")
+    if result["response"] is None:
+        print("\nCompass: [Placeholder response]")
+        print("LLM integration not yet implemented")
+    else:
+        print(f"\nCompass: {result['response']}")
+        print(result["citations"])
+    get_run_logger().log_command("exec", {"prompt": prompt})
+    return True
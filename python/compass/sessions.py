@@ -1,23 +1,33 @@
 """Session management for chat and execution contexts.
 
-All session data is stored locally as JSON files. Session history,
+All session data is stored locally as append-only JSONL files. Session history,
 including full conversation messages, remains on the user's local
 filesystem and is never sent to external services.
 """
 
+import atexit
+import os
+import queue
+import threading
+import time
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any, Tuple
 import json
+import sqlite3
 from compass.paths import get_state_dir, ensure_dir
+from compass.llm.base import LLMProvider, Message
+from compass.db.manager import DatabaseManager
 
 
 class Session:
     """Represents a Compass session.
-    
+
     Sessions store conversation history locally. When using cloud LLM
-    providers, only the current query is sent - full history remains local.
+    providers, only a bounded window of recent turns and the rolling
+    summary of older turns is sent (see ContextWindow) - full history
+    remains local.
     """
 
     def __init__(self, session_id: Optional[str] = None):
@@ -25,6 +35,11 @@ class Session:
         self.id = session_id or self._generate_id()
         self.created_at = datetime.now()
         self.messages: list[Dict[str, Any]] = []
+        # Number of earlier messages left on disk when loaded with a tail
+        self.base_index = 0
+        # Rolling summary of messages[:summarized_count], maintained by ContextWindow
+        self.summary = ""
+        self.summarized_count = 0
 
     def _generate_id(self) -> str:
         """Generate a unique session ID."""
@@ -46,25 +61,605 @@ class Session:
             "id": self.id,
             "created_at": self.created_at.isoformat(),
             "messages": self.messages,
+            "summary": self.summary,
+            "summarized_count": self.summarized_count,
         }
 
 
+Summarizer = Callable[[str, List[Dict[str, Any]]], str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def extractive_summary(previous: str, messages: List[Dict[str, Any]]) -> str:
+    """Fold messages into a summary by keeping the first sentence of each."""
+    lines = [previous] if previous else []
+    for message in messages:
+        text = " ".join(message["content"].split())
+        sentence = text.split(". ")[0][:200]
+        lines.append(f"{message['role']}: {sentence}")
+    return "\n".join(lines)
+
+
+def llm_summarizer(provider: LLMProvider) -> Summarizer:
+    """Build a summarizer that asks an LLM to extend the rolling summary.
+
+    Falls back to extractive_summary while the provider is unimplemented.
+    """
+
+    def summarize(previous: str, messages: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = (
+            "Update the conversation summary with the new turns. "
+            "Keep facts, decisions and open questions; be brief.\n\n"
+            f"Summary so far:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        try:
+            return provider.complete([Message("user", prompt)])
+        except NotImplementedError:
+            return extractive_summary(previous, messages)
+
+    return summarize
+
+
+class ContextWindow:
+    """Bounds the history sent to the LLM for a session.
+
+    The last `max_turns` turns are kept verbatim. Older messages are folded
+    into `session.summary`, incrementally: each message is summarized once,
+    so the cost of a turn does not grow with the length of the session.
+    If the window plus summary exceeds `token_budget`, more turns are folded.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 6,
+        token_budget: int = 3000,
+        summary_tokens: int = 500,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        """Initialize context window.
+
+        Args:
+            max_turns: Number of recent user/assistant turns kept verbatim.
+                       0 sends only the current message.
+            token_budget: Maximum estimated tokens of summary plus history
+            summary_tokens: Maximum estimated tokens of the rolling summary
+            summarizer: Function folding messages into the previous summary
+        """
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or extractive_summary
+
+    def build_messages(self, session: Session) -> List[Message]:
+        """Build the messages to send for the session's latest message."""
+        if not session.messages:
+            return []
+        if self.max_turns <= 0:
+            last = session.messages[-1]
+            return [Message(last["role"], last["content"])]
+
+        window_start = max(session.summarized_count, len(session.messages) - 2 * self.max_turns)
+        self._fold(session, window_start)
+
+        # Fold further turns while over budget, always keeping the latest message
+        recent = session.messages[session.summarized_count :]
+        used = estimate_tokens(session.summary) + sum(estimate_tokens(m["content"]) for m in recent)
+        drop = 0
+        while used > self.token_budget and drop < len(recent) - 1:
+            used -= estimate_tokens(recent[drop]["content"])
+            drop += 1
+        if drop:
+            self._fold(session, session.summarized_count + drop)
+
+        messages = []
+        if session.summary:
+            messages.append(
+                Message("system", f"Summary of the earlier conversation:\n{session.summary}")
+            )
+        for message in session.messages[session.summarized_count :]:
+            messages.append(Message(message["role"], message["content"]))
+        return messages
+
+    def _fold(self, session: Session, end: int) -> None:
+        """Fold session.messages[summarized_count:end] into the summary."""
+        if end <= session.summarized_count:
+            return
+        pending = session.messages[session.summarized_count : end]
+        summary = self.summarizer(session.summary, pending)
+        limit = self.summary_tokens * 4
+        if len(summary) > limit:
+            summary = summary[-limit:].split("\n", 1)[-1]
+        session.summary = summary
+        session.summarized_count = end
+
+
+def _decode_records(lines: List[Any]) -> List[Dict[str, Any]]:
+    """Decode JSONL lines, dropping a torn last line left by a crash mid-append."""
+    lines = [line for line in lines if line.strip()]
+    records = []
+    for i, line in enumerate(lines):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            if i < len(lines) - 1:
+                raise
+    return records
+
+
+def _truncate_torn_tail(path: Path, block_size: int = 65536) -> None:
+    """Cut a partial last line off a log, so appends start on a fresh line."""
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+            if position + read_size == end and block.endswith(b"\n"):
+                return
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                f.truncate(position + newline + 1)
+                return
+        f.truncate(0)
+
+
+class SessionIndex:
+    """Session metadata and message index in the vault database.
+
+    Session logs are mirrored into the `sessions` and `session_messages`
+    tables, with an FTS index over message content, so listing and
+    searching history never has to open the JSONL files. Logs are kept
+    in one directory for all vaults; only sessions whose header names
+    this vault are indexed.
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        """Initialize session index for a vault database."""
+        self.db_manager = db_manager
+        self.vault_path = db_manager.vault_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Lazily open the database connection."""
+        if self._conn is None:
+            self._conn = self.db_manager.connect()
+        return self._conn
+
+    def close(self) -> None:
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def owns(self, header: Dict[str, Any]) -> bool:
+        """Whether a session log header belongs to this index's vault."""
+        return header.get("vault") == str(self.vault_path)
+
+    def add(self, session_id: str, records: List[Dict[str, Any]]) -> None:
+        """Index session log records (header, message and summary lines).
+
+        Records of a session started in another vault are ignored.
+        """
+        if records and records[0]["type"] == "header" and not self.owns(records[0]):
+            return
+        with self._lock, self.conn:
+            for record in records:
+                if record["type"] == "header":
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO sessions (id, created_at, updated_at) "
+                        "VALUES (?, ?, ?)",
+                        (session_id, record["created_at"], record["created_at"]),
+                    )
+                elif record["type"] == "message":
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO session_messages "
+                        "(session_id, seq, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            session_id,
+                            record["seq"],
+                            record["role"],
+                            record["content"],
+                            record.get("timestamp"),
+                        ),
+                    )
+            last = [r["timestamp"] for r in records if r.get("timestamp")]
+            if last:
+                self.conn.execute(
+                    "UPDATE sessions SET updated_at = ? WHERE id = ?", (last[-1], session_id)
+                )
+
+    def index_file(self, path: Path) -> int:
+        """Index an existing JSONL session log, if it belongs to this vault.
+
+        Returns:
+            Number of records indexed
+        """
+        with open(path, encoding="utf-8") as f:
+            records = _decode_records(list(f))
+        if not records or not self.owns(records[0]):
+            return 0
+        self.add(path.stem, records)
+        return len(records)
+
+    def clear(self) -> None:
+        """Drop every indexed session, e.g. before indexing the logs again."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM session_messages")
+            self.conn.execute("DELETE FROM sessions")
+
+    def list(self, since: Optional[datetime] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """List sessions, most recently updated first."""
+        query = (
+            "SELECT s.id, s.created_at, s.updated_at, "
+            "(SELECT COUNT(*) FROM session_messages m WHERE m.session_id = s.id), "
+            "(SELECT content FROM session_messages m "
+            " WHERE m.session_id = s.id AND m.role = 'user' ORDER BY seq LIMIT 1) "
+            "FROM sessions s"
+        )
+        params: List[Any] = []
+        if since is not None:
+            query += " WHERE s.updated_at >= ?"
+            params.append(since.isoformat())
+        query += " ORDER BY s.updated_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return [
+            {
+                "id": row[0],
+                "created_at": row[1],
+                "updated_at": row[2],
+                "message_count": row[3],
+                "title": (row[4] or "")[:80],
+            }
+            for row in rows
+        ]
+
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over session messages, best matches first."""
+        # Quote each term so user input is never parsed as FTS syntax; match prefixes
+        match = " ".join('"' + term.replace('"', '""') + '"*' for term in text.split())
+        if not match:
+            return []
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT m.session_id, m.seq, m.role, m.timestamp, "
+                "snippet(session_messages_fts, 0, '[', ']', '...', 12) "
+                "FROM session_messages_fts "
+                "JOIN session_messages m ON m.id = session_messages_fts.rowid "
+                "WHERE session_messages_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        return [
+            {
+                "session_id": row[0],
+                "seq": row[1],
+                "role": row[2],
+                "timestamp": row[3],
+                "snippet": row[4],
+            }
+            for row in rows
+        ]
+
+
+class SessionWriter:
+    """Background writer appending JSONL records to session logs.
+
+    Records are queued by `append` and written by a daemon thread, so a
+    save never waits on disk I/O. Each batch is flushed to the OS right
+    away; fsync happens after `fsync_every` records or `fsync_interval`
+    seconds, whichever comes first, and always on `flush`/`close`.
+    """
+
+    def __init__(
+        self,
+        fsync_every: int = 32,
+        fsync_interval: float = 1.0,
+        index: Optional[SessionIndex] = None,
+    ):
+        """Initialize and start the writer thread.
+
+        Args:
+            fsync_every: Records written between fsyncs
+            fsync_interval: Maximum seconds between fsyncs
+            index: Also mirror written records into this session index
+        """
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.index = index
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._files: Dict[Path, Any] = {}
+        self._unsynced: set = set()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(
+            target=self._run, name="compass-session-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, path: Path, records: List[Dict[str, Any]]) -> None:
+        """Queue records to be appended to a session log."""
+        if records:
+            self._queue.put((path, records))
+
+    def flush(self) -> None:
+        """Block until all queued records are written and fsynced.
+
+        Raises:
+            Exception: The error that stopped the writer thread, if it died
+        """
+        if not self._thread.is_alive():
+            self._raise_error()
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        # Poll, so a writer thread that dies after the check cannot block us forever
+        while not done.wait(0.1):
+            if not self._thread.is_alive():
+                self._raise_error()
+                return
+
+    def close(self) -> None:
+        """Flush outstanding records and stop the writer thread."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        except Exception as e:
+            # Kept for `flush`, which re-raises it in the caller's thread
+            self._error = e
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                self._sync()
+                continue
+
+            if item is None:
+                self._sync()
+                for f in self._files.values():
+                    f.close()
+                self._files.clear()
+                if self.index is not None:
+                    self.index.close()
+                return
+            if isinstance(item, threading.Event):
+                self._sync()
+                item.set()
+                continue
+
+            path, records = item
+            f = self._files.get(path)
+            if f is None:
+                # A crash mid-append may have left a partial line; drop it
+                _truncate_torn_tail(path)
+                f = self._files[path] = open(path, "a", encoding="utf-8")
+            f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+            f.flush()
+            if self.index is not None:
+                try:
+                    self.index.add(path.stem, records)
+                except sqlite3.Error:
+                    # The JSONL log is authoritative; `compass sessions reindex` repairs
+                    pass
+            self._unsynced.add(path)
+            self._pending += len(records)
+            if (
+                self._pending >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+
+    def _sync(self) -> None:
+        for path in self._unsynced:
+            os.fsync(self._files[path].fileno())
+        self._unsynced.clear()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+
 class SessionManager:
-    """Manages session persistence."""
+    """Manages session persistence.
+
+    Each session is an append-only JSONL log (`<id>.jsonl`): a compact
+    header line followed by one line per message, plus a line whenever
+    the rolling summary changes. Saving appends only what is new, so the
+    cost of a save does not depend on the length of the session.
+    """
 
-    def __init__(self):
-        """Initialize session manager."""
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        writer: Optional[SessionWriter] = None,
+        index: Optional[SessionIndex] = None,
+        vault: Optional[Path] = None,
+    ):
+        """Initialize session manager.
+
+        Args:
+            writer: Background writer for session logs
+            index: Vault session index to mirror saved sessions into
+            vault: Vault that new sessions belong to, recorded in their
+                   header. Defaults to the index's vault
+        """
         self.sessions_dir = ensure_dir(get_state_dir() / "sessions")
+        self.writer = writer or SessionWriter(index=index)
+        if vault is None and index is not None:
+            vault = index.vault_path
+        self.vault = vault.resolve() if vault is not None else None
+        # session id -> (messages persisted, summarized_count persisted)
+        self._persisted: Dict[str, Tuple[int, int]] = {}
 
     def save(self, session: Session) -> Path:
-        """Save session to disk."""
-        session_file = self.sessions_dir / f"{session.id}.json"
-        with open(session_file, "w") as f:
-            json.dump(session.to_dict(), f, indent=2)
+        """Append the session's unsaved messages and summary to its log.
+
+        The write happens on the background writer; call `flush` to wait
+        for it.
+        """
+        session_file = self.sessions_dir / f"{session.id}.jsonl"
+        records: List[Dict[str, Any]] = []
+        if session.id not in self._persisted:
+            self._persisted[session.id] = (0, 0)
+            if not session_file.exists():
+                records.append(
+                    {
+                        "type": "header",
+                        "v": self.FORMAT_VERSION,
+                        "id": session.id,
+                        "created_at": session.created_at.isoformat(),
+                        "vault": str(self.vault) if self.vault is not None else None,
+                    }
+                )
+
+        saved_messages, saved_summarized = self._persisted[session.id]
+        for i, message in enumerate(session.messages[saved_messages:], saved_messages):
+            records.append({"type": "message", "seq": session.base_index + i, **message})
+        if session.summarized_count != saved_summarized:
+            records.append(
+                {
+                    "type": "summary",
+                    "summary": session.summary,
+                    "upto": session.base_index + session.summarized_count,
+                }
+            )
+
+        self._persisted[session.id] = (len(session.messages), session.summarized_count)
+        self.writer.append(session_file, records)
         return session_file
 
-    def load(self, session_id: str) -> Optional[Session]:
-        """Load session from disk."""
+    def flush(self) -> None:
+        """Wait until all saved sessions are on disk."""
+        self.writer.flush()
+
+    def close(self) -> None:
+        """Flush and stop the background writer."""
+        self.writer.close()
+
+    def load(self, session_id: str, tail: Optional[int] = None) -> Optional[Session]:
+        """Load session from disk.
+
+        Args:
+            session_id: Session ID
+            tail: Load only the last `tail` messages, reading the log from
+                  the end. Earlier messages are represented by the summary.
+
+        Returns:
+            Session, or None if it does not exist
+        """
+        session_file = self.sessions_dir / f"{session_id}.jsonl"
+        self.writer.flush()
+        if not session_file.exists():
+            return self._load_legacy(session_id)
+
+        with open(session_file, "rb") as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                # Only a torn header was written: nothing was saved
+                return None
+            if tail is None:
+                records = _decode_records(list(f))
+            else:
+                records = self._read_tail(f, tail)
+
+        session = Session(session_id=header["id"])
+        session.created_at = datetime.fromisoformat(header["created_at"])
+        summary: Optional[Dict[str, Any]] = None
+        message_records = []
+        for record in records:
+            if record["type"] == "message":
+                message_records.append(record)
+            elif record["type"] == "summary":
+                summary = record
+        if tail is not None:
+            message_records = message_records[-tail:] if tail > 0 else []
+        if message_records:
+            session.base_index = message_records[0]["seq"]
+        session.messages = [
+            {k: v for k, v in r.items() if k not in ("type", "seq")} for r in message_records
+        ]
+        if summary is not None:
+            session.summary = summary["summary"]
+            session.summarized_count = max(0, summary["upto"] - session.base_index)
+
+        self._persisted[session.id] = (len(session.messages), session.summarized_count)
+        return session
+
+    def _read_tail(self, f: Any, count: int, block_size: int = 65536) -> List[Dict[str, Any]]:
+        """Read records backwards until `count` messages and a summary are found.
+
+        Once `count` messages are read, at most one more block is searched
+        for a summary, so a session that was never summarized is not read
+        back to its start.
+        """
+        header_end = f.tell()
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        records: List[Dict[str, Any]] = []
+        messages, has_summary = 0, False
+        extra_blocks = 1
+        last_line = True
+        while position > header_end and not has_summary:
+            if messages >= count:
+                if extra_blocks == 0:
+                    break
+                extra_blocks -= 1
+            read_size = min(block_size, position - header_end)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b"\n")
+            # The first piece may be a partial line until we reach the header
+            remainder = lines.pop(0) if position > header_end else b""
+            for line in reversed(lines):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-append is skipped
+                    if not last_line:
+                        raise
+                    last_line = False
+                    continue
+                last_line = False
+                records.append(record)
+                if record["type"] == "message":
+                    messages += 1
+                elif record["type"] == "summary":
+                    has_summary = True
+        records.reverse()
+        return records
+
+    def _load_legacy(self, session_id: str) -> Optional[Session]:
+        """Load a session saved as a single JSON document."""
         session_file = self.sessions_dir / f"{session_id}.json"
         if not session_file.exists():
             return None
@@ -75,8 +670,13 @@ class SessionManager:
         session = Session(session_id=data["id"])
         session.created_at = datetime.fromisoformat(data["created_at"])
         session.messages = data["messages"]
+        session.summary = data.get("summary", "")
+        session.summarized_count = data.get("summarized_count", 0)
         return session
 
     def list_sessions(self) -> list[str]:
         """List all session IDs."""
-        return [f.stem for f in self.sessions_dir.glob("*.json")]
+        return sorted(
+            {f.stem for f in self.sessions_dir.glob("*.jsonl")}
+            | {f.stem for f in self.sessions_dir.glob("*.json")}
+        )
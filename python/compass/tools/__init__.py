@@ -1,3 +1,3 @@
 """Built-in tools and utilities."""
 
-__all__ = ["planner", "decision_journal", "weekly_review"]
+__all__ = ["planner", "decision_journal", "weekly_review", "metrics"]
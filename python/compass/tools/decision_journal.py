@@ -1,26 +1,225 @@
-"""Decision journaling tool."""
+"""Decision journaling tool.
 
-from typing import List, Dict, Any
-from datetime import datetime
+Decisions are stored in the vault database, indexed by time and status,
+with a full-text index over their text. Listing pages with a keyset
+cursor instead of OFFSET, so any page of a journal with years of entries
+is read straight from an index. Nothing leaves the local vault.
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+STATUSES = ("open", "reviewed", "abandoned")
+
+_COLUMNS = (
+    "id, decision, context, expected_outcome, outcome, status, created_at, review_at, reviewed_at"
+)
+
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec="seconds")
+
+
+def _cursor(key: Optional[str], decision_id: int) -> str:
+    return f"{key or ''},{decision_id}"
+
+
+def _parse_cursor(cursor: str) -> Tuple[str, int]:
+    key, _, decision_id = cursor.rpartition(",")
+    try:
+        return key, int(decision_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
 
 
 class DecisionJournal:
-    """Track and review decisions (stub)."""
+    """Track and review decisions."""
+
+    def __init__(self, conn: sqlite3.Connection, review_days: int = 90):
+        """Initialize decision journal.
+
+        Args:
+            conn: Vault database connection
+            review_days: Default days between recording and reviewing a decision
+        """
+        self.conn = conn
+        self.review_days = review_days
 
     def record_decision(
         self,
         decision: str,
-        context: str,
-        expected_outcome: str,
+        context: str = "",
+        expected_outcome: str = "",
+        review_at: Optional[datetime] = None,
+        timestamp: Optional[datetime] = None,
     ) -> Dict[str, Any]:
-        """Record a decision."""
+        """Record a decision.
+
+        Args:
+            decision: What was decided
+            context: Why, and what was known at the time
+            expected_outcome: What the decision should lead to
+            review_at: When to review it. Defaults to `review_days` from now
+            timestamp: When it was made. Defaults to now
+
+        Returns:
+            The stored decision
+        """
+        created = timestamp or datetime.now()
+        review = review_at or created + timedelta(days=self.review_days)
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO decisions (decision, context, expected_outcome, created_at, "
+                "review_at) VALUES (?, ?, ?, ?, ?)",
+                (decision, context, expected_outcome, _timestamp(created), _timestamp(review)),
+            )
+        decision_id = cast(int, cursor.lastrowid)
+        return self.get(decision_id)
+
+    def get(self, decision_id: int) -> Dict[str, Any]:
+        """Get a decision by id.
+
+        Raises:
+            KeyError: If there is no such decision
+        """
+        row = self.conn.execute(
+            f"SELECT {_COLUMNS} FROM decisions WHERE id = ?", (decision_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"No decision {decision_id}")
+        return self._row(row, row[6])
+
+    def list_decisions(
+        self,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """List decisions, newest first.
+
+        Args:
+            limit: Maximum number of decisions
+            cursor: The `cursor` of the last decision of the previous page
+            status: Only decisions with this status
+            since: Only decisions made at or after this time
+            until: Only decisions made before this time
+
+        Returns:
+            Decisions, each with a `cursor` for the page after it
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        if status is not None:
+            where.append("status = ?")
+            params.append(status)
+        if since is not None:
+            where.append("created_at >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            where.append("created_at < ?")
+            params.append(_timestamp(until))
+        if cursor is not None:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(_parse_cursor(cursor))
+        rows = self.conn.execute(
+            f"SELECT {_COLUMNS} FROM decisions"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + " ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [self._row(row, row[6]) for row in rows]
+
+    def due_for_review(
+        self,
+        now: Optional[datetime] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """List open decisions whose review date has passed, most overdue first.
+
+        Args:
+            now: Review dates up to this time are due. Defaults to now
+            limit: Maximum number of decisions
+            cursor: The `cursor` of the last decision of the previous page
+
+        Returns:
+            Decisions, each with a `cursor` for the page after it
+        """
+        query = f"SELECT {_COLUMNS} FROM decisions " "WHERE status = 'open' AND review_at <= ?"
+        params: List[Any] = [_timestamp(now or datetime.now())]
+        if cursor is not None:
+            query += " AND (review_at, id) > (?, ?)"
+            params.extend(_parse_cursor(cursor))
+        rows = self.conn.execute(query + " ORDER BY review_at, id LIMIT ?", (*params, limit))
+        return [self._row(row, row[7]) for row in rows]
+
+    def review(
+        self,
+        decision_id: int,
+        outcome: str,
+        status: str = "reviewed",
+        review_at: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """Record how a decision turned out.
+
+        Args:
+            decision_id: Decision to review
+            outcome: What actually happened
+            status: New status, one of STATUSES. "open" keeps it in the
+                review queue, to be reviewed again at `review_at`
+            review_at: Next review for a decision left open
+
+        Returns:
+            The updated decision
+        """
+        if status not in STATUSES:
+            raise ValueError(f"Unknown status: {status} (use {', '.join(STATUSES)})")
+        if status == "open" and review_at is None:
+            review_at = datetime.now() + timedelta(days=self.review_days)
+        with self.conn:
+            updated = self.conn.execute(
+                "UPDATE decisions SET outcome = ?, status = ?, reviewed_at = ?, "
+                "review_at = COALESCE(?, review_at) WHERE id = ?",
+                (
+                    outcome,
+                    status,
+                    _timestamp(datetime.now()),
+                    _timestamp(review_at) if review_at else None,
+                    decision_id,
+                ),
+            ).rowcount
+        if not updated:
+            raise KeyError(f"No decision {decision_id}")
+        return self.get(decision_id)
+
+    def search(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over decisions, contexts and outcomes, best matches first."""
+        # Quote each term so user input is never parsed as FTS syntax; match prefixes
+        match = " ".join('"' + term.replace('"', '""') + '"*' for term in text.split())
+        if not match:
+            return []
+        rows = self.conn.execute(
+            f"SELECT {', '.join('d.' + c for c in _COLUMNS.split(', '))}, "
+            "snippet(decisions_fts, -1, '[', ']', '...', 12) "
+            "FROM decisions_fts JOIN decisions d ON d.id = decisions_fts.rowid "
+            "WHERE decisions_fts MATCH ? ORDER BY rank LIMIT ?",
+            (match, limit),
+        )
+        return [dict(self._row(row, row[6]), snippet=row[9]) for row in rows]
+
+    def _row(self, row: Tuple[Any, ...], key: Optional[str]) -> Dict[str, Any]:
         return {
-            "decision": decision,
-            "context": context,
-            "expected_outcome": expected_outcome,
-            "timestamp": datetime.now().isoformat(),
+            "id": row[0],
+            "decision": row[1],
+            "context": row[2],
+            "expected_outcome": row[3],
+            "outcome": row[4],
+            "status": row[5],
+            "timestamp": row[6],
+            "review_at": row[7],
+            "reviewed_at": row[8],
+            "cursor": _cursor(key, row[0]),
         }
-
-    def list_decisions(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """List recent decisions (stub)."""
-        return []
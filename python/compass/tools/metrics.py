@@ -0,0 +1,126 @@
+"""Metrics query tool.
+
+Answers questions like "average weight last 30 days" or "monthly steps"
+from the aggregates in the vault database (see compass.metrics), so a
+model gets a one-line answer rather than the raw rows.
+"""
+
+import re
+from typing import Any, Dict, Optional
+from compass.metrics import MetricsStore, now
+
+_FUNCS = {
+    "average": "avg",
+    "avg": "avg",
+    "mean": "avg",
+    "total": "sum",
+    "sum": "sum",
+    "count": "count",
+    "number of": "count",
+    "min": "min",
+    "minimum": "min",
+    "lowest": "min",
+    "max": "max",
+    "maximum": "max",
+    "highest": "max",
+    "stddev": "stddev",
+    "std": "stddev",
+    "variation in": "stddev",
+    "first": "first",
+    "earliest": "first",
+    "last": "last",
+    "latest": "last",
+    "current": "last",
+    "change": "change",
+    "change in": "change",
+}
+_UNITS = {"day": 1, "week": 7, "month": 30, "year": 365}
+_QUESTION = re.compile(
+    r"^(?:(?:what(?:'s| is| was)|show)\s+(?:the\s+|my\s+)*)?"
+    r"(?:(?P<period>weekly|monthly)\s+)?"
+    r"(?:(?P<func>" + "|".join(sorted(map(re.escape, _FUNCS), key=len, reverse=True)) + r")\s+)?"
+    r"(?:of\s+)?(?:my\s+)?(?P<metric>[\w.]+)"
+    r"(?:\s+(?:over|in|for|during)?\s*(?:the\s+)?(?:last|past)\s+(?P<n>\d+)?\s*"
+    r"(?P<unit>day|week|month|year)s?)?\s*\??$",
+    re.IGNORECASE,
+)
+
+
+class MetricsTool:
+    """Answer aggregate questions about vault metrics."""
+
+    def __init__(self, store: MetricsStore):
+        """Initialize with the vault's metrics store."""
+        self.store = store
+
+    def query(
+        self,
+        metric: str,
+        func: str = "avg",
+        days: Optional[float] = None,
+        period: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Aggregate a metric, or list its weekly/monthly rollups.
+
+        Args:
+            metric: Series name, file stem or column
+            func: Aggregate (see compass.metrics.AGGREGATES)
+            days: Only the last `days` days. All time if omitted
+            period: "week" or "month" to get rollups instead of one value
+
+        Returns:
+            The aggregate or rollups, with an `answer` sentence
+        """
+        start = now() - int(days * 86400) if days else None
+        if period is not None:
+            rows = self.store.rollup(metric, period, start=start)
+            name = self.store.resolve(metric)[1]
+            answer = "; ".join(f"{r['start']}: {r['avg']:.4g} (n={r['count']})" for r in rows)
+            return {
+                "series": name,
+                "period": period,
+                "rollups": rows,
+                "answer": f"{period}ly average {name}: {answer or 'no data'}",
+            }
+        result = self.store.aggregate(metric, func, start=start)
+        window = f"last {days:g} days" if days else "all time"
+        if result["value"] is None:
+            latest = self.store.aggregate(metric, "last")
+            result["answer"] = f"No {result['series']} data in the {window}" + (
+                f"; latest is {latest['value']:.4g} on {latest['to']}" if latest["to"] else ""
+            )
+        else:
+            result["answer"] = (
+                f"{func} {result['series']} ({window}): {result['value']:.4g} "
+                f"from {result['count']} point(s), {result['from']} to {result['to']}"
+            )
+        return result
+
+    def ask(self, question: str) -> Dict[str, Any]:
+        """Answer a short question such as "average weight last 30 days".
+
+        Raises:
+            ValueError: If the question is not understood
+        """
+        match = _QUESTION.match(question.strip())
+        if match is None:
+            raise ValueError(
+                f"Could not understand '{question}'. Try e.g. 'average weight last 30 days'"
+            )
+        days = None
+        if match["unit"]:
+            days = int(match["n"] or 1) * _UNITS[match["unit"].lower()]
+        period = {"weekly": "week", "monthly": "month"}.get((match["period"] or "").lower())
+        func = _FUNCS[" ".join(match["func"].lower().split())] if match["func"] else "avg"
+        return self.query(match["metric"], func, days=days, period=period)
+
+
+def describe(store: MetricsStore) -> str:
+    """Summarize the available series in one line per series, for a prompt."""
+    return (
+        "\n".join(
+            f"- {s['name']}: {s['points']} points, {s['first']} to {s['last']}"
+            for s in store.series()
+        )
+        or "No metrics loaded"
+    )
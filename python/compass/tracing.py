@@ -0,0 +1,181 @@
+"""Lightweight span tracing for hot paths.
+
+Spans time a stage of work (walk, load, chunk, embed, retrieve, ...) and
+are emitted as `span` events through RunLogger, so they end up in the
+local runs.jsonl next to the command history. `compass stats` aggregates
+them into per-stage latency percentiles.
+
+Tracing is off unless enabled with `trace.enabled = true` in config or
+COMPASS_TRACE=1. When off, `span()` returns a shared no-op object, so
+instrumented code pays for a single flag check.
+"""
+
+import math
+import os
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+if TYPE_CHECKING:
+    from compass.logging import RunLogger
+
+T = TypeVar("T")
+
+_enabled = os.environ.get("COMPASS_TRACE", "") not in ("", "0")
+_logger: Optional["RunLogger"] = None
+
+
+def enable(logger: Optional["RunLogger"] = None) -> None:
+    """Enable tracing, emitting spans through the given logger.
+
+    Spans go to the default runs.jsonl logger when no logger is given.
+    """
+    global _enabled, _logger
+    _enabled = True
+    _logger = logger
+
+
+def disable() -> None:
+    """Disable tracing."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Check whether tracing is enabled."""
+    return _enabled
+
+
+def _emit(name: str, duration_ms: float, attrs: dict) -> None:
+    from compass.logging import get_run_logger
+
+    logger = _logger or get_run_logger()
+    logger.log("span", {"name": name, "duration_ms": round(duration_ms, 3), **attrs})
+
+
+class Span:
+    """A timed stage. Use via `span()` as a context manager."""
+
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = 0.0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _emit(self.name, (time.perf_counter() - self.start) * 1000, self.attrs)
+
+    def set(self, **attrs: Any) -> None:
+        """Attach attributes, e.g. the number of items processed."""
+        self.attrs.update(attrs)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, **attrs: Any) -> Any:
+    """Time a block of code as a named span.
+
+    Example:
+        with span("ingest.embed") as s:
+            vectors = embedder.embed_batch(texts)
+            s.set(count=len(texts))
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attrs)
+
+
+def traced(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator recording each call of a function as a span."""
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def trace_stream(parts: Iterable[str], name: str = "llm") -> Iterator[str]:
+    """Pass through a streamed completion, recording time to first token
+    (`<name>.ttft`) and total completion time (`<name>.complete`)."""
+    if not _enabled:
+        yield from parts
+        return
+    start = time.perf_counter()
+    first = True
+    count = 0
+    for part in parts:
+        if first:
+            _emit(f"{name}.ttft", (time.perf_counter() - start) * 1000, {})
+            first = False
+        count += 1
+        yield part
+    _emit(f"{name}.complete", (time.perf_counter() - start) * 1000, {"count": count})
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize_spans(entries: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+    """Aggregate `span` log entries into per-stage latency statistics.
+
+    Returns:
+        Mapping of span name to count, p50/p95/p99/max and total duration
+        in milliseconds, and the number of items processed (from `count`
+        attributes)
+    """
+    durations: Dict[str, List[float]] = defaultdict(list)
+    items: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        if entry.get("type") != "span":
+            continue
+        data = entry["data"]
+        durations[data["name"]].append(data["duration_ms"])
+        items[data["name"]] += data.get("count", 0)
+
+    summary = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+            "total_ms": sum(values),
+            "items": items[name],
+        }
+    return summary
@@ -6,12 +6,19 @@ No data is sent to cloud services unless explicitly configured by the user
 (e.g., when using cloud LLM providers for queries).
 """
 
+import json
+import os
 from pathlib import Path
-from typing import Optional
-import toml
-from compass.paths import ensure_dir
+from typing import Dict, List, Optional
+from compass.paths import ensure_dir, get_state_dir, get_vault_path
 from compass.db.manager import DatabaseManager
 
+# Marker file whose presence makes a directory a vault
+MARKER = os.path.join(".compass", "profile.toml")
+
+# Most start directories remembered by the discovery cache
+DISCOVERY_CACHE_SIZE = 256
+
 
 class Vault:
     """Vault manager for Compass.
@@ -54,6 +61,8 @@ class Vault:
         # Initialize local database (stored in .compass/compass.db)
         self.db_manager.ensure_database()
 
+        import toml
+
         # Create default profile
         profile = {
             "vault": {
@@ -66,6 +75,8 @@ class Vault:
         }
         with open(self.config_file, "w") as f:
             toml.dump(profile, f)
+        # A new vault may be nearer than a cached discovery result
+        get_discovery_cache_path().unlink(missing_ok=True)
 
         # Create sample command
         sample_command = self.commands_dir / "daily.md"
@@ -89,6 +100,8 @@ class Vault:
         """Get vault profile configuration."""
         if not self.config_file.exists():
             return {}
+        import toml
+
         return toml.load(self.config_file)
     
     def get_database_path(self) -> Path:
@@ -103,20 +116,155 @@ class Vault:
         """Get a connection to the vault's local database.
         
         Returns:
-            SQLite connection object
+            This thread's pooled SQLite connection (closed by db_manager.close())
         """
         return self.db_manager.get_connection()
 
 
-def find_vault(start_path: Optional[Path] = None) -> Optional[Path]:
-    """Find vault by searching up directory tree."""
-    if start_path is None:
-        start_path = Path.cwd()
+def get_discovery_cache_path() -> Path:
+    """Get the file caching vault discovery results."""
+    return get_state_dir() / "vaults.json"
+
+
+def _marker_stamp(vault_path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(os.path.join(vault_path, MARKER))
+    except OSError:
+        return None
+    return [st.st_ino, st.st_mtime_ns]
+
+
+def _read_discovery_cache() -> Dict[str, List]:
+    try:
+        with open(get_discovery_cache_path(), encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return entries if isinstance(entries, dict) else {}
+
+
+def _write_discovery_cache(entries: Dict[str, List]) -> None:
+    path = get_discovery_cache_path()
+    while len(entries) > DISCOVERY_CACHE_SIZE:
+        entries.pop(next(iter(entries)))
+    try:
+        ensure_dir(path.parent)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps(entries), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def find_vault(start_path: Optional[Path] = None, use_cache: bool = True) -> Optional[Path]:
+    """Find vault by searching up directory tree.
+
+    Results are cached per start directory in the state directory. A
+    cached result is reused while the vault's marker file keeps the same
+    inode and mtime and the start directory is unchanged (a vault created
+    right there changes its mtime), so a hit costs two stats. Vaults made
+    by `compass init` anywhere drop the cache. Directories with no vault
+    are not cached.
+
+    Args:
+        start_path: Directory to search from. Defaults to the current directory
+        use_cache: Consult and update the discovery cache
+
+    Returns:
+        Path of the nearest vault, or None
+    """
+    start = str((start_path or Path.cwd()).resolve())
+    entries = _read_discovery_cache() if use_cache else {}
+    cached = entries.get(start)
+    if (
+        cached is not None
+        and len(cached) == 4
+        and _marker_stamp(cached[0]) == cached[1:3]
+        and _mtime(start) == cached[3]
+    ):
+        return Path(cached[0])
+
+    current = start
+    while True:
+        stamp = _marker_stamp(current)
+        if stamp is not None:
+            if use_cache:
+                entries.pop(start, None)
+                entries[start] = [current, *stamp, _mtime(start)]
+                _write_discovery_cache(entries)
+            return Path(current)
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def resolve_vault_path(vault: Optional[Path] = None) -> Optional[Path]:
+    """Resolve the vault to use for a command.
+
+    Checked in order: an explicit path, COMPASS_VAULT, the
+    `vault.default_path` setting, then discovery from the current
+    directory. The first two skip reading config and the directory walk.
+
+    Args:
+        vault: Explicit vault path (e.g. from --vault)
+
+    Returns:
+        Vault path, or None if none is configured or found
+    """
+    if vault is not None:
+        return vault.resolve()
+    if env_path := get_vault_path():
+        return env_path
+    from compass.config import Config
+
+    if default_path := Config().get("vault.default_path"):
+        return Path(default_path).expanduser()
+    return find_vault()
+
+
+def resolve_vault_paths(values: Optional[List[str]] = None) -> List[Path]:
+    """Resolve one or more --vault values, expanding vault groups.
+
+    A value naming a group under `[vault.groups]` in config expands to the
+    group's paths; any other value is a path. With no values this is
+    resolve_vault_path() (an empty list if no vault is found).
+
+    Args:
+        values: Paths or group names, in order
+
+    Returns:
+        Vault paths without duplicates, in the given order
+    """
+    if not values:
+        vault_path = resolve_vault_path()
+        return [vault_path] if vault_path is not None else []
+    groups: Dict[str, List[str]] = {}
+    if any(not os.path.exists(value) for value in values):
+        from compass.config import Config
+
+        groups = Config().get("vault.groups", {})
+    paths: List[Path] = []
+    for value in values:
+        members = groups.get(value) if not os.path.exists(value) else None
+        for member in members or [value]:
+            path = Path(member).expanduser().resolve()
+            if path not in paths:
+                paths.append(path)
+    return paths
+
 
-    current = start_path.resolve()
-    while current != current.parent:
-        vault = Vault(current)
-        if vault.exists():
-            return current
-        current = current.parent
-    return None
+def vault_labels(paths: List[Path]) -> List[str]:
+    """Short names for vaults in citations: the directory name, or the full
+    path where two vaults share a directory name."""
+    names = [path.name for path in paths]
+    return [
+        name if names.count(name) == 1 else str(path) for name, path in zip(names, paths)
+    ]
@@ -50,3 +50,30 @@ def test_exec_help():
     """Test exec --help."""
     result = runner.invoke(app, ["exec", "--help"])
     assert result.exit_code == 0
+
+
+def test_profile(tmp_path, monkeypatch):
+    """Test --profile saves a CPU profile and allocation report."""
+    monkeypatch.setenv("COMPASS_STATE_HOME", str(tmp_path))
+    result = runner.invoke(app, ["--profile", "config", "show"])
+    assert result.exit_code == 0
+    assert "Hot functions" in result.stdout
+    assert len(list((tmp_path / "profiles").glob("config-*.prof"))) == 1
+    assert len(list((tmp_path / "profiles").glob("config-*-alloc.txt"))) == 1
+
+
+def test_module_entry_point_has_all_commands():
+    """Test that `python -m compass.cli` registers every command group."""
+    import os
+    import subprocess
+    import sys
+
+    output = subprocess.run(
+        [sys.executable, "-m", "compass.cli", "--help"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, COLUMNS="200"),
+    ).stdout
+    for group in ("sessions", "db", "index", "dedupe", "metrics", "journal"):
+        assert f" {group} " in output
@@ -52,3 +52,88 @@ def test_config_default_value(temp_config):
     """Test default value for missing keys."""
     config = Config(temp_config)
     assert config.get("nonexistent", "default") == "default"
+
+
+def test_config_cache_reuses_parse(temp_config, monkeypatch):
+    """Test that repeated construction parses the file once until it changes."""
+    import toml
+    from compass import config as config_module
+
+    temp_config.write_text('[llm]\nprovider = "ollama"\n')
+    config_module.clear_cache()
+    calls = []
+    real_load = toml.load
+    monkeypatch.setattr(toml, "load", lambda path: calls.append(path) or real_load(path))
+
+    assert Config(temp_config).get("llm.provider") == "ollama"
+    assert Config(temp_config).get("llm.provider") == "ollama"
+    assert len(calls) == 1
+
+    temp_config.write_text('[llm]\nprovider = "anthropic"\n')
+    assert Config(temp_config).get("llm.provider") == "anthropic"
+    assert len(calls) == 2
+
+
+def test_config_instances_are_independent(temp_config):
+    """Test that set() on one cached instance does not leak into another."""
+    config1 = Config(temp_config)
+    config1.set("llm.model", "changed")
+    assert config1.get("llm.model") == "changed"
+    assert Config(temp_config).get("llm.model") == "gpt-4"
+
+
+def test_config_profile_layering(temp_config, tmp_path):
+    """Test that a vault profile overrides the user config but is not saved into it."""
+    temp_config.write_text('[llm]\nmodel = "user-model"\ntemperature = 0.2\n')
+    profile = tmp_path / "profile.toml"
+    profile.write_text('[llm]\nmodel = "vault-model"\n')
+
+    config = Config(temp_config, profile_path=profile)
+    assert config.get("llm.model") == "vault-model"
+    assert config.get("llm.temperature") == 0.2
+    assert config.is_set("llm.model")
+
+    config.set("user.name", "Ada")
+    config.save()
+    saved = Config(temp_config)
+    assert saved.get("llm.model") == "user-model"
+    assert saved.get("user.name") == "Ada"
+
+
+def test_config_snapshot(temp_config, tmp_path, monkeypatch):
+    """Test that a cold load reads the snapshot instead of parsing TOML."""
+    import toml
+    from compass import config as config_module
+
+    temp_config.write_text('[llm]\nprovider = "google"\n')
+    snapshot = tmp_path / "config.snapshot"
+    Config(temp_config, snapshot_path=snapshot)
+    assert snapshot.exists()
+
+    config_module.clear_cache()
+    monkeypatch.setattr(toml, "load", lambda path: pytest.fail("TOML was parsed"))
+    assert Config(temp_config, snapshot_path=snapshot).get("llm.provider") == "google"
+
+
+def test_config_set_parses_values(tmp_path, monkeypatch):
+    """Test that `config set` stores booleans and numbers rather than strings."""
+    from typer.testing import CliRunner
+    from compass.cli import app
+    from compass.config import parse_value
+
+    assert parse_value("false") is False
+    assert parse_value("0.85") == 0.85
+    assert parse_value("30") == 30
+    assert parse_value('["a", "b"]') == ["a", "b"]
+    assert parse_value('"30"') == "30"
+    assert parse_value("gpt-4") == "gpt-4"
+
+    for name in ("CONFIG", "CACHE"):
+        monkeypatch.setenv(f"COMPASS_{name}_HOME", str(tmp_path))
+    runner = CliRunner()
+    for key, value in (("trace.enabled", "false"), ("dedupe.threshold", "0.8")):
+        result = runner.invoke(app, ["config", "set", key, value])
+        assert result.exit_code == 0, result.output
+    cfg = Config(tmp_path / "config.toml")
+    assert cfg.get("trace.enabled") is False
+    assert cfg.get("dedupe.threshold") == 0.8
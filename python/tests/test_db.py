@@ -0,0 +1,345 @@
+"""Tests for the vault database layer."""
+
+import sqlite3
+import threading
+from array import array
+import pytest
+from compass.db.manager import DatabaseManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """Create a database manager for a temporary vault."""
+    manager = DatabaseManager(tmp_path)
+    yield manager
+    manager.close()
+
+
+def test_connections_are_tuned(manager):
+    """Test that pooled connections use WAL and the performance pragmas."""
+    conn = manager.get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -64 * 1024
+
+
+def test_connections_are_pooled_per_thread(manager):
+    """Test that each thread reuses its own connection."""
+    conn = manager.get_connection()
+    assert manager.get_connection() is conn
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.get_connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+    stats = manager.pool_stats()
+    assert stats["opened"] == 2
+    assert stats["reused"] == 1
+    assert stats["open"] == 2
+
+
+def test_closed_connection_is_reopened(manager):
+    """Test that a pooled connection closed by a caller is replaced."""
+    conn = manager.get_connection()
+    conn.close()
+    assert manager.get_connection().execute("SELECT 1").fetchone() == (1,)
+    assert manager.pool_stats()["reopened"] == 1
+
+
+def test_reader_not_blocked_by_writer(manager):
+    """Test that readers see committed rows while a write transaction is open."""
+    writer = manager.get_connection()
+    with writer:
+        writer.execute("INSERT INTO documents (path, content) VALUES ('a.md', 'old')")
+
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("INSERT INTO documents (path, content) VALUES ('b.md', 'new')")
+    counts = []
+    thread = threading.Thread(
+        target=lambda: counts.append(
+            manager.get_reader().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        )
+    )
+    thread.start()
+    thread.join(timeout=2)
+    writer.commit()
+    assert counts == [1]
+
+    with pytest.raises(sqlite3.OperationalError):
+        manager.get_reader().execute("DELETE FROM documents")
+
+
+def test_new_database_is_current(manager):
+    """Test that a new database is created at the latest schema version."""
+    from compass.db.migrate import get_version, latest_version
+
+    conn = manager.get_connection()
+    assert get_version(conn) == latest_version()
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {"idx_documents_hash", "idx_chunks_document_position"} <= indexes
+    assert "idx_chunks_document_id" not in indexes
+
+
+def test_old_vault_is_migrated_in_place(tmp_path):
+    """Test that a pre-versioning database gets indexes and backfilled hashes and vectors."""
+    from pathlib import Path
+    from compass.db import migrate
+
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((Path(migrate.__file__).parent / "schema.sql").read_text())
+    conn.executemany(
+        "INSERT INTO documents (path, content) VALUES (?, ?)",
+        [(f"note{i}.md", f"text {i}") for i in range(7)],
+    )
+    conn.execute(
+        "INSERT INTO chunks (document_id, content, embedding) VALUES (1, 'text 0', ?)",
+        (array("f", [3.0, 4.0]).tobytes(),),
+    )
+    conn.commit()
+    conn.close()
+
+    assert migrate.migrate(db_path, version=2, batch_size=3) == 2
+    assert migrate.migrate(db_path, batch_size=3) == migrate.latest_version()
+
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM documents WHERE hash IS NULL").fetchone()[0] == 0
+    centroids = [row[0] for row in conn.execute("SELECT centroid FROM documents ORDER BY id")]
+    assert list(array("f", centroids[0])) == pytest.approx([0.6, 0.8])
+    assert centroids[1:] == [b""] * 6
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM chunks WHERE document_id = ? ORDER BY position", (1,)
+    ).fetchall()
+    assert "COVERING INDEX idx_chunks_document_position" in plan[0][3]
+    conn.close()
+
+
+def test_concurrent_migrations(tmp_path):
+    """Test that processes opening an old vault at once each migrate it safely."""
+    import subprocess
+    import sys
+    from pathlib import Path
+    from compass.db import migrate
+
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript((Path(migrate.__file__).parent / "schema.sql").read_text())
+    conn.executemany(
+        "INSERT INTO documents (path, content) VALUES (?, ?)",
+        [(f"note{i}.md", f"text {i}") for i in range(50)],
+    )
+    conn.commit()
+    conn.close()
+
+    code = f"from compass.db.migrate import migrate; print(migrate({str(db_path)!r}, batch_size=5))"
+    procs = [
+        subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+        for _ in range(4)
+    ]
+    results = [(proc.communicate()[0].strip(), proc.returncode) for proc in procs]
+    assert results == [(str(migrate.latest_version()), 0)] * 4
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT COUNT(*) FROM documents WHERE hash IS NULL").fetchone()[0] == 0
+    conn.close()
+
+
+def test_optimize_reclaims_space(manager):
+    """Test that optimize runs its steps and returns deleted pages to the OS."""
+    from compass.db import maintenance
+
+    conn = manager.get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO documents (path, content) VALUES (?, ?)",
+            [(f"note{i}.md", "x" * 2000) for i in range(200)],
+        )
+    with conn:
+        conn.execute("DELETE FROM documents")
+    report = maintenance.storage_report(conn)
+    assert report["auto_vacuum"] == "incremental"
+    assert report["free_pages"] > 0
+
+    planned = maintenance.optimize(conn, dry_run=True)
+    assert [step["name"] for step in planned["steps"]][:2] == ["analyze", "incremental_vacuum"]
+    assert maintenance.storage_report(conn)["free_pages"] == report["free_pages"]
+
+    steps = []
+    result = maintenance.optimize(conn, progress=steps.append)
+    assert "fts_optimize:session_messages_fts" in steps
+    assert result["after"] < result["before"]
+    assert maintenance.storage_report(conn)["free_pages"] == 0
+    assert maintenance.last_run(conn) is not None
+
+
+def test_idle_optimize_waits_for_quiet_and_interval(manager):
+    """Test that idle maintenance skips busy vaults and recent runs."""
+    import time
+    from datetime import timedelta
+    from compass.db import maintenance
+
+    conn = manager.get_connection()
+    assert maintenance.idle_reason(conn, time.time()) == "database was written recently"
+    assert maintenance.idle_reason(conn, time.time() - 3600) is None
+
+    maintenance.optimize(conn)
+    assert maintenance.idle_reason(conn, 0.0).startswith("last run")
+    assert maintenance.idle_reason(conn, 0.0, interval=timedelta(0)) is None
+
+
+def test_query_plans_use_indexes(manager):
+    """Test that the standard hot-path queries are planned with indexes."""
+    from compass.db import maintenance
+
+    plans = maintenance.query_plans(manager.get_connection())
+    assert set(plans) == set(maintenance.STANDARD_QUERIES)
+    assert "idx_chunks_document_position" in plans["ingest.replace_chunks"][0]
+    assert "PRIMARY KEY (band=? AND bucket=?)" in plans["ingest.dedupe_candidates"][0]
+    assert "idx_chunks_document_position" in plans["retrieve.fine"][0]
+    assert "COVERING INDEX idx_decisions_status_created_at" in plans["journal.page"][0]
+    assert "idx_decisions_due" in plans["journal.due"][0]
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Create a vault database with inline and compressed documents."""
+    from compass.ingest.chunking import SimpleChunker
+    from compass.ingest.pipeline import IngestionPipeline
+    from compass.rag.embed import DummyEmbedder
+
+    for name in ("inline", "packed"):
+        notes = tmp_path / "notes" / name
+        notes.mkdir(parents=True)
+        for i in range(5):
+            (notes / f"note{i}.md").write_text(f"Note {i} about {name} storage. " * 20)
+    manager = DatabaseManager(tmp_path / "source")
+    for name, storage in (("inline", "inline"), ("packed", "compressed")):
+        IngestionPipeline(SimpleChunker(120, 20), DummyEmbedder(), storage=storage).ingest(
+            tmp_path / "notes" / name, manager.get_connection()
+        )
+    yield manager
+    manager.close()
+
+
+@pytest.mark.parametrize("precision", ["int8", "float32"])
+def test_snapshot_roundtrip(source, manager, tmp_path, precision):
+    """Test that an imported snapshot restores documents, chunk text and retrieval."""
+    from compass.db.snapshot import export_snapshot, import_snapshot
+    from compass.rag.embed import DummyEmbedder
+    from compass.rag.retrieve import VectorRetriever
+
+    snapshot = tmp_path / "index.snap"
+    header = export_snapshot(source.get_connection(), snapshot, quantization=precision)
+    assert header["counts"]["documents"] == 10
+    import_snapshot(manager.get_connection(), snapshot)
+
+    query = "Note 3 about packed storage. "
+    before = VectorRetriever(source.get_connection(), DummyEmbedder()).retrieve(query)
+    after = VectorRetriever(manager.get_connection(), DummyEmbedder()).retrieve(query)
+    assert [r["id"] for r in after] == [r["id"] for r in before]
+    assert [r["content"] for r in after] == [r["content"] for r in before]
+    for old, new in zip(before, after):
+        assert new["score"] == pytest.approx(old["score"], abs=0.02)
+
+
+def test_snapshot_import_validates(source, manager, tmp_path):
+    """Test that corrupt snapshots and non-empty vaults are refused untouched."""
+    from compass.db.snapshot import SnapshotError, export_snapshot, import_snapshot
+
+    snapshot = tmp_path / "index.snap"
+    export_snapshot(source.get_connection(), snapshot)
+    data = bytearray(snapshot.read_bytes())
+    data[200] ^= 0xFF
+    corrupt = tmp_path / "corrupt.snap"
+    corrupt.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match="Checksum"):
+        import_snapshot(manager.get_connection(), corrupt)
+    assert manager.get_connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 0
+
+    with pytest.raises(SnapshotError):
+        import_snapshot(source.get_connection(), snapshot)
+    import_snapshot(source.get_connection(), snapshot, replace=True)
+
+
+def test_snapshot_export_is_consistent(source, tmp_path, monkeypatch):
+    """Test that rows committed while exporting do not leave chunks without a document."""
+    from compass.db import snapshot
+    from compass.ingest.chunking import SimpleChunker
+    from compass.ingest.pipeline import IngestionPipeline
+    from compass.rag.embed import DummyEmbedder
+
+    (tmp_path / "late").mkdir()
+    (tmp_path / "late" / "late.md").write_text("Written during the export.")
+    rows = snapshot._rows
+
+    def rows_then_ingest(conn, sql):
+        if sql.startswith("SELECT id, document_id"):
+            IngestionPipeline(SimpleChunker(120, 20), DummyEmbedder()).ingest(
+                tmp_path / "late", source.get_connection()
+            )
+        return rows(conn, sql)
+
+    monkeypatch.setattr(snapshot, "_rows", rows_then_ingest)
+    header = snapshot.export_snapshot(source.get_reader(), tmp_path / "index.snap")
+    assert header["counts"]["documents"] == 10
+    with snapshot.Snapshot(tmp_path / "index.snap") as snap:
+        documents = {d["id"] for d in snap.records("documents")}
+        assert {c["document_id"] for c in snap.records("chunks")} <= documents
+
+
+def test_dequantize_without_numpy(monkeypatch):
+    """Test that the pure Python dequantize matches the numpy one."""
+    from array import array
+    from compass.db import snapshot
+
+    data, scale = snapshot.quantize(array("f", [0.5, -0.25, 0.125, 0.0]))
+    fast = snapshot.dequantize(data, scale)
+    monkeypatch.setattr(snapshot, "_numpy", lambda: None)
+    assert snapshot.dequantize(data, scale) == fast
+    assert array("f", fast).tolist() == pytest.approx([0.5, -0.25, 0.125, 0.0], abs=0.01)
+
+
+def test_chunk_store_stays_within_budget(manager):
+    """Test that the hot tier evicts least recently used documents to respect its
+    byte budget, that full scans do not evict, and that hit rates are reported."""
+    from compass.db.chunkstore import ChunkStore, HotTier
+
+    conn = manager.get_connection()
+    with conn:
+        for doc in range(1, 11):
+            conn.execute(
+                "INSERT INTO documents (id, path, content) VALUES (?, ?, '')", (doc, str(doc))
+            )
+            conn.executemany(
+                "INSERT INTO chunks (document_id, content, embedding, position) "
+                "VALUES (?, '', ?, ?)",
+                [(doc, array("f", [doc, i, 1.0] * 100).tobytes(), i) for i in range(20)],
+            )
+    probe = ChunkStore(conn, HotTier(1 << 30))
+    size = next(probe.documents([1]))[1].nbytes + 200
+    store = ChunkStore(conn, HotTier(3 * size))
+
+    assert [doc for doc, _ in store.documents([1, 2, 3, 4])] == [1, 2, 3, 4]
+    assert store.hot.stats()["entries"] == 3
+    assert store.hot.used_bytes <= store.hot.budget_bytes
+    list(store.documents([3, 4]))
+    assert store.stats()["hits"] == 2
+    assert store.hot.evictions == 1
+
+    # A full scan reads every document but keeps the working set
+    assert len(list(store.documents())) == 10
+    list(store.documents([2, 3, 4]))
+    stats = store.stats()
+    assert stats["hits"] == 2 + 3 + 3
+    assert stats["evictions"] == 1
+    assert stats["hit_rate"] == pytest.approx(8 / 19)
+
+    block = next(store.documents([5]))[1]
+    chunk_id, vector, norm = next(iter(block))
+    assert list(vector[:3]) == [5.0, 0.0, 1.0]
+    assert norm == pytest.approx((100 * 26) ** 0.5)
+
+    store.close()
+    assert store.hot.used_bytes == 0
@@ -0,0 +1,77 @@
+"""Tests for the decision journal."""
+
+from datetime import datetime, timedelta
+import pytest
+from compass.db.manager import DatabaseManager
+from compass.tools.decision_journal import DecisionJournal
+
+START = datetime(2024, 1, 1, 9, 0)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """A decision journal over a fresh vault database."""
+    manager = DatabaseManager(tmp_path)
+    yield DecisionJournal(manager.get_connection(), review_days=30)
+    manager.close()
+
+
+def test_pages_walk_every_decision_once(journal):
+    """Test keyset pagination, including decisions recorded at the same time."""
+    for i in range(25):
+        journal.record_decision(f"decision {i}", timestamp=START + timedelta(days=i // 2))
+    pages, cursor = [], None
+    while True:
+        page = journal.list_decisions(limit=4, cursor=cursor)
+        if not page:
+            break
+        pages.append([row["id"] for row in page])
+        cursor = page[-1]["cursor"]
+    assert len(pages) == 7
+    assert sum(pages, []) == list(range(25, 0, -1))
+
+    window = journal.list_decisions(
+        limit=50, since=START + timedelta(days=3), until=START + timedelta(days=5)
+    )
+    assert [row["id"] for row in window] == [10, 9, 8, 7]
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        journal.list_decisions(cursor="yesterday")
+
+
+def test_due_for_review_and_outcomes(journal):
+    """Test the review queue, reviewing and filtering by status."""
+    for i in range(6):
+        journal.record_decision(f"decision {i}", timestamp=START + timedelta(days=i))
+    first = journal.get(1)
+    assert (first["status"], first["review_at"]) == ("open", "2024-01-31T09:00:00")
+
+    now = START + timedelta(days=33)
+    due = journal.due_for_review(now=now, limit=2)
+    assert [row["id"] for row in due] == [1, 2]
+    after = journal.due_for_review(now=now, cursor=due[-1]["cursor"])
+    assert [row["id"] for row in after] == [3, 4]
+
+    journal.review(1, "Worked out", status="reviewed")
+    journal.review(2, "Too early to tell", status="open", review_at=now + timedelta(days=10))
+    journal.review(3, "Dropped it", status="abandoned")
+    assert [row["id"] for row in journal.due_for_review(now=now)] == [4]
+    assert [row["id"] for row in journal.list_decisions(status="open")] == [6, 5, 4, 2]
+    assert journal.get(1)["outcome"] == "Worked out"
+    with pytest.raises(ValueError, match="Unknown status"):
+        journal.review(4, "?", status="done")
+    with pytest.raises(KeyError):
+        journal.review(99, "?")
+
+
+def test_search_covers_context_and_outcomes(journal):
+    """Test full-text search over decision text, context and recorded outcomes."""
+    journal.record_decision("Switch to a standing desk", context="Back pain from sitting")
+    journal.record_decision("Plant tomatoes in May", expected_outcome="A big harvest")
+    journal.record_decision("Learn Rust", context="Curious about ownership")
+    assert [row["id"] for row in journal.search("back pain")] == [1]
+    assert [row["id"] for row in journal.search("harv")] == [2]
+    journal.review(2, "Blight ruined the crop")
+    result = journal.search("blight")
+    assert [row["id"] for row in result] == [2]
+    assert "[Blight]" in result[0]["snippet"]
+    assert journal.search('"') == []
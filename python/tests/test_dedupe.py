@@ -0,0 +1,104 @@
+"""Tests for near-duplicate detection."""
+
+import pytest
+from compass.db.manager import DatabaseManager
+from compass.ingest.chunking import SimpleChunker
+from compass.ingest.dedupe import Deduplicator, report, sign_missing, signature, similarity
+from compass.ingest.pipeline import IngestionPipeline
+from compass.rag.embed import DummyEmbedder
+from compass.rag.retrieve import VectorRetriever
+
+NOTE = (
+    "Plant tomatoes in May after the last frost. Water them deeply twice a week and "
+    "stake the vines once they reach knee height. Pinch off suckers to keep the plants "
+    "tidy and feed with compost in midsummer."
+)
+
+
+@pytest.fixture
+def notes(tmp_path):
+    """Create notes with an exact copy, a lightly edited draft and an unrelated note."""
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    (notes / "a_garden.md").write_text(NOTE)
+    (notes / "b_garden copy.md").write_text(NOTE)
+    (notes / "c_garden draft.md").write_text(NOTE.replace("twice a week", "every few days"))
+    (notes / "d_books.md").write_text("Finish reading the history book before the club meets.")
+    return notes
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """Open a vault database."""
+    manager = DatabaseManager(tmp_path)
+    yield manager.get_connection()
+    manager.close()
+
+
+def test_signature_estimates_jaccard():
+    """Test that signatures are close for edited copies and far for unrelated text."""
+    draft = signature(NOTE.replace("twice a week", "every few days"))
+    assert similarity(signature(NOTE), signature(NOTE)) == 1.0
+    assert similarity(signature(NOTE), draft) > 0.6
+    assert similarity(signature(NOTE), signature("Finish reading the history book.")) < 0.1
+    assert signature("") is None
+
+
+def test_flagged_duplicates_are_reported_and_not_retrieved(notes, conn):
+    """Test that flagged copies stay in the vault but out of retrieval results."""
+    pipeline = IngestionPipeline(
+        SimpleChunker(1000, 0), DummyEmbedder(), dedupe=Deduplicator(0.6, "flag")
+    )
+    stats = pipeline.ingest(notes, conn)
+    assert (stats["stored"], stats["duplicates"]) == (4, 2)
+
+    results = VectorRetriever(conn, DummyEmbedder()).retrieve(NOTE, top_k=4)
+    assert [r["metadata"]["source"] for r in results if r["content"] == NOTE] == [
+        str(notes / "a_garden.md")
+    ]
+
+    clusters = report(conn, threshold=0.6)
+    assert len(clusters) == 1
+    assert clusters[0]["original"]["path"].endswith("a_garden.md")
+    assert [d["similarity"] for d in clusters[0]["duplicates"]][0] == 1.0
+    assert report(conn, threshold=0.99)[0]["duplicates"][0]["path"].endswith("copy.md")
+
+
+def test_duplicates_are_rechecked_when_original_changes(notes, conn):
+    """Test that copies of a rewritten original are matched again, not left hidden."""
+    pipeline = IngestionPipeline(
+        SimpleChunker(1000, 0), DummyEmbedder(), dedupe=Deduplicator(0.6, "flag")
+    )
+    pipeline.ingest(notes, conn)
+    (notes / "a_garden.md").write_text("Book the car in for a service before the long drive.")
+    stats = pipeline.ingest(notes, conn)
+    assert (stats["stored"], stats["duplicates"]) == (1, 0)
+
+    # One former copy becomes the original, the other is flagged against it
+    copies = conn.execute(
+        "SELECT id, duplicate_of FROM documents WHERE path LIKE '%garden %' ORDER BY id"
+    ).fetchall()
+    assert copies == [(copies[0][0], None), (copies[1][0], copies[0][0])]
+    results = VectorRetriever(conn, DummyEmbedder()).retrieve(NOTE, top_k=4)
+    assert [r["content"] for r in results].count(NOTE) == 1
+
+
+def test_skipped_duplicates_are_not_embedded(notes, conn):
+    """Test that skip mode stores and embeds only the first copy."""
+    embedder = DummyEmbedder()
+    calls = []
+    embed_batch = embedder.embed_batch
+    embedder.embed_batch = lambda texts: calls.append(texts) or embed_batch(texts)
+    pipeline = IngestionPipeline(SimpleChunker(1000, 0), embedder, dedupe=Deduplicator(0.6, "skip"))
+    stats = pipeline.ingest(notes, conn)
+    assert (stats["stored"], stats["duplicates"]) == (2, 2)
+    assert len(calls) == 2
+    assert conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 2
+
+
+def test_existing_documents_are_signed_for_report(notes, conn):
+    """Test that documents ingested without dedupe are signed before reporting."""
+    IngestionPipeline(SimpleChunker(1000, 0), DummyEmbedder()).ingest(notes, conn)
+    assert report(conn) == []
+    assert sign_missing(conn) == 4
+    assert len(report(conn, threshold=0.6)[0]["duplicates"]) == 2
@@ -0,0 +1,156 @@
+"""Tests for the ingestion pipeline and retrieval."""
+
+import pytest
+from compass.db.manager import DatabaseManager
+from compass.ingest.chunking import SimpleChunker
+from compass.ingest.pipeline import IngestionPipeline
+from compass.rag.embed import DummyEmbedder
+from compass.rag.retrieve import VectorRetriever
+
+
+@pytest.fixture
+def vault_dir(tmp_path):
+    """Create a small vault with notes."""
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    (notes / "garden.md").write_text("Plant tomatoes in May.")
+    (notes / "books.txt").write_text("Finish reading the history book.")
+    (notes / "image.png").write_bytes(b"\x89PNG")
+    return tmp_path
+
+
+@pytest.fixture
+def conn(vault_dir):
+    """Open the vault database."""
+    manager = DatabaseManager(vault_dir)
+    yield manager.get_connection()
+    manager.close()
+
+
+def test_ingest_stores_documents_and_chunks(vault_dir, conn):
+    """Test that ingest stores documents once and skips unchanged files."""
+    pipeline = IngestionPipeline(chunker=SimpleChunker(10, 2), embedder=DummyEmbedder())
+    stats = pipeline.ingest(vault_dir / "notes", conn)
+    assert stats["stored"] == 2
+    assert stats["skipped"] == 1
+    assert conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 2
+    assert conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == stats["chunks"]
+
+    assert pipeline.ingest(vault_dir / "notes", conn)["unchanged"] == 2
+
+    (vault_dir / "notes" / "garden.md").write_text("Plant peppers in June.")
+    assert pipeline.ingest(vault_dir / "notes", conn)["stored"] == 1
+
+
+def test_vector_retriever_ranks_exact_match_first(vault_dir, conn):
+    """Test that retrieval returns the most similar chunk with its source."""
+    pipeline = IngestionPipeline(chunker=SimpleChunker(1000, 0), embedder=DummyEmbedder())
+    pipeline.ingest(vault_dir / "notes", conn)
+
+    results = VectorRetriever(conn, DummyEmbedder()).retrieve("Plant tomatoes in May.", top_k=2)
+    assert len(results) == 2
+    assert results[0]["content"] == "Plant tomatoes in May."
+    assert results[0]["metadata"]["source"].endswith("garden.md")
+    assert results[0]["score"] == pytest.approx(1.0)
+
+
+def database_size(conn) -> int:
+    """Size of the database in bytes after compaction."""
+    conn.execute("VACUUM")
+    return (
+        conn.execute("PRAGMA page_count").fetchone()[0]
+        * conn.execute("PRAGMA page_size").fetchone()[0]
+    )
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_compressed_storage_roundtrip(vault_dir, conn, codec):
+    """Test that compressed documents return the same chunk text as inline ones."""
+    pipeline = IngestionPipeline(
+        chunker=SimpleChunker(10, 2), embedder=DummyEmbedder(), storage="compressed", codec=codec
+    )
+    pipeline.ingest(vault_dir / "notes", conn)
+    assert conn.execute("SELECT COUNT(*) FROM documents WHERE content IS NULL").fetchone()[0] == 2
+
+    results = VectorRetriever(conn, DummyEmbedder()).retrieve("Plant toma", top_k=1)
+    assert results[0]["content"] == "Plant toma"
+
+
+def test_compressed_storage_halves_prose_vault(tmp_path):
+    """Test that compressed storage shrinks a prose vault by more than half."""
+    import random
+    from compass.db.storage import compress_documents
+
+    rng = random.Random(7)
+    words = "the a garden notes plan week review idea book river light morning project".split()
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    for i in range(40):
+        sentences = [" ".join(rng.choice(words) for _ in range(12)) + "." for _ in range(60)]
+        (notes / f"note{i}.md").write_text(" ".join(sentences))
+
+    sizes = {}
+    for storage in ("inline", "compressed"):
+        manager = DatabaseManager(tmp_path / storage)
+        conn = manager.get_connection()
+        IngestionPipeline(SimpleChunker(400, 80), storage=storage).ingest(notes, conn)
+        sizes[storage] = database_size(conn)
+        manager.close()
+    assert sizes["compressed"] < sizes["inline"] / 2
+
+    manager = DatabaseManager(tmp_path / "inline")
+    conn = manager.get_connection()
+    stats = compress_documents(conn)
+    assert stats["documents"] == 40
+    assert database_size(conn) < sizes["inline"] / 2
+    manager.close()
+
+
+def test_federated_retriever_merges_vaults_with_provenance(tmp_path):
+    """Test that federated search merges vaults by score and cites each vault."""
+    from compass.rag.cite import generate_citations
+    from compass.rag.retrieve import FederatedRetriever
+
+    managers, retrievers = [], {}
+    for name, text in (("home", "Plant tomatoes in May."), ("work", "Ship the release.")):
+        notes = tmp_path / name / "notes"
+        notes.mkdir(parents=True)
+        (notes / f"{name}.md").write_text(text)
+        manager = DatabaseManager(tmp_path / name)
+        IngestionPipeline(SimpleChunker(1000, 0), DummyEmbedder()).ingest(
+            notes, manager.get_connection()
+        )
+        managers.append(manager)
+        retrievers[name] = VectorRetriever(manager.connect(read_only=True), DummyEmbedder())
+
+    results = FederatedRetriever(retrievers).retrieve("Ship the release.", top_k=2)
+    assert [r["metadata"]["vault"] for r in results] == ["work", "home"]
+    assert results[0]["score"] == pytest.approx(1.0)
+    assert "[1] work: " in generate_citations(results)
+    batch = FederatedRetriever(retrievers).retrieve_batch(
+        ["Plant tomatoes in May.", "Ship the release."], top_k=1
+    )
+    assert [[r["metadata"]["vault"] for r in results] for results in batch] == [["home"], ["work"]]
+    for manager in managers:
+        manager.close()
+
+
+def test_federated_retriever_queries_in_parallel():
+    """Test that vaults are queried concurrently rather than one after another."""
+    import time
+
+    from compass.rag.retrieve import FederatedRetriever, Retriever
+
+    class SlowRetriever(Retriever):
+        def __init__(self, score):
+            self.score = score
+
+        def retrieve(self, query, top_k=5):
+            time.sleep(0.2)
+            return [{"content": query, "score": self.score, "metadata": {"source": "x"}}]
+
+    retrievers = {f"v{i}": SlowRetriever(i / 10) for i in range(5)}
+    start = time.perf_counter()
+    results = FederatedRetriever(retrievers).retrieve("q", top_k=3)
+    assert time.perf_counter() - start < 0.6
+    assert [r["metadata"]["vault"] for r in results] == ["v4", "v3", "v2"]
@@ -0,0 +1,122 @@
+"""Tests for the LLM response cache."""
+
+import time
+from typing import List
+
+import pytest
+from compass.llm.base import LLMProvider, Message
+from compass.llm.cache import CachedProvider, ResponseCache, hash_context
+from compass.rag.embed import Embedder
+
+
+class CountingProvider(LLMProvider):
+    """Provider that records how often it is called."""
+
+    def __init__(self):
+        super().__init__("test-model")
+        self.calls = 0
+
+    def complete(self, messages: List[Message], **kwargs) -> str:
+        self.calls += 1
+        return f"answer {self.calls}: {messages[-1].content}"
+
+    def stream(self, messages: List[Message], **kwargs):
+        self.calls += 1
+        yield "streamed "
+        yield messages[-1].content
+
+
+class LengthEmbedder(Embedder):
+    """Embedder where texts of similar length are similar."""
+
+    def embed(self, text: str) -> List[float]:
+        return [1.0, len(text) / 100.0]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create a response cache in a temporary directory."""
+    cache = ResponseCache(tmp_path / "responses.db")
+    yield cache
+    cache.close()
+
+
+def test_exact_hit_skips_provider(cache):
+    """Test that a repeated prompt is served from the cache."""
+    provider = CountingProvider()
+    cached = CachedProvider(provider, cache, "test")
+    first = cached.complete([Message("user", "daily review")])
+    second = cached.complete([Message("user", "daily review")])
+    assert first == second
+    assert provider.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_key_includes_temperature_and_context(cache):
+    """Test that temperature and retrieved context are part of the key."""
+    provider = CountingProvider()
+    cached = CachedProvider(provider, cache, "test")
+    messages = [Message("user", "summarize")]
+    cached.complete(messages)
+    cached.complete(messages, temperature=0.0)
+    cached.complete(messages, context_hash=hash_context([{"content": "note"}]))
+    assert provider.calls == 3
+
+
+def test_key_includes_generation_options(cache):
+    """Test that a response cut short by max_tokens is not replayed for a larger limit."""
+    provider = CountingProvider()
+    cached = CachedProvider(provider, cache, "test")
+    messages = [Message("user", "summarize")]
+    cached.complete(messages, max_tokens=10)
+    cached.complete(messages)
+    cached.complete(messages, max_tokens=provider.max_tokens)
+    cached.complete(messages, stop=["\n"])
+    assert provider.calls == 3
+
+
+def test_stream_is_cached(cache):
+    """Test that a streamed response is replayed from the cache."""
+    provider = CountingProvider()
+    cached = CachedProvider(provider, cache, "test")
+    assert "".join(cached.stream([Message("user", "hi")])) == "streamed hi"
+    assert "".join(cached.stream([Message("user", "hi")])) == "streamed hi"
+    assert provider.calls == 1
+
+
+def test_ttl_expiry(tmp_path):
+    """Test that expired entries are not returned."""
+    cache = ResponseCache(tmp_path / "responses.db", ttl_seconds=0.05)
+    key = ResponseCache.make_key("test", "m", 0.7, [Message("user", "q")])
+    cache.put(key, "scope", "q", "response")
+    assert cache.get(key) == "response"
+    time.sleep(0.1)
+    assert cache.get(key) is None
+    cache.close()
+
+
+def test_size_eviction(tmp_path):
+    """Test that least recently used entries are evicted."""
+    cache = ResponseCache(tmp_path / "responses.db", max_entries=2)
+    for i in range(3):
+        cache.put(f"key{i}", "scope", "q", f"response {i}")
+        time.sleep(0.01)
+    assert cache.get("key0") is None
+    assert cache.get("key2") == "response 2"
+    assert cache.stats()["entries"] == 2
+    cache.close()
+
+
+def test_semantic_tier(tmp_path):
+    """Test that similar queries hit the semantic tier."""
+    cache = ResponseCache(
+        tmp_path / "responses.db", embedder=LengthEmbedder(), similarity_threshold=0.999
+    )
+    provider = CountingProvider()
+    cached = CachedProvider(provider, cache, "test")
+    cached.complete([Message("user", "what did I do today?")])
+    cached.complete([Message("user", "what did I do today!")])
+    assert provider.calls == 1
+    cached.complete([Message("user", "a much longer and entirely different question " * 4)])
+    assert provider.calls == 2
+    cache.close()
@@ -0,0 +1,187 @@
+"""Tests for the loader registry, format loaders and the isolated worker."""
+
+import subprocess
+import sys
+import zipfile
+from importlib.metadata import EntryPoint
+from pathlib import Path
+import pytest
+from compass.ingest import loaders
+from compass.ingest.chunking import SimpleChunker
+from compass.ingest.loaders import LoaderError, LoaderRegistry
+from compass.ingest.pipeline import IngestionPipeline
+from compass.db.manager import DatabaseManager
+
+PLUGIN = """
+import time
+from compass.ingest.loaders import DocumentLoader
+
+
+class RstLoader(DocumentLoader):
+    def load(self, path):
+        text = path.read_text()
+        if "hang" in text:
+            time.sleep(60)
+        if "hungry" in text:
+            hog = bytearray(1024 * 1024 * 1024)
+        if "crash" in text:
+            import os
+            os._exit(1)
+        if "chatty" in text:
+            print("parsing", path)
+        metadata = {"source": str(path), "type": "rst"}
+        if "odd" in text:
+            metadata["tags"] = {"a"}
+        return {"content": text.upper(), "metadata": metadata}
+"""
+
+
+@pytest.fixture
+def plugin(tmp_path, monkeypatch):
+    """Install a loader plugin for .rst files through a fake entry point."""
+    (tmp_path / "compass_rst.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(
+        loaders,
+        "_entry_points",
+        lambda: [EntryPoint("rst", "compass_rst:RstLoader", loaders.ENTRY_POINT_GROUP)],
+    )
+    return tmp_path
+
+
+def write_docx(path: Path, paragraphs: list) -> None:
+    """Write a minimal Word document."""
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "word/document.xml", f'<w:document xmlns:w="{ns}"><w:body>{body}</w:body></w:document>'
+        )
+
+
+@pytest.mark.parametrize("isolate", [False, True])
+def test_format_loaders(tmp_path, isolate):
+    """Test that CSV, HTML and DOCX files load in-process and in the worker."""
+    (tmp_path / "plants.csv").write_text("name,month\ntomato,May\nbean,\n")
+    (tmp_path / "page.html").write_text(
+        "<html><head><title>Garden</title><style>p {}</style></head>"
+        "<body><p>Plant <b>tomatoes</b></p><script>x()</script><p>in May.</p></body></html>"
+    )
+    write_docx(tmp_path / "plan.docx", ["Dig beds", "Sow seeds"])
+    registry = LoaderRegistry(isolate=isolate)
+    try:
+        csv = registry.get(tmp_path / "plants.csv").load(tmp_path / "plants.csv")
+        html = registry.get(tmp_path / "page.html").load(tmp_path / "page.html")
+        docx = registry.get(tmp_path / "plan.docx").load(tmp_path / "plan.docx")
+    finally:
+        registry.close()
+
+    assert csv["content"] == "name | month\nname: tomato | month: May\nname: bean"
+    assert csv["metadata"]["rows"] == 2
+    assert html["content"] == "Plant tomatoes\nin May."
+    assert html["metadata"]["title"] == "Garden"
+    assert docx["content"] == "Dig beds\nSow seeds"
+    assert registry.get(tmp_path / "notes.xyz") is None
+
+
+def test_loaders_are_imported_lazily():
+    """Test that plain text needs neither the format loaders nor the worker."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from compass.ingest.loaders import LoaderRegistry\n"
+            "registry = LoaderRegistry()\n"
+            "registry.get(Path('a.md'))\n"
+            "heavy = ['compass.ingest.formats', 'compass.ingest.worker']\n"
+            "print([m for m in heavy if m in sys.modules])\n"
+            "registry.get(Path('a.csv'))\n"
+            "print('compass.ingest.formats' in sys.modules)\n",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output == "[]\nTrue\n"
+
+
+def test_plugin_runs_isolated_with_limits(plugin):
+    """Test that a hanging, memory-hungry or crashing file fails alone."""
+    for name in ("ok", "hang", "hungry", "crash", "after"):
+        (plugin / f"{name}.rst").write_text(name)
+    registry = LoaderRegistry(timeout=2, memory_mb=256)
+    assert ".rst" in registry.suffixes()
+    try:
+        assert registry.get(plugin / "ok.rst").load(plugin / "ok.rst")["content"] == "OK"
+        failures = (("hang", "timed out"), ("hungry", "out of memory"), ("crash", "exited"))
+        for name, error in failures:
+            with pytest.raises(LoaderError, match=error):
+                registry.get(plugin / f"{name}.rst").load(plugin / f"{name}.rst")
+        assert registry.get(plugin / "after.rst").load(plugin / "after.rst")["content"] == "AFTER"
+    finally:
+        registry.close()
+    assert "compass_rst" not in sys.modules
+
+
+def test_plugin_output_does_not_corrupt_replies(plugin):
+    """Test that printing and non-JSON metadata in a plugin fail or pass cleanly."""
+    for name in ("chatty", "odd", "alpha", "beta"):
+        (plugin / f"{name}.rst").write_text(name)
+    registry = LoaderRegistry(timeout=5)
+
+    def load(name):
+        return registry.get(plugin / f"{name}.rst").load(plugin / f"{name}.rst")
+
+    try:
+        assert load("chatty")["content"] == "CHATTY"
+        with pytest.raises(LoaderError, match="non-JSON"):
+            load("odd")
+        assert [load(name)["content"] for name in ("alpha", "beta")] == ["ALPHA", "BETA"]
+    finally:
+        registry.close()
+
+
+def test_worker_restarts_after_bad_reply(plugin):
+    """Test that an unreadable or mismatched reply fails the file and restarts the worker."""
+    from compass.ingest.worker import LoaderWorker
+
+    (plugin / "a.rst").write_text("alpha")
+    worker = LoaderWorker(timeout=5)
+    try:
+        assert worker.load("compass_rst:RstLoader", plugin / "a.rst")["content"] == "ALPHA"
+        first = worker._proc
+        worker._lines.put("not json\n")
+        with pytest.raises(LoaderError, match="bad reply"):
+            worker.load("compass_rst:RstLoader", plugin / "a.rst")
+        assert worker._proc is None
+        assert worker.load("compass_rst:RstLoader", plugin / "a.rst")["content"] == "ALPHA"
+        assert worker._proc is not first
+    finally:
+        worker.close()
+
+
+def test_ingest_counts_failed_files(plugin):
+    """Test that files whose loader fails are counted apart from unsupported ones."""
+    notes = plugin / "notes"
+    notes.mkdir()
+    (notes / "good.rst").write_text("fine")
+    (notes / "bad.rst").write_text("crash")
+    (notes / "image.png").write_bytes(b"\x89PNG")
+    manager = DatabaseManager(plugin)
+    pipeline = IngestionPipeline(SimpleChunker(50, 0))
+    try:
+        stats = pipeline.ingest(notes, manager.get_connection())
+    finally:
+        pipeline.close()
+        manager.close()
+    assert (stats["stored"], stats["failed"], stats["skipped"]) == (1, 1, 1)
+
+
+def test_in_process_loader_errors_fail_the_file_only(tmp_path):
+    """Test that an in-process loader error is recorded for its file alone."""
+    pipeline = IngestionPipeline(SimpleChunker(50, 0))
+    result = pipeline.process_file(tmp_path / "deleted.md")
+    assert result["failed"]
+    assert "FileNotFoundError" in result["error"]
@@ -0,0 +1,108 @@
+"""Tests for run logging."""
+
+import gzip
+import json
+
+from compass import tracing
+from compass.logging import RunLogger
+
+
+def test_log_is_buffered_and_flushed(tmp_path):
+    """Test that events are written after a flush."""
+    logger = RunLogger(tmp_path / "runs.jsonl")
+    for i in range(100):
+        logger.log_command("ingest", {"i": i})
+    logger.flush()
+    lines = (tmp_path / "runs.jsonl").read_text().splitlines()
+    assert [json.loads(line)["data"]["args"]["i"] for line in lines] == list(range(100))
+    logger.close()
+
+
+def test_rotation_compresses_segments(tmp_path):
+    """Test that the log rotates by size and keeps compressed segments."""
+    logger = RunLogger(tmp_path / "runs.jsonl", max_bytes=2000, backup_count=3, batch_size=5)
+    for i in range(200):
+        logger.log("event", {"i": i, "padding": "x" * 50})
+        if i % 5 == 4:
+            logger.flush()
+    logger.close()
+
+    segments = logger.segments()
+    assert len(segments) == 4
+    assert all(s.suffix == ".gz" for s in segments[:-1])
+    assert (tmp_path / "runs.jsonl").stat().st_size <= 2000
+    with gzip.open(segments[0], "rt") as f:
+        assert json.loads(f.readline())["type"] == "event"
+
+    values = [e["data"]["i"] for e in logger.read()]
+    assert values == sorted(values)
+    assert values[-1] == 199
+
+
+def test_rotation_with_two_writers(tmp_path):
+    """Test that no events are lost when two loggers share and rotate one file."""
+    loggers = [
+        RunLogger(tmp_path / "runs.jsonl", max_bytes=2000, backup_count=100, batch_size=5)
+        for _ in range(2)
+    ]
+    for i in range(200):
+        logger = loggers[i % 2]
+        logger.log("event", {"i": i, "padding": "x" * 50})
+        if i % 5 == 4:
+            logger.flush()
+    for logger in loggers:
+        logger.close()
+
+    assert len(loggers[0].segments()) > 5
+    assert sorted(e["data"]["i"] for e in loggers[0].read()) == list(range(200))
+
+
+def test_full_buffer_drops_instead_of_blocking(tmp_path):
+    """Test that a full buffer never blocks the caller."""
+    logger = RunLogger(tmp_path / "runs.jsonl", max_queue=1)
+    logger.log("event", {})
+    logger.close()  # no writer thread draining the buffer any more
+    for _ in range(10):
+        logger.log("event", {})
+    assert logger.dropped == 9
+
+
+def test_unserializable_event_is_dropped(tmp_path):
+    """Test that an event that is not JSON-serializable does not stop the writer."""
+    logger = RunLogger(tmp_path / "runs.jsonl")
+    logger.log("event", {"i": 0})
+    logger.log("event", {"path": tmp_path})
+    logger.log("event", {"i": 2})
+    assert [e["data"]["i"] for e in logger.read()] == [0, 2]
+    assert logger.dropped == 1
+    logger.close()
+
+
+def test_spans_are_logged_and_summarized(tmp_path):
+    """Test that enabled spans reach the log and aggregate into percentiles."""
+    logger = RunLogger(tmp_path / "runs.jsonl")
+    tracing.enable(logger)
+    try:
+        for i in range(10):
+            with tracing.span("ingest.embed") as s:
+                s.set(count=i)
+        assert "".join(tracing.trace_stream(iter(["a", "b"]))) == "ab"
+    finally:
+        tracing.disable()
+    with tracing.span("ignored"):
+        pass
+
+    summary = tracing.summarize_spans(logger.read())
+    assert set(summary) == {"ingest.embed", "llm.ttft", "llm.complete"}
+    assert summary["ingest.embed"]["count"] == 10
+    assert summary["ingest.embed"]["items"] == 45
+    assert summary["ingest.embed"]["p50"] <= summary["ingest.embed"]["p99"]
+    logger.close()
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+    assert tracing.percentile(values, 50) == 50
+    assert tracing.percentile(values, 99) == 99
+    assert tracing.percentile([7.0], 95) == 7.0
@@ -0,0 +1,171 @@
+"""Tests for the metrics store and query tool."""
+
+import math
+import os
+import statistics
+import time
+from datetime import date, timedelta
+import pytest
+from compass import metrics
+from compass.db.manager import DatabaseManager
+from compass.ingest.chunking import SimpleChunker
+from compass.ingest.pipeline import IngestionPipeline
+from compass.metrics import MetricsError, MetricsStore, parse_time
+from compass.tools.metrics import MetricsTool
+
+START = date(2024, 1, 1)
+
+
+def weight(day: int) -> float:
+    """Deterministic test value for a day."""
+    return 70 + (day * 37 % 11) / 10
+
+
+def write_rows(path, days, header=True):
+    """Write (or append) daily weight and steps rows, with a blank note column."""
+    lines = ["date,weight,steps,note"] if header else []
+    for day in days:
+        lines.append(f"{START + timedelta(days=day)},{weight(day)},{day * 100},ok")
+    with path.open("w" if header else "a") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+@pytest.fixture
+def store(tmp_path):
+    """A metrics store over a fresh vault database."""
+    manager = DatabaseManager(tmp_path)
+    yield MetricsStore(manager.get_connection())
+    manager.close()
+
+
+def test_append_loads_only_new_rows(tmp_path, store):
+    """Test that appended rows load incrementally and rewrites reload the file."""
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    path = directory / "health.csv"
+    write_rows(path, range(100))
+    assert store.sync(directory) == {"files": 1, "points": 200, "removed": 0}
+    assert store.sync(directory)["points"] == 0
+    write_rows(path, range(100, 110), header=False)
+    assert store.sync(directory)["points"] == 20
+    assert [s["name"] for s in store.series()] == ["health.steps", "health.weight"]
+    assert store.aggregate("steps", "last")["value"] == 10900
+
+    write_rows(path, range(5))
+    assert store.sync(directory)["points"] == 10
+    assert store.aggregate("weight", "count")["value"] == 5
+    path.unlink()
+    assert store.sync(directory)["removed"] == 1
+    assert store.series() == []
+
+
+def test_half_written_row_is_read_again(tmp_path, store):
+    """Test that a row without its newline yet is loaded once it is complete."""
+    path = tmp_path / "sleep.csv"
+    path.write_text("date,hours\n2026-01-01,7\n2026-01-02,7")
+    assert store.load_csv(path) == 1
+    with path.open("a") as f:
+        f.write("6\n")
+    assert store.load_csv(path) == 1
+    assert store.aggregate("hours", "avg")["value"] == pytest.approx(41.5)
+
+    with path.open("a") as f:
+        f.write("2026-01-03,8")
+    os.utime(path, (time.time() - 60, time.time() - 60))
+    assert store.load_csv(path) == 1
+    assert store.aggregate("hours", "last")["value"] == 8
+
+
+def test_aggregates_match_raw_values(tmp_path, store):
+    """Test that windowed aggregates equal a brute-force computation."""
+    path = tmp_path / "health.csv"
+    write_rows(path, range(400))
+    store.load_csv(path)
+    window = [weight(day) for day in range(50, 321)]
+    start = parse_time(str(START + timedelta(days=50)))
+    end = parse_time(str(START + timedelta(days=320)))
+
+    def value(func):
+        return store.aggregate("weight", func, start=start, end=end)["value"]
+
+    assert value("count") == len(window)
+    assert value("avg") == pytest.approx(statistics.fmean(window))
+    assert value("sum") == pytest.approx(sum(window))
+    assert value("stddev") == pytest.approx(statistics.pstdev(window))
+    assert value("min") == min(window)
+    assert value("max") == max(window)
+    assert value("change") == pytest.approx(window[-1] - window[0])
+    empty = store.aggregate("weight", start=parse_time("2030-01-01"))
+    assert (empty["value"], empty["count"]) == (None, 0)
+
+
+def test_rollups(tmp_path, store):
+    """Test weekly and monthly rollups."""
+    path = tmp_path / "health.csv"
+    write_rows(path, range(60))
+    store.load_csv(path)
+    weeks = store.rollup("weight", "week")
+    assert weeks[0]["start"] == "2024-01-01"  # a Monday
+    assert sum(w["count"] for w in weeks) == 60
+    months = store.rollup("weight", "month")
+    assert [m["start"] for m in months] == ["2024-01-01", "2024-02-01"]
+    january = [weight(day) for day in range(31)]
+    assert months[0]["count"] == 31
+    assert months[0]["avg"] == pytest.approx(statistics.fmean(january))
+    assert months[0]["stddev"] == pytest.approx(statistics.pstdev(january))
+    assert (months[0]["min"], months[0]["max"]) == (min(january), max(january))
+
+
+def test_resolve_names(tmp_path, store):
+    """Test resolving series by name, stem and column."""
+    write_rows(tmp_path / "health.csv", range(3))
+    (tmp_path / "garden.csv").write_text("date,weight\n2024-05-01,2.5\n")
+    store.load_csv(tmp_path / "health.csv")
+    store.load_csv(tmp_path / "garden.csv")
+    assert store.resolve("health.weight")[1] == "health.weight"
+    assert store.resolve("garden")[1] == "garden.weight"
+    assert store.resolve("steps")[1] == "health.steps"
+    with pytest.raises(MetricsError, match="several"):
+        store.resolve("weight")
+    with pytest.raises(MetricsError, match="No metric"):
+        store.resolve("sleep")
+    with pytest.raises(MetricsError, match="Unknown aggregate"):
+        store.aggregate("steps", "median")
+
+
+def test_tool_answers_questions(tmp_path, store, monkeypatch):
+    """Test that the tool parses questions into aggregate queries."""
+    write_rows(tmp_path / "health.csv", range(60))
+    store.load_csv(tmp_path / "health.csv")
+    today = parse_time(str(START + timedelta(days=59)))
+    monkeypatch.setattr(metrics, "now", lambda: today)
+    monkeypatch.setattr("compass.tools.metrics.now", lambda: today)
+    tool = MetricsTool(store)
+
+    result = tool.ask("What is my average weight over the last 30 days?")
+    expected = statistics.fmean(weight(day) for day in range(29, 60))
+    assert (result["func"], result["count"]) == ("avg", 31)
+    assert result["value"] == pytest.approx(expected)
+    assert result["answer"].startswith("avg health.weight (last 30 days)")
+    assert tool.ask("max steps last week")["value"] == 5900
+    assert tool.ask("total steps")["count"] == 60
+    assert [r["count"] for r in tool.ask("monthly weight")["rollups"]] == [31, 29]
+    assert math.isclose(tool.ask("change in weight")["value"], weight(59) - weight(0))
+    with pytest.raises(ValueError, match="Could not understand"):
+        tool.ask("how did I sleep compared to last year, roughly?")
+
+
+def test_ingest_skips_metrics_directory(tmp_path):
+    """Test that excluded directories are not ingested as documents."""
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "metrics").mkdir()
+    (tmp_path / "notes" / "a.md").write_text("A note about weight.")
+    write_rows(tmp_path / "metrics" / "health.csv", range(3))
+    manager = DatabaseManager(tmp_path)
+    pipeline = IngestionPipeline(SimpleChunker(50, 0), exclude=[tmp_path / "metrics"])
+    try:
+        stats = pipeline.ingest(tmp_path, manager.get_connection())
+    finally:
+        pipeline.close()
+        manager.close()
+    assert (stats["stored"], stats["skipped"]) == (1, 0)
@@ -0,0 +1,107 @@
+"""Retrieval recall and cost benchmarks."""
+
+import random
+import pytest
+from compass import tracing
+from compass.db.manager import DatabaseManager
+from compass.ingest.chunking import SimpleChunker
+from compass.ingest.pipeline import IngestionPipeline
+from compass.logging import RunLogger
+from compass.rag.embed import Embedder
+from compass.rag import retrieve
+from compass.rag.retrieve import VectorRetriever
+
+DOCUMENTS = 200
+CHUNKS = 10
+WIDTH = 16  # characters per chunk
+DIM = 24
+
+
+class TopicEmbedder(Embedder):
+    """Embeds `dNNNcNN` chunk labels near a per-document topic vector, like real notes."""
+
+    def __init__(self):
+        rng = random.Random(7)
+        self.topics = [[rng.gauss(0, 1) for _ in range(DIM)] for _ in range(DOCUMENTS)]
+
+    def embed(self, text):
+        doc, chunk = int(text[1:4]), int(text[5:7])
+        rng = random.Random(doc * 1000 + chunk)
+        return [x + rng.gauss(0, 0.6) for x in self.topics[doc]]
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    """Ingest a corpus of topical documents."""
+    root = tmp_path_factory.mktemp("corpus")
+    notes = root / "notes"
+    notes.mkdir()
+    for doc in range(DOCUMENTS):
+        text = "".join(f"d{doc:03d}c{chunk:02d}".ljust(WIDTH) for chunk in range(CHUNKS))
+        (notes / f"doc{doc:03d}.txt").write_text(text)
+    manager = DatabaseManager(root)
+    IngestionPipeline(SimpleChunker(WIDTH, 0), TopicEmbedder()).ingest(
+        notes, manager.get_connection()
+    )
+    yield manager
+    manager.close()
+
+
+def scored_chunks(logger):
+    """Get the number of chunks scored by each retrieve span."""
+    return [
+        event["data"]["candidates"]
+        for event in logger.read()
+        if event["type"] == "span" and event["data"]["name"] == "retrieve"
+    ]
+
+
+@pytest.mark.parametrize("keep_vectors", [False, True])
+def test_two_stage_retrieval_recall(corpus, tmp_path, keep_vectors):
+    """Test that scoring chunks of the top 10 documents keeps recall@10 above 0.9
+    while scoring a twentieth of the chunks."""
+    embedder = TopicEmbedder()
+    conn = corpus.get_connection()
+    exhaustive = VectorRetriever(conn, embedder)
+    two_stage = VectorRetriever(conn, embedder, keep_vectors=keep_vectors, coarse_docs=10)
+
+    logger = RunLogger(tmp_path / "runs.jsonl")
+    tracing.enable(logger)
+    hits = total = 0
+    try:
+        for doc in range(0, DOCUMENTS, 20):
+            query = f"d{doc:03d}c{CHUNKS + 1:02d}"  # an unseen chunk on the same topic
+            expected = {r["id"] for r in exhaustive.retrieve(query, top_k=10)}
+            found = {r["id"] for r in two_stage.retrieve(query, top_k=10)}
+            hits += len(expected & found)
+            total += len(expected)
+    finally:
+        tracing.disable()
+
+    assert hits / total >= 0.9
+    counts = scored_chunks(logger)
+    assert counts[0::2] == [DOCUMENTS * CHUNKS] * (DOCUMENTS // 20)
+    assert set(counts[1::2]) == {10 * CHUNKS}
+    logger.close()
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+@pytest.mark.parametrize("coarse_docs", [0, 10])
+def test_retrieve_batch_matches_retrieve(corpus, monkeypatch, use_numpy, coarse_docs):
+    """Test that retrieve_batch returns what retrieve does, in input order."""
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(retrieve, "_numpy", lambda: None)
+    retriever = VectorRetriever(corpus.get_connection(), TopicEmbedder(), coarse_docs=coarse_docs)
+    queries = [f"d{doc:03d}c{CHUNKS + 1:02d}" for doc in range(0, DOCUMENTS, 25)][::-1]
+
+    batch = retriever.retrieve_batch(queries, top_k=7)
+
+    assert len(batch) == len(queries)
+    for query, results in zip(queries, batch):
+        expected = retriever.retrieve(query, top_k=7)
+        assert [r["id"] for r in results] == [r["id"] for r in expected]
+        assert [r["score"] for r in results] == pytest.approx([r["score"] for r in expected])
+        assert [r["content"] for r in results] == [r["content"] for r in expected]
+    assert retriever.retrieve_batch([]) == []
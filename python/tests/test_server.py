@@ -0,0 +1,159 @@
+"""Tests for the resident daemon and its client."""
+
+import threading
+import pytest
+from compass.ingest.chunking import SimpleChunker
+from compass.ingest.pipeline import IngestionPipeline
+from compass.rag.embed import DummyEmbedder
+from compass.server import Client, CompassServer, ServerError, thin_exec
+from compass.vault import Vault
+
+
+@pytest.fixture
+def homes(tmp_path, monkeypatch):
+    """Point the Compass config, state and cache directories at temporary paths."""
+    for name in ("CONFIG", "STATE", "CACHE"):
+        monkeypatch.setenv(f"COMPASS_{name}_HOME", str(tmp_path / name.lower()))
+    return tmp_path
+
+
+@pytest.fixture
+def server(homes):
+    """Run a daemon on a temporary socket."""
+    server = CompassServer(homes / "compass.sock")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def vault(homes):
+    """Create a vault with one ingested note."""
+    vault = Vault(homes / "vault")
+    vault.init()
+    (vault.path / "garden.md").write_text("Plant tomatoes in May.")
+    pipeline = IngestionPipeline(SimpleChunker(50, 0), DummyEmbedder())
+    pipeline.ingest(vault.path, vault.get_database_connection())
+    vault.db_manager.close()
+    return vault
+
+
+def test_connect_without_daemon(tmp_path):
+    """Test that connecting returns None when no daemon is running."""
+    assert Client.connect(tmp_path / "missing.sock") is None
+
+
+def test_ping_and_errors(server):
+    """Test ping and that errors come back as ServerError."""
+    client = Client.connect(server.socket_path)
+    assert client.request("ping")["protocol"] == 1
+    with pytest.raises(ServerError):
+        client.request("nope")
+    with pytest.raises(ServerError):
+        client.request("retrieve", query="x", vault=str(server.socket_path.parent / "none"))
+    client.close()
+
+
+def test_exec_and_retrieve(server, vault):
+    """Test that exec retrieves context from the vault and cites it."""
+    client = Client.connect(server.socket_path)
+    chunks = client.request("retrieve", query="tomatoes", vault=str(vault.path))
+    assert chunks[0]["metadata"]["source"].endswith("garden.md")
+
+    result = client.request("exec", prompt="When to plant?", vault=str(vault.path))
+    assert "garden.md" in result["citations"]
+    client.close()
+
+
+def test_chat_session(server, vault):
+    """Test that chat turns are answered and saved to the session."""
+    client = Client.connect(server.socket_path)
+    opened = client.request("chat_open", vault=str(vault.path))
+    assert not opened["resumed"]
+    reply = client.request("chat", session_id=opened["session_id"], message="Hello")
+    assert "Hello" in reply["response"]
+    client.request("chat_close", session_id=opened["session_id"])
+
+    resumed = client.request("chat_open", vault=str(vault.path), session_id=opened["session_id"])
+    assert resumed["resumed"]
+    client.close()
+
+
+def test_second_daemon_refused(server):
+    """Test that a second daemon cannot take over a live socket."""
+    with pytest.raises(ServerError):
+        CompassServer(server.socket_path)
+
+
+def test_thin_exec(server, vault, capsys):
+    """Test that the thin client answers plain exec calls and defers the rest."""
+    assert thin_exec(["exec", "tomatoes?", "--vault", str(vault.path)], server.socket_path)
+    assert capsys.readouterr().out.startswith("Prompt: tomatoes?")
+    assert not thin_exec(["exec", "--help"], server.socket_path)
+    assert not thin_exec(["exec", "tomatoes?", "--vault", "nowhere"], server.socket_path)
+    assert not thin_exec(["exec", "tomatoes?"], server.socket_path.parent / "missing.sock")
+
+
+def test_retrieve_across_vaults(server, vault, homes):
+    """Test that a request naming several vaults searches them all."""
+    other = Vault(homes / "other")
+    other.init()
+    (other.path / "work.md").write_text("Ship the release.")
+    IngestionPipeline(SimpleChunker(50, 0), DummyEmbedder()).ingest(
+        other.path, other.get_database_connection()
+    )
+    other.db_manager.close()
+
+    client = Client.connect(server.socket_path)
+    results = client.request(
+        "retrieve", query="Ship the release.", vaults=[str(vault.path), str(other.path)]
+    )
+    client.close()
+    assert [r["metadata"]["vault"] for r in results] == ["other", "vault"]
+
+
+def test_stats_report_hot_tier(server, vault):
+    """Test that repeated retrieval is served from the in-memory tier."""
+    client = Client.connect(server.socket_path)
+    for _ in range(3):
+        client.request("retrieve", query="Plant tomatoes in May.", vault=str(vault.path))
+    stats = client.request("stats")
+    client.close()
+    assert stats["hot"]["hits"] >= 2
+    assert 0 < stats["hot"]["used_bytes"] <= stats["hot"]["budget_bytes"]
+    assert stats["vaults"] == {str(vault.path.resolve()): 2}  # centroids and chunks, once
+
+
+def test_daemon_of_another_version_is_not_used(server, monkeypatch):
+    """Test that clients ignore a daemon left running from another version."""
+    monkeypatch.setitem(
+        server.service.handlers, "ping", lambda request: {"version": "0.0.1", "protocol": 1}
+    )
+    assert Client.connect(server.socket_path) is None
+
+
+def test_cli_falls_back_when_daemon_fails(server, vault, monkeypatch):
+    """Test that exec and chat run in-process when the daemon reports an error."""
+    from typer.testing import CliRunner
+    from compass import cli
+
+    def fail(request):
+        raise RuntimeError("daemon restarting")
+
+    monkeypatch.setattr("compass.server.get_socket_path", lambda: server.socket_path)
+    for op in ("exec", "chat"):
+        monkeypatch.setitem(server.service.handlers, op, fail)
+    runner = CliRunner()
+
+    result = runner.invoke(cli.app, ["exec", "When to plant?", "--vault", str(vault.path)])
+    assert result.exit_code == 0, result.output
+    assert "daemon request failed" in result.output
+    assert "Compass: [Placeholder response]" in result.output
+
+    result = runner.invoke(cli.app, ["chat", "--vault", str(vault.path)], input="Hello\n/exit\n")
+    assert result.exit_code == 0, result.output
+    assert "daemon request failed" in result.output
+    assert "Placeholder response to: Hello" in result.output
@@ -0,0 +1,222 @@
+"""Tests for session management."""
+
+import pytest
+from compass.db.manager import DatabaseManager
+from compass.sessions import (
+    ContextWindow,
+    Session,
+    SessionIndex,
+    SessionManager,
+    extractive_summary,
+)
+
+
+@pytest.fixture
+def state_home(tmp_path, monkeypatch):
+    """Point the Compass state directory at a temporary path."""
+    monkeypatch.setenv("COMPASS_STATE_HOME", str(tmp_path))
+    return tmp_path
+
+
+def make_session(turns: int) -> Session:
+    """Create a session with the given number of user/assistant turns."""
+    session = Session()
+    for i in range(turns):
+        session.add_message("user", f"Question {i}. More detail here.")
+        session.add_message("assistant", f"Answer {i}. Further explanation.")
+    return session
+
+
+def test_window_keeps_recent_turns():
+    """Test that only the last N turns are sent verbatim."""
+    session = make_session(10)
+    session.add_message("user", "Latest question")
+    messages = ContextWindow(max_turns=2).build_messages(session)
+    assert messages[0].role == "system"
+    assert "Question 0" in messages[0].content
+    assert [m.content for m in messages[1:]] == [
+        "Answer 8. Further explanation.",
+        "Question 9. More detail here.",
+        "Answer 9. Further explanation.",
+        "Latest question",
+    ]
+
+
+def test_summary_is_incremental():
+    """Test that each message is folded into the summary only once."""
+    folded = []
+
+    def summarizer(previous, messages):
+        folded.extend(m["content"] for m in messages)
+        return extractive_summary(previous, messages)
+
+    window = ContextWindow(max_turns=1, summarizer=summarizer)
+    session = make_session(3)
+    window.build_messages(session)
+    session.add_message("user", "one more")
+    session.add_message("assistant", "reply")
+    window.build_messages(session)
+    assert len(folded) == len(set(folded)) == session.summarized_count == 6
+
+
+def test_token_budget_folds_extra_turns():
+    """Test that the token budget bounds the prompt size."""
+    session = make_session(3)
+    session.add_message("user", "x" * 400)
+    messages = ContextWindow(max_turns=3, token_budget=120).build_messages(session)
+    assert messages[-1].content == "x" * 400
+    assert sum(len(m.content) for m in messages[1:-1]) < 100
+
+
+def test_zero_turns_sends_only_current_message():
+    """Test that max_turns=0 sends the current message alone."""
+    session = make_session(3)
+    session.add_message("user", "only this")
+    messages = ContextWindow(max_turns=0).build_messages(session)
+    assert [m.content for m in messages] == ["only this"]
+
+
+def test_save_load_roundtrip(state_home):
+    """Test that sessions and their summaries survive a save/load."""
+    session = make_session(4)
+    ContextWindow(max_turns=1).build_messages(session)
+    manager = SessionManager()
+    manager.save(session)
+
+    loaded = manager.load(session.id)
+    assert loaded.messages == session.messages
+    assert loaded.summary == session.summary
+    assert loaded.summarized_count == session.summarized_count
+
+
+def test_save_appends_only_new_messages(state_home):
+    """Test that saving twice appends rather than rewrites."""
+    manager = SessionManager()
+    session = make_session(2)
+    path = manager.save(session)
+    session.add_message("user", "follow-up")
+    manager.save(session)
+    manager.flush()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1 + 5
+    assert manager.load(session.id).messages == session.messages
+    manager.close()
+
+
+def test_tail_load(state_home):
+    """Test that tail loading returns only the last messages and the summary."""
+    manager = SessionManager()
+    session = make_session(500)
+    ContextWindow(max_turns=2).build_messages(session)
+    manager.save(session)
+
+    loaded = manager.load(session.id, tail=4)
+    assert loaded.messages == session.messages[-4:]
+    assert loaded.base_index == len(session.messages) - 4
+    assert loaded.summary == session.summary
+    assert loaded.summarized_count == 0
+    manager.close()
+
+
+def test_tail_load_without_summary_reads_little(state_home):
+    """Test that a session without a summary is not read back to its start."""
+    manager = SessionManager()
+    session = make_session(500)
+    path = manager.save(session)
+    manager.flush()
+    with open(path, "rb") as f:
+        f.readline()
+        records = manager._read_tail(f, 4, block_size=1024)
+    assert 4 <= len(records) < 100
+    assert manager.load(session.id, tail=4).messages == session.messages[-4:]
+    manager.close()
+
+
+def test_index_list_and_search(state_home, tmp_path):
+    """Test that saved sessions can be listed and searched from the vault database."""
+    index = SessionIndex(DatabaseManager(tmp_path / "vault"))
+    manager = SessionManager(index=index)
+    first = make_session(2)
+    manager.save(first)
+    second = Session()
+    second.add_message("user", "What did I decide about the garden shed?")
+    manager.save(second)
+    manager.close()
+
+    index = SessionIndex(DatabaseManager(tmp_path / "vault"))
+    sessions = index.list(limit=10)
+    assert [s["id"] for s in sessions] == [second.id, first.id]
+    assert sessions[1]["message_count"] == 4
+    assert sessions[0]["title"].startswith("What did I decide")
+
+    matches = index.search("garden shed")
+    assert [m["session_id"] for m in matches] == [second.id]
+    assert "[garden]" in matches[0]["snippet"]
+    assert index.search('"unbalanced') == []
+    index.close()
+
+
+def test_index_keeps_vaults_apart(state_home, tmp_path):
+    """Test that a vault's index only picks up sessions started in that vault."""
+    home = SessionIndex(DatabaseManager(tmp_path / "home"))
+    work = SessionIndex(DatabaseManager(tmp_path / "work"))
+    home_session = make_session(1)
+    work_session = make_session(1)
+    manager = SessionManager(index=home)
+    manager.save(home_session)
+    manager.close()
+    manager = SessionManager(index=work)
+    manager.save(work_session)
+    manager.close()
+    detached = SessionManager()
+    detached.save(make_session(1))
+    detached.close()
+
+    assert [s["id"] for s in home.list()] == [home_session.id]
+    assert [m["session_id"] for m in work.search("Question")] == [work_session.id]
+
+    work.clear()
+    assert work.list() == []
+    indexed = [p.stem for p in sorted(manager.sessions_dir.glob("*.jsonl")) if work.index_file(p)]
+    assert indexed == [work_session.id]
+    assert [s["id"] for s in work.list()] == [work_session.id]
+    home.close()
+    work.close()
+
+
+def test_torn_last_line_is_ignored(state_home, tmp_path):
+    """Test that a partial line from a crash mid-append does not break loading."""
+    manager = SessionManager(vault=tmp_path / "vault")
+    session = make_session(3)
+    path = manager.save(session)
+    manager.close()
+    with path.open("a") as f:
+        f.write('{"type":"message","role":"user","con')
+
+    manager = SessionManager()
+    assert manager.load(session.id).messages == session.messages
+    assert manager.load(session.id, tail=2).messages == session.messages[-2:]
+    index = SessionIndex(DatabaseManager(tmp_path / "vault"))
+    assert index.index_file(path) == 1 + len(session.messages)
+    index.close()
+
+    resumed = manager.load(session.id)
+    resumed.add_message("user", "After the crash")
+    manager.save(resumed)
+    manager.flush()
+    assert manager.load(session.id).messages == session.messages + resumed.messages[-1:]
+    assert path.read_text().endswith("\n")
+    manager.close()
+
+
+def test_flush_raises_if_writer_dies(state_home, tmp_path):
+    """Test that flush re-raises the error that stopped the writer thread."""
+    manager = SessionManager()
+    # A record that cannot be serialized kills the writer thread
+    manager.writer.append(tmp_path / "bad.jsonl", [{"content": object()}])
+    with pytest.raises(TypeError):
+        manager.flush()
+    assert not manager.writer._thread.is_alive()
+    with pytest.raises(TypeError):
+        manager.flush()
@@ -0,0 +1,70 @@
+"""Startup cost benchmarks for the CLI."""
+
+import subprocess
+import sys
+
+HEAVY_MODULES = ["typer", "rich", "toml", "compass.cli", "compass.config"]
+SUBSYSTEMS = [
+    "compass.config",
+    "compass.db",
+    "compass.ingest",
+    "compass.llm",
+    "compass.rag",
+    "compass.sessions",
+    "compass.vault",
+    "toml",
+]
+
+
+def run_python(code: str) -> str:
+    """Run code in a fresh interpreter and return its stdout."""
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout
+
+
+def imported_modules(args: list) -> set:
+    """Modules a fresh interpreter imports while running args, per -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], capture_output=True, text=True, check=True
+    )
+    return {
+        line.rpartition("|")[2].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:")
+    }
+
+
+def test_version_skips_heavy_imports():
+    """Test that --version is answered without importing Typer, Rich or toml."""
+    output = run_python(
+        "import sys\n"
+        "sys.argv = ['compass', '--version']\n"
+        "from compass.__main__ import main\n"
+        "main()\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    assert output == "Compass CLI v0.1.0\n[]\n"
+
+
+def test_cli_import_defers_subsystems():
+    """Test that importing the CLI does not load config, db, rag, llm or sessions."""
+    output = run_python(
+        "import sys\n"
+        "import compass.cli\n"
+        f"subsystems = {SUBSYSTEMS!r}\n"
+        "print([m for m in sys.modules\n"
+        "       if any(m == s or m.startswith(s + '.') for s in subsystems)])\n"
+    )
+    assert output == "[]\n"
+
+
+def test_version_imports_nothing_else():
+    """Test that `compass --version` imports no module beyond compass and runpy.
+
+    Counting imports rather than timing them keeps the startup budget
+    checked without depending on how busy the machine is.
+    """
+    extra = imported_modules(["-m", "compass", "--version"]) - imported_modules(["-c", "pass"])
+    assert {m for m in extra if m.split(".")[0] not in ("compass", "runpy", "importlib")} == set()
@@ -0,0 +1,136 @@
+"""Tests for vault discovery."""
+
+import pytest
+from compass.vault import Vault, find_vault, get_discovery_cache_path, resolve_vault_path
+
+
+@pytest.fixture
+def homes(tmp_path, monkeypatch):
+    """Point the Compass config, state and cache directories at temporary paths."""
+    for name in ("CONFIG", "STATE", "CACHE"):
+        monkeypatch.setenv(f"COMPASS_{name}_HOME", str(tmp_path / name.lower()))
+    monkeypatch.delenv("COMPASS_VAULT", raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def vault(homes):
+    """Create a vault with a deep subdirectory."""
+    vault = Vault(homes / "vault")
+    vault.init()
+    (vault.path / "a" / "b" / "c").mkdir(parents=True)
+    return vault
+
+
+def test_find_vault_walks_up_and_caches(vault):
+    """Test that discovery finds the nearest vault and remembers the result."""
+    deep = vault.path / "a" / "b" / "c"
+    assert find_vault(deep) == vault.path
+    assert get_discovery_cache_path().exists()
+    assert find_vault(deep) == vault.path
+
+
+def test_find_vault_cache_invalidated_by_marker(vault):
+    """Test that a cached result is dropped once the marker file changes."""
+    deep = vault.path / "a" / "b" / "c"
+    assert find_vault(deep) == vault.path
+    vault.config_file.unlink()
+    assert find_vault(deep) is None
+
+
+def test_init_clears_discovery_cache(vault):
+    """Test that initializing a nearer vault takes over from a cached one."""
+    deep = vault.path / "a" / "b" / "c"
+    assert find_vault(deep) == vault.path
+    Vault(vault.path / "a").init()
+    assert find_vault(deep) == vault.path / "a"
+
+
+def test_resolve_vault_short_circuits(vault, homes, monkeypatch):
+    """Test that COMPASS_VAULT and vault.default_path skip discovery."""
+    from compass.config import Config
+
+    other = homes / "other"
+    monkeypatch.chdir(vault.path)
+    assert resolve_vault_path() == vault.path
+
+    cfg = Config()
+    cfg.set("vault.default_path", str(other))
+    cfg.save()
+    assert resolve_vault_path() == other
+
+    monkeypatch.setenv("COMPASS_VAULT", str(homes / "env"))
+    assert resolve_vault_path() == homes / "env"
+    assert resolve_vault_path(vault.path) == vault.path
+
+
+def test_resolve_vault_paths_expands_groups(vault, homes):
+    """Test that --vault values may name a configured group of vaults."""
+    from compass.config import Config
+    from compass.vault import resolve_vault_paths
+
+    other = homes / "other"
+    cfg = Config()
+    cfg.set("vault.groups", {"all": [str(vault.path), str(other)]})
+    cfg.save()
+    assert resolve_vault_paths(["all"]) == [vault.path, other]
+    assert resolve_vault_paths([str(other), "all"]) == [other, vault.path]
+
+
+def test_unknown_vault_names_are_errors(vault, homes):
+    """Test that a --vault value naming no vault or group is reported, not dropped."""
+    from typer.testing import CliRunner
+    from compass.cli import app
+
+    runner = CliRunner()
+    result = runner.invoke(app, ["exec", "Hi", "--vault", str(vault.path), "--vault", "work"])
+    assert result.exit_code == 1
+    assert "No vault at" in result.output
+    (homes / "plain").mkdir()
+    result = runner.invoke(app, ["exec", "Hi", "--vault", str(homes / "plain")])
+    assert result.exit_code == 1
+    assert "No vault at" in result.output
+
+
+def test_federated_search_uses_each_vault_profile(vault, homes, monkeypatch):
+    """Test that each vault is searched with the settings from its own profile."""
+    from compass import cli
+    from compass.config import Config
+    from compass.rag import retrieve
+
+    other = Vault(homes / "other")
+    other.init()
+    for vault_obj, coarse_docs in ((vault, 7), (other, 9)):
+        with vault_obj.config_file.open("a") as f:
+            f.write(f"\n[rag]\ncoarse_docs = {coarse_docs}\n")
+    seen = []
+
+    class Recorder(retrieve.VectorRetriever):
+        def retrieve(self, query, top_k=5):
+            seen.append(self.coarse_docs)
+            return []
+
+    monkeypatch.setattr(retrieve, "VectorRetriever", Recorder)
+    cfg = Config(profile_path=vault.config_file)
+    cli._retrieve_context([vault, other], "tomatoes", cfg)
+    assert sorted(seen) == [7, 9]
+    cli._retrieve_context([other], "tomatoes", cfg)
+    assert seen[-1] == 9
+
+
+def test_find_vault_notices_nearer_vault(vault):
+    """Test that a cached result is not used once a nearer vault appears."""
+    deep = vault.path / "a" / "b" / "c"
+    assert find_vault(deep) == vault.path
+    # A vault copied in place, which does not clear the discovery cache
+    (deep / ".compass").mkdir()
+    (deep / ".compass" / "profile.toml").write_text("[vault]\n")
+    assert find_vault(deep) == deep
+
+
+def test_find_vault_through_symlink(vault, homes):
+    """Test that discovery from a symlinked directory returns the real vault path."""
+    link = homes / "link"
+    link.symlink_to(vault.path / "a")
+    assert find_vault(link / "b") == vault.path
+    assert find_vault(link / "b") == vault.path
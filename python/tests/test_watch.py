@@ -0,0 +1,206 @@
+"""Tests for watch mode and incremental re-indexing."""
+
+import threading
+import time
+import pytest
+from compass.db.manager import DatabaseManager
+from compass.ingest.chunking import SimpleChunker
+from compass.ingest.pipeline import IngestionPipeline
+from compass.ingest.watch import Debouncer, InotifyWatcher, PollingWatcher, create_watcher, watch
+from compass.rag.embed import DummyEmbedder
+from compass.rag.retrieve import VectorRetriever
+
+
+@pytest.fixture
+def vault_dir(tmp_path):
+    """Create a vault directory with one note."""
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "garden.md").write_text("Plant tomatoes in May.")
+    return tmp_path
+
+
+@pytest.fixture
+def manager(vault_dir):
+    """Open the vault database."""
+    manager = DatabaseManager(vault_dir)
+    yield manager
+    manager.close()
+
+
+def read_until(watcher, predicate, timeout=3.0):
+    """Collect watcher paths until `predicate(paths)` holds or time runs out."""
+    paths = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not predicate(paths):
+        paths.extend(watcher.read(0.1))
+    return paths
+
+
+def test_debouncer_coalesces_bursts():
+    """Test that repeated events for a path wait for quiet and come out once."""
+    debouncer = Debouncer(delay=0.5, max_delay=2.0)
+    debouncer.add(["a", "b"], now=0.0)
+    debouncer.add(["a"], now=0.4)
+    assert debouncer.ready(now=0.6) == ["b"]
+    assert debouncer.timeout(now=0.6) == pytest.approx(0.3)
+    assert debouncer.ready(now=0.9) == ["a"]
+
+    for now in (0.0, 0.4, 0.8, 1.2, 1.6, 2.0):
+        debouncer.add(["busy"], now=now)
+    assert debouncer.ready(now=2.0) == ["busy"]
+
+
+def test_debouncer_defers_failed_paths():
+    """Test that deferred paths are held back until their retry time."""
+    debouncer = Debouncer(delay=0.5)
+    debouncer.defer(["a"], until=5.0)
+    assert debouncer.ready(now=4.9) == []
+    assert debouncer.timeout(now=4.0) == pytest.approx(1.0)
+    assert debouncer.ready(now=5.0) == ["a"]
+
+
+class ListWatcher:
+    """A watcher that reports the given paths once, then nothing."""
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def read(self, timeout):
+        paths, self.paths = self.paths, []
+        if not paths:
+            time.sleep(min(timeout, 0.05))
+        return paths
+
+    def close(self):
+        pass
+
+
+def test_watch_retries_failed_batches(tmp_path):
+    """Test that a failing update is reported and retried instead of ending the watch."""
+    calls, errors, batches = [], [], []
+    stop = threading.Event()
+
+    def update(batch):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        stop.set()
+        return {"stored": len(batch)}
+
+    thread = threading.Thread(
+        target=watch,
+        args=(ListWatcher([tmp_path / "a.md"]), update),
+        kwargs={
+            "debounce": 0.01,
+            "stop": stop,
+            "on_batch": lambda b, s: batches.append(b),
+            "on_error": lambda b, e, delay: errors.append((b, str(e), delay)),
+        },
+    )
+    thread.start()
+    thread.join(5.0)
+    assert not thread.is_alive()
+    assert errors == [([tmp_path / "a.md"], "database is locked", 0.5)]
+    assert batches == [[tmp_path / "a.md"]]
+    assert calls[1] - calls[0] >= 0.5
+
+
+def test_update_indexes_changes_and_removals(vault_dir, manager):
+    """Test that update stores changed files and drops deleted ones."""
+    conn = manager.get_connection()
+    pipeline = IngestionPipeline(SimpleChunker(100, 0), DummyEmbedder())
+    notes = vault_dir / "notes"
+    pipeline.ingest(notes, conn)
+    (notes / "sub").mkdir()
+    (notes / "sub" / "a.md").write_text("A")
+    (notes / "sub" / "b.md").write_text("B")
+    (notes / "garden.md").write_text("Plant peppers in June.")
+
+    stats = pipeline.update([notes / "garden.md", notes / "sub"], conn)
+    assert (stats["stored"], stats["removed"]) == (3, 0)
+    assert pipeline.update([notes / "garden.md"], conn)["unchanged"] == 1
+
+    (notes / "sub" / "a.md").unlink()
+    (notes / "sub" / "b.md").unlink()
+    (notes / "sub").rmdir()
+    assert pipeline.update([notes / "sub"], conn)["removed"] == 2
+    assert conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0] == 1
+    assert conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0] == 1
+
+
+@pytest.mark.parametrize("polling", [True, False])
+def test_watcher_reports_saves_and_deletes(vault_dir, polling):
+    """Test that both watchers see writes, atomic renames and deletions."""
+    watcher = create_watcher(vault_dir, polling=polling, interval=0.1)
+    if not polling and not isinstance(watcher, InotifyWatcher):
+        pytest.skip("inotify is not available")
+    assert isinstance(watcher, PollingWatcher) == polling
+    notes = vault_dir / "notes"
+    try:
+        (notes / "new.md").write_text("New note")
+        # Editors often save by writing a temporary file and renaming it
+        (notes / ".garden.md.swp").write_text("Plant beans")
+        (notes / ".garden.md.swp").rename(notes / "garden.md")
+        expected = {notes / "new.md", notes / "garden.md"}
+        paths = read_until(watcher, lambda paths: expected <= set(paths))
+        assert expected <= set(paths)
+        assert not any(p.name.startswith(".") for p in paths)
+
+        (notes / "new.md").unlink()
+        assert notes / "new.md" in read_until(watcher, lambda paths: notes / "new.md" in paths)
+    finally:
+        watcher.close()
+
+
+def test_watch_keeps_retrieval_fresh(vault_dir, manager):
+    """Test that an edit is retrievable within seconds without a full ingest."""
+    pipeline = IngestionPipeline(SimpleChunker(100, 0), DummyEmbedder())
+    pipeline.ingest(vault_dir / "notes", manager.get_connection())
+    batches = []
+    stop = threading.Event()
+    watcher = create_watcher(vault_dir, interval=0.1)
+
+    def update(batch):
+        return pipeline.update(batch, manager.get_connection())
+
+    thread = threading.Thread(
+        target=watch,
+        args=(watcher, update),
+        kwargs={"debounce": 0.1, "stop": stop, "on_batch": lambda b, s: batches.append(b)},
+    )
+    thread.start()
+    try:
+        time.sleep(0.2)
+        (vault_dir / "notes" / "shed.md").write_text("Fix the shed roof.")
+        retriever = VectorRetriever(manager.connect(read_only=True), DummyEmbedder())
+        deadline = time.monotonic() + 3.0
+        while time.monotonic() < deadline:
+            results = retriever.retrieve("Fix the shed roof.", top_k=1)
+            if results and results[0]["content"] == "Fix the shed roof.":
+                break
+            time.sleep(0.05)
+        assert results[0]["content"] == "Fix the shed roof."
+        assert all(len(batch) == 1 for batch in batches)
+    finally:
+        stop.set()
+        thread.join()
+        watcher.close()
+        retriever.conn.close()
+
+
+def test_rescan_after_overflow_finds_deletions(vault_dir, manager):
+    """Test that re-checking a directory drops documents deleted beneath it."""
+    conn = manager.get_connection()
+    pipeline = IngestionPipeline(SimpleChunker(100, 0), DummyEmbedder())
+    notes = vault_dir / "notes"
+    (notes / "sub").mkdir()
+    (notes / "sub" / "a.md").write_text("A")
+    pipeline.ingest(vault_dir, conn)
+    (notes / "sub" / "a.md").unlink()
+    (notes / "garden.md").unlink()
+    (notes / "shed.md").write_text("Fix the shed roof.")
+
+    stats = pipeline.update([vault_dir], conn)
+    assert (stats["stored"], stats["removed"]) == (1, 2)
+    paths = [row[0] for row in conn.execute("SELECT path FROM documents")]
+    assert paths == [str(notes / "shed.md")]